@@ -0,0 +1,89 @@
+"""Concurrent /api/clarify throughput: blocking Gemini call vs the async client.
+
+Gemini is replaced with an in-process fake with fixed latency so no API quota
+is used. The "blocking" mode reproduces the previous behaviour (a synchronous
+`generate_content` call inside the async handler); the "async" mode awaits the
+shared client like the app does now.
+
+Run from backend/:
+
+    python benchmarks/bench_clarify_concurrency.py --requests 40 --concurrency 20 --latency 0.2
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("PERPLEXITY_API_KEY", "bench")
+# every request sends the same clarify prompt; the LLM response cache would
+# answer all but the first without touching the fake
+os.environ.setdefault("LLM_CACHE_MODE", "off")
+# measure the clarify call alone, without background catalog prefetches
+os.environ.setdefault("PREFETCH_ENABLED", "0")
+
+import httpx  # noqa: E402
+
+import main  # noqa: E402
+
+_RESPONSE = json.dumps(
+    {"questions": [{"id": "q1", "question": "복용 중인 약이 있나요?", "kind": "text"}]},
+    ensure_ascii=False,
+)
+
+
+class BlockingGemini:
+    model = "fake"
+
+    def __init__(self, latency: float) -> None:
+        self.latency = latency
+
+    async def generate_text(self, contents: str, model: str | None = None) -> str:
+        time.sleep(self.latency)  # what a sync SDK call does to the loop
+        return _RESPONSE
+
+
+class AsyncGemini(BlockingGemini):
+    async def generate_text(self, contents: str, model: str | None = None) -> str:
+        await asyncio.sleep(self.latency)
+        return _RESPONSE
+
+
+async def run(fake: BlockingGemini, requests: int, concurrency: int) -> float:
+    main._gemini = fake  # type: ignore[assignment]
+    sem = asyncio.Semaphore(concurrency)
+    body = {"supplement_type": "오메가3", "budget_krw_per_month": 30000, "target_and_concerns": "40대 여성, 혈행"}
+    transport = httpx.ASGITransport(app=main.app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+
+        async def one() -> None:
+            async with sem:
+                resp = await client.post("/api/clarify", json=body)
+                resp.raise_for_status()
+
+        started = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return time.perf_counter() - started
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=40)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument("--latency", type=float, default=0.2, help="fake Gemini latency in seconds")
+    args = parser.parse_args()
+
+    for label, fake in (("blocking", BlockingGemini(args.latency)), ("async", AsyncGemini(args.latency))):
+        elapsed = asyncio.run(run(fake, args.requests, args.concurrency))
+        print(f"{label:>8}: {args.requests} requests in {elapsed:.2f}s -> {args.requests / elapsed:.1f} req/s")
+
+
+if __name__ == "__main__":
+    main_cli()
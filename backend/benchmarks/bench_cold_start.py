@@ -0,0 +1,144 @@
+"""Cold start: module import time, boot-to-ready time and first-request latency.
+
+Each run spawns fresh interpreters, so nothing is warm:
+
+- import: `import main` in a new process (dummy API keys)
+- boot: uvicorn started against the local fake upstreams
+  (benchmarks/fake_upstreams.py); reports time until /healthz answers and
+  until /readyz answers 200 (n/a when the app has no readiness probe)
+- first/second: latency of the first and second /api/clarify once live
+
+Run from backend/:
+
+    python benchmarks/bench_cold_start.py --runs 5
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.load_test import BACKEND, _free_port, _wait_ready  # noqa: E402
+
+_IMPORT_SNIPPET = "import time; t = time.perf_counter(); import {module}; print(time.perf_counter() - t)"
+_CLARIFY_BODY = {"supplement_type": "오메가3", "budget_krw_per_month": 30000, "target_and_concerns": "40대 여성, 혈행"}
+
+
+def _env(fake_url: str, db_dir: str) -> Dict[str, str]:
+    return {
+        **os.environ,
+        "GOOGLE_API_KEY": "cold-start",
+        "PERPLEXITY_API_KEY": "cold-start",
+        "PERPLEXITY_API_URL": f"{fake_url}/chat/completions",
+        "GEMINI_BASE_URL": fake_url,
+        "CATALOG_DB_PATH": os.path.join(db_dir, "catalog.sqlite3"),
+        "LOG_LEVEL": "WARNING",
+    }
+
+
+def time_import(module: str, env: Dict[str, str]) -> float:
+    out = subprocess.run(
+        [sys.executable, "-c", _IMPORT_SNIPPET.format(module=module)],
+        cwd=BACKEND, env=env, check=True, capture_output=True, text=True,
+    )
+    return float(out.stdout.strip().splitlines()[-1])
+
+
+def _wait_status(url: str, proc: subprocess.Popen, timeout: float = 30.0) -> Optional[float]:
+    """Seconds until `url` answers 200; None if it does not exist (404)."""
+    started = time.perf_counter()
+    while time.perf_counter() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"app exited with code {proc.returncode}")
+        try:
+            status = httpx.get(url, timeout=1.0).status_code
+        except httpx.HTTPError:
+            status = 0
+        if status == 200:
+            return time.perf_counter() - started
+        if status == 404:
+            return None
+        time.sleep(0.005)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def boot_once(fake_url: str, env: Dict[str, str]) -> Dict[str, Optional[float]]:
+    port = _free_port()
+    app_url = f"http://127.0.0.1:{port}"
+    started = time.perf_counter()
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=BACKEND, env=env,
+    )
+    try:
+        _wait_status(f"{app_url}/healthz", proc)
+        live = time.perf_counter() - started
+        ready_after = _wait_status(f"{app_url}/readyz", proc)
+        ready = time.perf_counter() - started if ready_after is not None else None
+        latencies = []
+        with httpx.Client(base_url=app_url, timeout=30.0) as client:
+            for i in range(2):
+                # distinct bodies so the LLM response cache does not answer the second
+                body = {**_CLARIFY_BODY, "target_and_concerns": f"{_CLARIFY_BODY['target_and_concerns']} #{i}"}
+                t0 = time.perf_counter()
+                client.post("/api/clarify", json=body).raise_for_status()
+                latencies.append(time.perf_counter() - t0)
+        return {"live": live, "ready": ready, "first": latencies[0], "second": latencies[1]}
+    finally:
+        proc.terminate()
+        proc.wait(timeout=10)
+
+
+def _fmt(values: List[Optional[float]], scale: float = 1e3) -> str:
+    present = [v for v in values if v is not None]
+    if not present:
+        return "n/a"
+    return f"{statistics.median(present) * scale:8.0f} ms (min {min(present) * scale:.0f})"
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    fake_port = _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    db_dir = tempfile.TemporaryDirectory()
+    env = _env(fake_url, db_dir.name)
+    fake = subprocess.Popen(
+        [sys.executable, str(BACKEND / "benchmarks" / "fake_upstreams.py"), "--port", str(fake_port),
+         "--perplexity-latency", "0", "--gemini-latency", "0"],
+        cwd=BACKEND,
+    )
+    try:
+        _wait_ready(f"{fake_url}/_stats", fake)
+        imports = [time_import("main", env) for _ in range(args.runs)]
+        sdk = [time_import("google.genai", env) for _ in range(args.runs)]
+        boots = [boot_once(fake_url, env) for _ in range(args.runs)]
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+        db_dir.cleanup()
+
+    print(f"median of {args.runs} runs")
+    print(f"  import main             {_fmt(imports)}")
+    print(f"  import google.genai     {_fmt(sdk)}   (reference: SDK alone)")
+    print(f"  spawn -> /healthz 200   {_fmt([b['live'] for b in boots])}")
+    print(f"  spawn -> /readyz 200    {_fmt([b['ready'] for b in boots])}")
+    print(f"  first /api/clarify      {_fmt([b['first'] for b in boots])}")
+    print(f"  second /api/clarify     {_fmt([b['second'] for b in boots])}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,106 @@
+"""Benchmark: shared JSON extractor vs the previous regex + find/rfind approach.
+
+Payloads cover the clean case, code fences, trailing prose with braces and
+adversarial inputs (many unmatched braces). For each the script reports the
+time per call and whether the result was the intended JSON value.
+
+Run from backend/:
+
+    python benchmarks/bench_json_extract.py --scale 1
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import re
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import jsonextract  # noqa: E402
+
+
+def legacy_extract(content: str) -> Any:
+    """The extraction previously inlined in call_perplexity_json."""
+    match = re.search(r"\{[\s\S]*\}$", content.strip())
+    if not match:
+        start = content.find("{")
+        end = content.rfind("}")
+        if start != -1 and end != -1 and end > start:
+            json_str = content[start : end + 1]
+        else:
+            raise ValueError("no JSON")
+    else:
+        json_str = match.group(0)
+    return json.loads(json_str)
+
+
+def catalog(n: int) -> Dict[str, Any]:
+    return {
+        "products": [
+            {
+                "product_name": f"오메가-3 제품 {i}",
+                "brand": "브랜드 {x}",
+                "ingredient_amount": 700 + i,
+                "ingredient_unit": "mg",
+                "price_per_month_krw": 18000 + i * 10,
+                "daily_dose": "1일 1회 {1캡슐}",
+            }
+            for i in range(n)
+        ]
+    }
+
+
+def payloads(scale: int) -> List[Tuple[str, str, Any]]:
+    big = catalog(2000 * scale)
+    big_text = json.dumps(big, ensure_ascii=False)
+    small = catalog(10)
+    small_text = json.dumps(small, ensure_ascii=False)
+    return [
+        ("clean 10 products", small_text, small),
+        ("clean large", big_text, big),
+        ("fenced", f"```json\n{small_text}\n```", small),
+        ("prose after with braces", f"{small_text}\n\n참고: {{출처}} 등 {{자세한 내용}}은 링크 참조.", small),
+        ("prose before and after", f"다음은 결과입니다 (예: {{x}}):\n{big_text}\n감사합니다.", big),
+        ("stray opening braces", "{" * (5000 * scale) + " 응답 " + small_text + " 끝", small),
+        # any of the objects is acceptable here; the point is the cost
+        ("many small objects", " ".join('{"i": %d}' % i for i in range(5000 * scale)), None),
+        ("truncated outer", '{"meta": {"v": 1}, "products": ' + small_text, small),
+    ]
+
+
+def run(fn: Callable[[str], Any], text: str, expected: Any, repeat: int) -> Tuple[float, str]:
+    started = time.perf_counter()
+    outcome = "ok"
+    for _ in range(repeat):
+        try:
+            value = fn(text)
+        except Exception as e:
+            outcome = f"error ({e.__class__.__name__})"
+            continue
+        if expected is not None and value != expected:
+            outcome = "wrong value"
+    return (time.perf_counter() - started) / repeat, outcome
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--scale", type=int, default=1, help="multiplies payload sizes")
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    print(f"orjson: {'yes' if jsonextract.orjson is not None else 'no'}")
+    print(f"{'payload':<26} {'KB':>7} {'legacy ms':>10} {'legacy':<24} {'new ms':>9} {'new':<18}")
+    for name, text, expected in payloads(args.scale):
+        t_old, r_old = run(legacy_extract, text, expected, args.repeat)
+        t_new, r_new = run(lambda t: jsonextract.extract_json(t, expect=dict), text, expected, args.repeat)
+        size_kb = len(text.encode()) / 1024
+        print(f"{name:<26} {size_kb:>7.1f} {t_old * 1e3:>10.2f} {r_old:<24} {t_new * 1e3:>9.2f} {r_new:<18}")
+
+
+if __name__ == "__main__":
+    main_cli()
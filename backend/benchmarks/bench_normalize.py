@@ -0,0 +1,140 @@
+"""Benchmark: batch product normalization vs the previous per-item try/except.
+
+Generates a large noisy catalog in the shapes LLMs actually return (Korean
+price strings, "1,000mg" amounts, epa/dha fields, missing names) and times
+both approaches, reporting how many prices/amounts each recovered.
+
+Run from backend/:
+
+    python benchmarks/bench_normalize.py --items 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, TypeVar
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from models import Product  # noqa: E402
+from normalization import normalize_products  # noqa: E402
+
+T = TypeVar("T")
+
+
+def parse_float(value: Any) -> Optional[float]:
+    try:
+        if value is None:
+            return None
+        s = str(value).replace(",", "").strip()
+        return float(s)
+    except Exception:
+        return None
+
+
+def legacy_normalize(products_raw: List[Dict[str, Any]]) -> List[Product]:
+    """The conversion loop previously inlined in recommend."""
+    products: List[Product] = []
+    for item in products_raw:
+        try:
+            products.append(Product(**item))
+        except Exception:
+            epa = parse_float(item.get("epa_mg"))
+            dha = parse_float(item.get("dha_mg"))
+            amount = parse_float(item.get("ingredient_amount"))
+            if amount is None:
+                if epa is not None and dha is not None:
+                    amount = epa + dha
+                else:
+                    amount = epa if epa is not None else dha
+            unit = (item.get("ingredient_unit") and str(item.get("ingredient_unit"))) or ("mg" if amount is not None else None)
+            price_raw = str(item.get("price_per_month_krw"))
+            price_val = int(price_raw.replace("_", "").replace(",", "")) if price_raw.replace("_", "").replace(",", "").isdigit() else None
+            products.append(
+                Product(
+                    product_name=str(item.get("product_name") or item.get("name") or "unknown"),
+                    brand=(item.get("brand") and str(item.get("brand"))) or None,
+                    key_ingredient=(item.get("key_ingredient") and str(item.get("key_ingredient"))) or None,
+                    ingredient_amount=amount,
+                    ingredient_unit=unit,
+                    price_per_month_krw=price_val,
+                    capsule_type=item.get("capsule_type"),
+                    capsule_count=int(item.get("capsule_count")) if str(item.get("capsule_count")).isdigit() else None,
+                    daily_dose=item.get("daily_dose"),
+                    purchase_url=item.get("purchase_url"),
+                )
+            )
+    return products
+
+
+def noisy_catalog(n: int, noise: float, seed: int = 3) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        price = rng.randrange(8000, 60000, 1000)
+        amount = rng.randrange(300, 2000, 50)
+        item: Dict[str, Any] = {
+            "product_name": f"오메가-3 {i}",
+            "brand": "브랜드",
+            "ingredient_amount": amount,
+            "ingredient_unit": "mg",
+            "price_per_month_krw": price,
+            "capsule_count": 60,
+        }
+        if rng.random() < noise:
+            kind = rng.randrange(5)
+            if kind == 0:
+                item["price_per_month_krw"] = f"{price:,}원"
+            elif kind == 1:
+                item["ingredient_amount"] = f"{amount:,}mg"
+                del item["ingredient_unit"]
+            elif kind == 2:
+                del item["ingredient_amount"]
+                item["epa_mg"], item["dha_mg"] = str(amount // 2), amount // 2
+            elif kind == 3:
+                item["name"] = item.pop("product_name")
+                item["capsule_count"] = "60캡슐"
+            else:
+                item["price_per_month_krw"] = f"{price // 10000}만 {price % 10000 // 1000}천원"
+        items.append(item)
+    return items
+
+
+def best_of(repeat: int, fn: Callable[..., T], *args: Any) -> Tuple[T, float]:
+    best = float("inf")
+    for _ in range(max(1, repeat)):
+        t0 = time.perf_counter()
+        result = fn(*args)
+        best = min(best, time.perf_counter() - t0)
+    return result, best
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--items", type=int, default=10000)
+    parser.add_argument("--noise", type=float, nargs="+", default=[0.0, 0.3, 0.9])
+    parser.add_argument("--repeat", type=int, default=5, help="best-of-N timing")
+    args = parser.parse_args()
+
+    print(f"{'noise':>5} {'legacy ms':>10} {'batch ms':>9} {'legacy prices':>14} {'batch prices':>13} {'legacy amounts':>15} {'batch amounts':>14}")
+    for noise in args.noise:
+        items = noisy_catalog(args.items, noise)
+        old, old_s = best_of(args.repeat, legacy_normalize, items)
+        (new, stats), new_s = best_of(args.repeat, normalize_products, items)
+        old_prices = sum(p.price_per_month_krw is not None for p in old)
+        new_prices = sum(p.price_per_month_krw is not None for p in new)
+        old_amounts = sum(p.ingredient_amount is not None for p in old)
+        new_amounts = sum(p.ingredient_amount is not None for p in new)
+        print(
+            f"{noise:>5.1f} {old_s * 1e3:>10.1f} {new_s * 1e3:>9.1f} "
+            f"{old_prices:>14} {new_prices:>13} {old_amounts:>15} {new_amounts:>14}"
+        )
+        print(f"      coercion: {stats.as_dict()}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,115 @@
+"""Benchmark: recommend steps 3-5 through the live pipeline vs the precomputed index.
+
+Fills the in-process catalog and insight caches with a synthetic catalog,
+then times, per request, the cached pipeline (budget filter, preliminary
+top 3, insight lookup, final ranking) against an index lookup for a mix of
+budgets and weight profiles. Also reports how long indexing one type takes
+and how many (profile, budget bucket) rankings it produces. No upstream is
+called.
+
+Run from backend/:
+
+    python benchmarks/bench_recommend_index.py --products 10 30 100 --requests 2000
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, List
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+os.environ.setdefault("GOOGLE_API_KEY", "bench")
+os.environ.setdefault("PERPLEXITY_API_KEY", "bench")
+
+import main  # noqa: E402
+from models import ProductInsight, RecommendInput  # noqa: E402
+
+
+def make_catalog(n: int, rng: random.Random) -> List[Dict[str, Any]]:
+    return [
+        {
+            "product_name": f"벤치 제품 {i + 1}",
+            "brand": f"브랜드{i % 7}",
+            "key_ingredient": "EPA+DHA",
+            "ingredient_amount": rng.randrange(300, 1500, 50),
+            "ingredient_unit": "mg",
+            "price_per_month_krw": rng.randrange(9000, 45000, 500),
+        }
+        for i in range(n)
+    ]
+
+
+def seed_caches(supplement_type: str, catalog: List[Dict[str, Any]], rng: random.Random) -> str:
+    key = main.catalog_key(supplement_type)
+    main._catalog_cache.set(key, catalog)
+    for p in main.normalize_products(catalog)[0]:
+        main._insight_cache.set(
+            main.insight_key(p),
+            ProductInsight(
+                product_name=p.product_name,
+                brand_trust_score_0to100=rng.randint(40, 95),
+                review_sentiment_0to100=rng.randint(40, 95),
+            ),
+        )
+    return key
+
+
+async def pipeline(payload: RecommendInput) -> Any:
+    products_raw = await main.get_catalog_raw(payload.supplement_type)
+    prepared = main._candidates(main._candidate_products(products_raw, payload.budget_krw_per_month))
+    insights_map = await main.get_insights(prepared.top3)
+    return main._final_rank(prepared.products, prepared.features, insights_map, main._profile_for(payload.answers))
+
+
+async def lookup(payload: RecommendInput) -> Any:
+    entry = main._index_lookup(payload)
+    return [rp.model_copy() for rp in entry.ranked]
+
+
+async def time_per_request(fn: Any, payloads: List[RecommendInput]) -> float:
+    t0 = time.perf_counter()
+    for payload in payloads:
+        await fn(payload)
+    return (time.perf_counter() - t0) / len(payloads)
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--products", type=int, nargs="+", default=[10, 30, 100], help="catalog sizes")
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    async def run() -> None:
+        print(f"{'products':>8} {'rankings':>9} {'build ms':>9} {'pipeline us':>12} {'index us':>9} {'speedup':>8}")
+        for n in args.products:
+            rng = random.Random(args.seed)
+            supplement_type = f"벤치{n}"
+            key = seed_caches(supplement_type, make_catalog(n, rng), rng)
+            t0 = time.perf_counter()
+            rankings = main._build_index(key)
+            build = time.perf_counter() - t0
+            payloads = [
+                RecommendInput(
+                    supplement_type=supplement_type,
+                    budget_krw_per_month=rng.choice([None, 15000, 20000, 30000, 40000]),
+                    target_and_concerns="40대 여성",
+                    answers={"preference": rng.choice(["가성비", "브랜드 신뢰", ""])},
+                )
+                for _ in range(args.requests)
+            ]
+            slow = await time_per_request(pipeline, payloads)
+            fast = await time_per_request(lookup, payloads)
+            print(f"{n:>8} {rankings:>9} {build * 1e3:>9.1f} {slow * 1e6:>12.1f} {fast * 1e6:>9.1f} {slow / fast:>7.1f}x")
+
+    asyncio.run(run())
+
+
+if __name__ == "__main__":
+    main_cli()
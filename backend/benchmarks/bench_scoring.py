@@ -0,0 +1,140 @@
+"""Micro-benchmark: vectorized scoring vs the previous per-element Python loops.
+
+Checks that both produce the same top 3 and scores, then times a full
+preliminary + final ranking pass over synthetic catalogs of growing size.
+
+Run from backend/:
+
+    python benchmarks/bench_scoring.py --sizes 10 100 1000 10000
+"""
+
+from __future__ import annotations
+
+import argparse
+import math
+import random
+import sys
+import timeit
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+import scoring  # noqa: E402
+from models import Product, ProductInsight  # noqa: E402
+
+
+# --- previous implementation, kept verbatim as the baseline -----------------
+
+def legacy_normalize(values: List[Optional[float]]) -> List[float]:
+    cleaned = [v for v in values if v is not None and not math.isnan(v)]
+    if not cleaned:
+        return [0.0 for _ in values]
+    min_v, max_v = min(cleaned), max(cleaned)
+    if math.isclose(min_v, max_v):
+        return [1.0 if v is not None else 0.0 for v in values]
+    return [((v - min_v) / (max_v - min_v)) if v is not None else 0.0 for v in values]
+
+
+def legacy_infer_weights(answers: Dict[str, Any]) -> Tuple[float, float, float]:
+    pref = str(answers.get("preference", "balanced")).lower()
+    if "가성비" in pref or "value" in pref:
+        return 0.5, 0.3, 0.2
+    if "신뢰" in pref or "trust" in pref or "브랜드" in pref:
+        return 0.25, 0.5, 0.25
+    return 0.34, 0.33, 0.33
+
+
+def legacy_rank(products: List[Product], insights_map: Dict[str, ProductInsight], answers: Dict[str, Any]):
+    value_w, trust_w, reviews_w = legacy_infer_weights(answers)
+    potency_vals = []
+    price_vals = []
+    for p in products:
+        potency_vals.append(p.ingredient_amount or 0.0)
+        price_vals.append(float(p.price_per_month_krw) if p.price_per_month_krw else None)
+    potency_norm = legacy_normalize(potency_vals)
+    price_norm_raw = legacy_normalize([v if v is not None else 0.0 for v in price_vals])
+    price_norm = [1.0 - v if price_vals[i] is not None else 0.5 for i, v in enumerate(price_norm_raw)]
+    prelim_scores = [0.7 * potency_norm[i] + 0.3 * price_norm[i] for i in range(len(products))]
+    prelim = sorted(range(len(products)), key=lambda i: prelim_scores[i], reverse=True)[:3]
+    trust_vals = []
+    review_vals = []
+    for p in products:
+        ins = insights_map.get(p.product_name)
+        trust_vals.append(float(ins.brand_trust_score_0to100) if ins and ins.brand_trust_score_0to100 is not None else None)
+        review_vals.append(float(ins.review_sentiment_0to100) if ins and ins.review_sentiment_0to100 is not None else None)
+    trust_norm = legacy_normalize(trust_vals)
+    review_norm = legacy_normalize(review_vals)
+    final_scores = [
+        value_w * (0.6 * price_norm[i] + 0.4 * potency_norm[i]) + trust_w * trust_norm[i] + reviews_w * review_norm[i]
+        for i in range(len(products))
+    ]
+    ranked = sorted(range(len(products)), key=lambda i: final_scores[i], reverse=True)[:3]
+    return prelim, ranked, [final_scores[i] for i in ranked]
+
+
+# --- vectorized ---------------------------------------------------------------
+
+def vector_rank(products: List[Product], insights_map: Dict[str, ProductInsight], answers: Dict[str, Any]):
+    features = scoring.value_features(scoring.ProductColumns.from_products(products))
+    prelim = scoring.top_k(scoring.preliminary_scores(features), 3)
+    profile = scoring.resolve_profile(answers)
+    ranked, scores = scoring.rank(products, insights_map, profile, k=3, features=features)
+    return list(prelim), list(ranked), [float(scores[i]) for i in ranked]
+
+
+def columnar_rank(cols: scoring.ProductColumns, trust, reviews, profile: scoring.WeightProfile):
+    """Scoring only, on prebuilt columns (what a columnar catalog store would hand over)."""
+    features = scoring.value_features(cols)
+    prelim = scoring.top_k(scoring.preliminary_scores(features), 3)
+    return prelim, scoring.top_k(scoring.final_scores(features, trust, reviews, profile), 3)
+
+
+def make_catalog(n: int, seed: int = 7) -> Tuple[List[Product], Dict[str, ProductInsight]]:
+    rng = random.Random(seed)
+    products = [
+        Product(
+            product_name=f"제품 {i}",
+            ingredient_amount=rng.choice([None, rng.randrange(100, 2000, 50)]),
+            price_per_month_krw=rng.choice([None, rng.randrange(5000, 60000, 1000)]),
+        )
+        for i in range(n)
+    ]
+    insights = {
+        p.product_name: ProductInsight(
+            product_name=p.product_name,
+            brand_trust_score_0to100=rng.randrange(40, 100),
+            review_sentiment_0to100=rng.choice([None, rng.randrange(30, 100)]),
+        )
+        for p in rng.sample(products, k=min(n, max(3, n // 3)))
+    }
+    return products, insights
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 100, 1000, 10000])
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    answers = {"preference": "가성비"}
+    print(f"{'n':>7} {'legacy ms':>10} {'vector ms':>10} {'speedup':>8} {'columns ms':>11}")
+    for n in args.sizes:
+        products, insights = make_catalog(n)
+        legacy = legacy_rank(products, insights, answers)
+        vector = vector_rank(products, insights, answers)
+        assert legacy[0] == vector[0] and legacy[1] == vector[1], (legacy, vector)
+        assert all(math.isclose(a, b, abs_tol=1e-12) for a, b in zip(legacy[2], vector[2]))
+
+        number = max(1, 20000 // max(n, 1))
+        t_legacy = min(timeit.repeat(lambda: legacy_rank(products, insights, answers), number=number, repeat=args.repeat)) / number
+        t_vector = min(timeit.repeat(lambda: vector_rank(products, insights, answers), number=number, repeat=args.repeat)) / number
+        cols = scoring.ProductColumns.from_products(products)
+        trust, reviews = scoring.insight_columns(products, insights)
+        profile = scoring.resolve_profile(answers)
+        t_cols = min(timeit.repeat(lambda: columnar_rank(cols, trust, reviews, profile), number=number, repeat=args.repeat)) / number
+        print(f"{n:>7} {t_legacy * 1e3:>10.3f} {t_vector * 1e3:>10.3f} {t_legacy / t_vector:>7.1f}x {t_cols * 1e3:>11.3f}")
+
+
+if __name__ == "__main__":
+    main_cli()
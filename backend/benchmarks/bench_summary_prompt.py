@@ -0,0 +1,187 @@
+"""Benchmark: Gemini summary prompt size and latency, previous full dumps vs compact builder.
+
+Builds a recommend payload with answers and a client-supplied product
+list, plus three ranked products with insights, and renders the summary
+prompt both ways (single and batch). It reports UTF-8 bytes and estimated
+tokens. It then times real GeminiClient calls against the local fake
+upstream, whose latency grows with prompt size (`--prefill-per-kb`).
+
+Run from backend/:
+
+    python benchmarks/bench_summary_prompt.py --calls 20 --prefill-per-kb 0.05
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Dict, List, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.load_test import BACKEND, _free_port, _wait_ready  # noqa: E402
+from llm import GeminiClient  # noqa: E402
+from main import _batch_summary_prompt, _summary_prompt  # noqa: E402
+from models import Product, ProductInsight, RankedProduct, RecommendInput  # noqa: E402
+from telemetry import estimate_tokens  # noqa: E402
+
+
+def legacy_summary_prompt(payload: RecommendInput, ranked: List[RankedProduct]) -> str:
+    """The summary prompt as previously built in main.py."""
+    rank_payload = {
+        "user": payload.model_dump(),
+        "ranked": [
+            {
+                "rank": rp.rank,
+                "product": rp.product.model_dump(),
+                "insight": rp.insight.model_dump() if rp.insight else None,
+                "score": rp.score,
+            }
+            for rp in ranked
+        ],
+    }
+    return (
+        "한국 35~50세 여성의 구매 맥락에 맞춰 아래 데이터를 바탕으로 각 제품의 핵심 스펙과 추천 이유를 2-3줄로 간결 요약하세요.\n"
+        "포맷: JSON { ranked: [ { rank, summary_kr } ], final_advice_markdown }\n"
+        + json.dumps(rank_payload, ensure_ascii=False)
+    )
+
+
+def legacy_batch_summary_prompt(items: List[Tuple[int, RecommendInput, List[RankedProduct]]]) -> str:
+    profiles = [
+        {
+            "id": idx,
+            "user": payload.model_dump(exclude={"products"}),
+            "ranked": [
+                {
+                    "rank": rp.rank,
+                    "product": rp.product.model_dump(),
+                    "insight": rp.insight.model_dump() if rp.insight else None,
+                    "score": rp.score,
+                }
+                for rp in ranked
+            ],
+        }
+        for idx, payload, ranked in items
+    ]
+    return (
+        "한국 35~50세 여성의 구매 맥락에 맞춰, 아래 각 사용자 프로필(id)별로 추천 제품의 핵심 스펙과 추천 이유를 2-3줄로 간결 요약하세요.\n"
+        "포맷: JSON { results: [ { id, ranked: [ { rank, summary_kr } ], final_advice_markdown } ] }\n"
+        + json.dumps(profiles, ensure_ascii=False)
+    )
+
+
+def _product(i: int) -> Product:
+    return Product(
+        product_name=f"알티지 오메가3 프리미엄 {i + 1}",
+        brand=f"브랜드{i % 4}",
+        key_ingredient="EPA+DHA",
+        ingredient_amount=600.0 + 50 * i,
+        ingredient_unit="mg",
+        price_per_month_krw=15000 + 1000 * i,
+        capsule_type="연질캡슐" if i % 2 else None,
+        capsule_count=60,
+        daily_dose="1일 1회, 2캡슐",
+        purchase_url=f"https://example.com/products/omega3-premium-{i + 1}?ref=search",
+    )
+
+
+def make_inputs(client_products: int) -> Tuple[RecommendInput, List[RankedProduct]]:
+    catalog = [_product(i) for i in range(max(client_products, 3))]
+    payload = RecommendInput(
+        supplement_type="오메가3",
+        budget_krw_per_month=30000,
+        target_and_concerns="45세 여성, 혈행 개선과 안구 건조",
+        answers={"preference": "가성비", "medications": "", "allergy": "갑각류", "form": None},
+        products=catalog[:client_products] or None,
+    )
+    ranked = [
+        RankedProduct(
+            rank=r + 1,
+            product=catalog[r],
+            insight=ProductInsight(
+                product_name=catalog[r].product_name,
+                pros=["흡수율이 좋음", "비린내 적음"],
+                cons=["캡슐이 큼"],
+                brand_trust_score_0to100=80 - 5 * r,
+                review_sentiment_0to100=75,
+                safety_flags=[],
+                brand_trust_summary_kr="GMP 인증, 제조 이력 양호",
+                review_summary_kr="대체로 만족, 일부 트림 언급",
+                notes=None,
+            ),
+            score=0.8123456789 - 0.1 * r,
+        )
+        for r in range(3)
+    ]
+    return payload, ranked
+
+
+def sizes(prompt: str) -> Tuple[int, int]:
+    return len(prompt.encode("utf-8")), estimate_tokens(prompt)
+
+
+async def time_calls(client: GeminiClient, prompt: str, calls: int) -> List[float]:
+    latencies = []
+    for _ in range(calls):
+        t0 = time.perf_counter()
+        await client.generate_text(prompt)
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--client-products", type=int, default=10, help="products supplied in the request body")
+    parser.add_argument("--batch", type=int, default=8, help="profiles per batch summary prompt")
+    parser.add_argument("--calls", type=int, default=20, help="timed Gemini calls per prompt variant")
+    parser.add_argument("--latency", type=float, default=0.05, help="fake Gemini base latency in seconds")
+    parser.add_argument("--prefill-per-kb", type=float, default=0.05, help="fake Gemini seconds per KiB of prompt")
+    args = parser.parse_args()
+
+    payload, ranked = make_inputs(args.client_products)
+    items = [(i, payload, ranked) for i in range(args.batch)]
+    variants: Dict[str, Tuple[Callable[[], str], Callable[[], str]]] = {
+        "single": (lambda: legacy_summary_prompt(payload, ranked), lambda: _summary_prompt(payload, ranked)),
+        f"batch x{args.batch}": (lambda: legacy_batch_summary_prompt(items), lambda: _batch_summary_prompt(items)),
+    }
+    print(f"{'prompt':<12} {'legacy B':>9} {'compact B':>10} {'legacy tok':>11} {'compact tok':>12} {'saved':>6}")
+    for name, (legacy, compact) in variants.items():
+        (lb, lt), (cb, ct) = sizes(legacy()), sizes(compact())
+        print(f"{name:<12} {lb:>9} {cb:>10} {lt:>11} {ct:>12} {1 - ct / lt:>6.0%}")
+
+    port = _free_port()
+    fake_url = f"http://127.0.0.1:{port}"
+    fake = subprocess.Popen(
+        [sys.executable, str(BACKEND / "benchmarks" / "fake_upstreams.py"), "--port", str(port), "--jitter", "0",
+         "--gemini-latency", str(args.latency), "--gemini-prefill-per-kb", str(args.prefill_per_kb)],
+        cwd=BACKEND,
+    )
+    try:
+        _wait_ready(f"{fake_url}/_stats", fake)
+
+        async def run() -> None:
+            client = GeminiClient(api_key="bench", base_url=fake_url)
+            try:
+                print(f"\nfake Gemini: {args.latency * 1e3:.0f} ms + {args.prefill_per_kb * 1e3:.0f} ms/KiB, {args.calls} calls each")
+                for name, (legacy, compact) in variants.items():
+                    old = statistics.median(await time_calls(client, legacy(), args.calls))
+                    new = statistics.median(await time_calls(client, compact(), args.calls))
+                    print(f"  {name:<12} p50 legacy {old * 1e3:7.1f} ms   compact {new * 1e3:7.1f} ms")
+            finally:
+                await client.aclose()
+
+        asyncio.run(run())
+    finally:
+        fake.terminate()
+        fake.wait(timeout=10)
+
+
+if __name__ == "__main__":
+    main_cli()
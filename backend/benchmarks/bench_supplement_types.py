@@ -0,0 +1,104 @@
+"""Catalog cache hit rate: raw supplement_type keys vs canonicalized keys.
+
+Replays a query log (one supplement_type per line via --log, or a generated
+sample of realistic spellings, typos and unknown types) through an
+unbounded catalog cache twice: keyed by the previous whitespace/case
+normalization and keyed by supplement_types.SupplementIndex. Reports
+distinct keys (= Perplexity catalog calls while entries are fresh), hit rate, how queries were
+resolved and the per-query lookup cost.
+
+Run from backend/:
+
+    python benchmarks/bench_supplement_types.py --queries 500
+    python benchmarks/bench_supplement_types.py --log queries.txt
+"""
+
+from __future__ import annotations
+
+import argparse
+import random
+import sys
+import time
+from pathlib import Path
+from typing import Callable, List, Sequence, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from supplement_types import SupplementIndex  # noqa: E402
+
+# spellings seen for each type; the first is the most common
+VARIANTS: Sequence[Sequence[str]] = (
+    ("오메가3", "오메가-3", "오메가 3", "omega 3", "Omega-3", "Omega-3 피쉬오일", "rTG 오메가3", "알티지 오메가3", "오매가3", "피쉬오일", "오메가3 영양제", "EPA DHA"),
+    ("비타민D", "비타민 D", "비타민d3", "vitamin d", "Vitamin D3", "비타민디", "비타민 D 1000IU"),
+    ("유산균", "프로바이오틱스", "probiotics", "락토핏 유산균", "유산균 추천", "유산균분말"),
+    ("마그네슘", "마그네슘 영양제", "magnesium", "마그내슘", "마그네숨"),
+    ("종합비타민", "멀티비타민", "multivitamin", "종합 비타민"),
+    ("루테인", "루테인 지아잔틴", "lutein", "Lutein"),
+    ("밀크씨슬", "밀크시슬", "milk thistle", "실리마린"),
+    ("코엔자임Q10", "코큐텐", "CoQ10", "코엔자임 Q10"),
+    ("비타민C", "비타민 C", "vitamin c", "비타민씨"),
+    ("홍삼", "홍삼정", "red ginseng"),
+    ("콜라겐", "저분자 콜라겐", "collagen"),
+    ("아르기닌", "L-아르기닌"),  # not in the alias table: passes through
+)
+
+
+def sample_log(n: int, seed: int = 7) -> List[str]:
+    rng = random.Random(seed)
+    # Zipf-like popularity over types, then over spellings within a type
+    type_weights = [1.0 / (i + 1) for i in range(len(VARIANTS))]
+    queries = []
+    for _ in range(n):
+        variants = rng.choices(VARIANTS, weights=type_weights)[0]
+        queries.append(rng.choices(variants, weights=[1.0 / (i + 1) ** 0.7 for i in range(len(variants))])[0])
+    return queries
+
+
+def legacy_key(supplement_type: str) -> str:
+    return " ".join(supplement_type.split()).lower()
+
+
+def replay(queries: Sequence[str], key: Callable[[str], str]) -> Tuple[int, float, float]:
+    """Return (distinct keys, hit rate, seconds) for an unbounded cache."""
+    seen = set()
+    hits = 0
+    started = time.perf_counter()
+    for q in queries:
+        k = key(q)
+        if k in seen:
+            hits += 1
+        else:
+            seen.add(k)
+    return len(seen), hits / max(1, len(queries)), time.perf_counter() - started
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--queries", type=int, default=500, help="size of the generated log")
+    parser.add_argument("--log", help="query log file, one supplement_type per line")
+    args = parser.parse_args()
+
+    if args.log:
+        queries = [line.strip() for line in Path(args.log).read_text(encoding="utf-8").splitlines() if line.strip()]
+    else:
+        queries = sample_log(args.queries)
+
+    index = SupplementIndex()
+    cold_index = SupplementIndex(memo_size=0)
+    rows = [
+        ("legacy", *replay(queries, legacy_key)),
+        ("canonical", *replay(queries, lambda q: index.resolve(q).key)),
+        ("no memo", *replay(queries, lambda q: cold_index.resolve(q).key)),
+    ]
+    print(f"{len(queries)} queries, {len(set(queries))} distinct spellings\n")
+    print(f"{'keying':<10} {'fetches':>7} {'hit rate':>9} {'us/query':>9}")
+    for label, keys, hit_rate, seconds in rows:
+        print(f"{label:<10} {keys:>7} {hit_rate:>9.2%} {seconds / len(queries) * 1e6:>9.2f}")
+    print(f"\nresolved by: {index.snapshot()}")
+    unresolved = sorted({q for q in queries if index.resolve(q).method == "passthrough"})
+    if unresolved:
+        print(f"passthrough: {', '.join(unresolved[:20])}")
+
+
+if __name__ == "__main__":
+    main_cli()
@@ -0,0 +1,268 @@
+"""Local stand-ins for the Perplexity chat API and the Gemini REST API.
+
+One HTTP server answers both upstreams with canned, prompt-aware responses:
+
+  POST /chat/completions                      Perplexity (catalog / insights)
+  POST /{version}/models/{model}:generateContent        Gemini
+  POST /{version}/models/{model}:streamGenerateContent  Gemini, SSE
+  GET  /_stats, POST /_reset                  call counters
+  GET  /_stats/by_request                     call counters per X-Request-ID
+
+Latency, error rate and the share of malformed responses (fenced, wrapped
+in prose, truncated, noisy field values) are configurable per upstream.
+Latency can grow with prompt size (`--gemini-prefill-per-kb`) to model
+input-token processing time.
+Point the app at it with
+
+    PERPLEXITY_API_URL=http://127.0.0.1:8765/chat/completions
+    GEMINI_BASE_URL=http://127.0.0.1:8765
+
+Run from backend/:
+
+    python benchmarks/fake_upstreams.py --port 8765 --perplexity-latency 0.8 --gemini-latency 0.4
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import random
+import re
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List
+
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+MALFORMED_SHAPES = ("fenced", "prose", "truncated", "noisy")
+
+
+@dataclass
+class UpstreamBehavior:
+    latency_s: float = 0.5
+    jitter: float = 0.3  # latency is scaled by uniform(1 - jitter, 1 + jitter)
+    error_rate: float = 0.0
+    malformed_rate: float = 0.0
+    prefill_per_kb: float = 0.0  # extra seconds per KiB of prompt (UTF-8)
+
+    def delay(self, rng: random.Random, prompt: str = "") -> float:
+        prefill = self.prefill_per_kb * len(prompt.encode("utf-8")) / 1024
+        return max(0.0, (self.latency_s + prefill) * rng.uniform(1 - self.jitter, 1 + self.jitter))
+
+
+def _catalog(rng: random.Random, noisy: bool) -> Dict[str, Any]:
+    products = []
+    for i in range(10):
+        price = rng.randrange(9000, 45000, 1000)
+        amount = rng.randrange(300, 1500, 50)
+        item: Dict[str, Any] = {
+            "product_name": f"테스트 제품 {i + 1}",
+            "brand": f"브랜드{i % 4}",
+            "key_ingredient": "EPA+DHA",
+            "ingredient_amount": amount,
+            "ingredient_unit": "mg",
+            "price_per_month_krw": price,
+            "capsule_type": "연질캡슐",
+            "capsule_count": 60,
+            "daily_dose": "1일 1회, 2캡슐",
+            "purchase_url": f"https://example.com/p{i + 1}",
+        }
+        if noisy and i % 2 == 0:
+            item["price_per_month_krw"] = f"{price:,}원"
+            item["ingredient_amount"] = f"{amount:,}mg"
+        products.append(item)
+    return {"products": products}
+
+
+def _insights(prompt: str, rng: random.Random) -> Dict[str, Any]:
+    m = re.search(r"제품: (.*)\.\n", prompt)
+    names = [re.sub(r" \([^)]*\)$", "", n.strip()) for n in m.group(1).split(", ")] if m else []
+    return {
+        "insights": [
+            {
+                "product_name": name,
+                "pros": ["흡수율이 좋음"],
+                "cons": ["캡슐이 큼"],
+                "brand_trust_score_0to100": rng.randint(40, 95),
+                "review_sentiment_0to100": rng.randint(40, 95),
+                "safety_flags": [],
+                "brand_trust_summary_kr": "인증 이력 양호",
+                "review_summary_kr": "대체로 만족",
+                "notes": None,
+            }
+            for name in names
+        ]
+    }
+
+
+def _gemini_payload(prompt: str) -> Dict[str, Any]:
+    if "Clarifying" in prompt:
+        return {
+            "questions": [
+                {"id": "q1", "question": "가성비와 브랜드 신뢰 중 무엇이 더 중요한가요?", "kind": "single_choice", "options": ["가성비", "신뢰"]},
+                {"id": "q2", "question": "복용 중인 약이 있나요?", "kind": "text"},
+            ]
+        }
+    ranked = [{"rank": r, "summary_kr": f"{r}위 제품 요약입니다."} for r in (1, 2, 3)]
+    if "results:" in prompt:
+        ids = sorted({int(i) for i in re.findall(r'"id":\s*(\d+)', prompt)})
+        return {"results": [{"id": i, "ranked": ranked, "final_advice_markdown": "- 식후 복용"} for i in ids]}
+    return {"ranked": ranked, "final_advice_markdown": "- 식후 복용을 권장합니다."}
+
+
+def _render(payload: Dict[str, Any], shape: str) -> str:
+    text = json.dumps(payload, ensure_ascii=False)
+    if shape == "fenced":
+        return f"```json\n{text}\n```"
+    if shape == "prose":
+        return f"요청하신 결과입니다:\n{text}\n참고하세요."
+    if shape == "truncated":
+        return text[: len(text) // 2]
+    return text
+
+
+class FakeUpstreams:
+    """Shared state behind the fake server: behaviour knobs and call counters."""
+
+    def __init__(self, perplexity: UpstreamBehavior, gemini: UpstreamBehavior, seed: int = 0) -> None:
+        self.perplexity = perplexity
+        self.gemini = gemini
+        self.rng = random.Random(seed)
+        self.calls: Counter = Counter()
+        self.calls_by_request: Dict[str, Counter] = {}
+
+    def _count(self, request: Request, key: str) -> None:
+        self.calls[key] += 1
+        trace_id = request.headers.get("x-request-id", "-")
+        self.calls_by_request.setdefault(trace_id, Counter())[key] += 1
+
+    def _shape(self, behavior: UpstreamBehavior) -> str:
+        if self.rng.random() < behavior.malformed_rate:
+            return self.rng.choice(MALFORMED_SHAPES)
+        return "clean"
+
+    def build_app(self) -> FastAPI:
+        app = FastAPI(title="fake upstreams")
+
+        @app.get("/_stats")
+        async def stats() -> Dict[str, int]:
+            return dict(self.calls)
+
+        @app.get("/_stats/by_request")
+        async def stats_by_request() -> Dict[str, Dict[str, int]]:
+            return {trace_id: dict(calls) for trace_id, calls in self.calls_by_request.items()}
+
+        @app.post("/_reset")
+        async def reset() -> Dict[str, bool]:
+            self.calls.clear()
+            self.calls_by_request.clear()
+            return {"ok": True}
+
+        @app.post("/chat/completions")
+        async def perplexity_chat(request: Request) -> JSONResponse:
+            body = await request.json()
+            prompt = body["messages"][-1]["content"]
+            kind = "insights" if '"insights"' in prompt else "catalog"
+            self._count(request, f"perplexity.{kind}")
+            await asyncio.sleep(self.perplexity.delay(self.rng, prompt))
+            if self.rng.random() < self.perplexity.error_rate:
+                self._count(request, "perplexity.errors")
+                return JSONResponse({"error": "injected failure"}, status_code=500)
+            shape = self._shape(self.perplexity)
+            if shape != "clean":
+                self._count(request, f"perplexity.malformed.{shape}")
+            if kind == "insights":
+                payload = _insights(prompt, self.rng)
+            else:
+                payload = _catalog(self.rng, noisy=shape == "noisy")
+            content = _render(payload, shape)
+            return JSONResponse({"id": "fake", "model": body.get("model"), "choices": [{"index": 0, "message": {"role": "assistant", "content": content}}]})
+
+        @app.post("/{version}/models/{target}")
+        async def gemini(version: str, target: str, request: Request) -> Any:
+            model, _, method = target.partition(":")
+            body = await request.json()
+            prompt = "".join(p.get("text", "") for c in body.get("contents", []) for p in c.get("parts", []))
+            streaming = method == "streamGenerateContent"
+            self._count(request, "gemini.stream" if streaming else "gemini.generate")
+            await asyncio.sleep(self.gemini.delay(self.rng, prompt))
+            if self.rng.random() < self.gemini.error_rate:
+                self._count(request, "gemini.errors")
+                return JSONResponse(
+                    {"error": {"code": 503, "message": "injected failure", "status": "UNAVAILABLE"}}, status_code=503
+                )
+            shape = self._shape(self.gemini)
+            if shape != "clean":
+                self._count(request, f"gemini.malformed.{shape}")
+            text = _render(_gemini_payload(prompt), shape)
+            if not streaming:
+                return JSONResponse(_gemini_response(text, model))
+            return StreamingResponse(self._stream(text, model), media_type="text/event-stream")
+
+        return app
+
+    async def _stream(self, text: str, model: str) -> AsyncIterator[str]:
+        pieces = _split(text, 6)
+        for piece in pieces:
+            yield f"data: {json.dumps(_gemini_response(piece, model), ensure_ascii=False)}\r\n\r\n"
+            await asyncio.sleep(self.gemini.latency_s * 0.05)
+
+
+def _split(text: str, parts: int) -> List[str]:
+    step = max(1, len(text) // parts)
+    return [text[i : i + step] for i in range(0, len(text), step)]
+
+
+def _gemini_response(text: str, model: str) -> Dict[str, Any]:
+    return {
+        "candidates": [{"content": {"role": "model", "parts": [{"text": text}]}, "finishReason": "STOP", "index": 0}],
+        "usageMetadata": {"promptTokenCount": 0, "candidatesTokenCount": 0, "totalTokenCount": 0},
+        "modelVersion": model,
+    }
+
+
+def add_behavior_args(parser: argparse.ArgumentParser) -> None:
+    for name, latency in (("perplexity", 0.8), ("gemini", 0.4)):
+        parser.add_argument(f"--{name}-latency", type=float, default=latency, help="mean latency in seconds")
+        parser.add_argument(f"--{name}-error-rate", type=float, default=0.0)
+        parser.add_argument(f"--{name}-malformed-rate", type=float, default=0.0)
+        parser.add_argument(f"--{name}-prefill-per-kb", type=float, default=0.0, help="extra seconds per KiB of prompt")
+    parser.add_argument("--jitter", type=float, default=0.3)
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def behavior_args(args: argparse.Namespace) -> List[str]:
+    """Turn parsed behaviour options back into command-line flags for a subprocess."""
+    flags = ["--jitter", str(args.jitter), "--seed", str(args.seed)]
+    for name in ("perplexity", "gemini"):
+        for knob in ("latency", "error_rate", "malformed_rate", "prefill_per_kb"):
+            flags += [f"--{name}-{knob.replace('_', '-')}", str(getattr(args, f"{name}_{knob}"))]
+    return flags
+
+
+def main_cli() -> None:
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    add_behavior_args(parser)
+    args = parser.parse_args()
+
+    fakes = FakeUpstreams(
+        perplexity=UpstreamBehavior(
+            args.perplexity_latency, args.jitter, args.perplexity_error_rate, args.perplexity_malformed_rate,
+            args.perplexity_prefill_per_kb,
+        ),
+        gemini=UpstreamBehavior(
+            args.gemini_latency, args.jitter, args.gemini_error_rate, args.gemini_malformed_rate, args.gemini_prefill_per_kb
+        ),
+        seed=args.seed,
+    )
+    uvicorn.run(fakes.build_app(), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main_cli()
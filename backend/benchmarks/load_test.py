@@ -0,0 +1,249 @@
+"""Offline load test: the app against local Perplexity/Gemini stand-ins.
+
+Starts benchmarks/fake_upstreams.py and the app (uvicorn) as subprocesses,
+with the app pointed at the fakes through PERPLEXITY_API_URL and
+GEMINI_BASE_URL, dummy API keys and a throwaway catalog database. It then
+drives a concurrent request mix against the app. For each endpoint it
+reports p50/p95/p99 latency, throughput and errors. It also reports how
+many calls reached each fake upstream, overall and per endpoint, and how
+many the app queued or shed (admission control). Per-endpoint counts go by
+the X-Request-ID the app forwards upstream: each request is tagged with its
+endpoint, and a call shared by several requests (coalesced load, cached
+catalog) counts for the request that started it; calls made outside any
+request, e.g. startup precompute, are listed as "other". No API quota is
+used.
+
+Run from backend/:
+
+    python benchmarks/load_test.py --requests 200 --concurrency 20
+    python benchmarks/load_test.py --mix recommend=1 --perplexity-error-rate 0.2 --gemini-malformed-rate 0.3
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import math
+import os
+import random
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+import httpx
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from benchmarks.fake_upstreams import add_behavior_args, behavior_args  # noqa: E402
+
+BACKEND = Path(__file__).resolve().parent.parent
+SUPPLEMENT_TYPES = ("오메가3", "비타민D", "마그네슘", "유산균", "루테인")
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _wait_ready(url: str, proc: subprocess.Popen, timeout: float = 20.0) -> None:
+    started = time.monotonic()
+    while time.monotonic() - started < timeout:
+        if proc.poll() is not None:
+            raise RuntimeError(f"{url} exited with code {proc.returncode}")
+        try:
+            if httpx.get(url, timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"{url} not ready after {timeout}s")
+
+
+def percentile(sorted_values: List[float], q: float) -> float:
+    """Nearest-rank percentile of an ascending list."""
+    if not sorted_values:
+        return float("nan")
+    idx = min(len(sorted_values) - 1, max(0, math.ceil(q / 100 * len(sorted_values)) - 1))
+    return sorted_values[idx]
+
+
+def parse_mix(raw: str) -> Dict[str, float]:
+    mix = {}
+    for part in raw.split(","):
+        name, _, weight = part.partition("=")
+        mix[name.strip()] = float(weight or 1)
+    unknown = set(mix) - set(ENDPOINTS)
+    if unknown:
+        raise SystemExit(f"unknown endpoints in --mix: {', '.join(sorted(unknown))}")
+    return mix
+
+
+def _profile(rng: random.Random) -> Dict[str, object]:
+    return {
+        "supplement_type": rng.choice(SUPPLEMENT_TYPES),
+        "budget_krw_per_month": rng.choice([None, 20000, 30000, 50000]),
+        "target_and_concerns": "40대 여성, 혈행 개선",
+    }
+
+
+def _recommend_body(rng: random.Random) -> Dict[str, object]:
+    return {**_profile(rng), "answers": {"preference": rng.choice(["가성비", "신뢰", "균형"])}}
+
+
+ENDPOINTS = {
+    "clarify": ("/api/clarify", _profile),
+    "search_products": ("/api/search_products", _profile),
+    "recommend": ("/api/recommend", _recommend_body),
+    "recommend_stream": ("/api/recommend/stream", _recommend_body),
+}
+
+
+async def drive(
+    base_url: str, mix: Dict[str, float], requests: int, concurrency: int, seed: int
+) -> Tuple[Dict[str, List[float]], Dict[str, int], float]:
+    rng = random.Random(seed)
+    names = list(mix)
+    plan = rng.choices(names, weights=[mix[n] for n in names], k=requests)
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    queue: "asyncio.Queue[Tuple[int, str]]" = asyncio.Queue()
+    for i, name in enumerate(plan):
+        queue.put_nowait((i, name))
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=120.0, limits=limits) as client:
+
+        async def worker() -> None:
+            while not queue.empty():
+                i, name = queue.get_nowait()
+                path, make_body = ENDPOINTS[name]
+                # the app forwards this to the fake upstreams, which count calls by it
+                headers = {"X-Request-ID": f"{name}-{i}"}
+                t0 = time.perf_counter()
+                try:
+                    # read the whole body so streamed responses are timed to the end
+                    async with client.stream("POST", path, json=make_body(rng), headers=headers) as resp:
+                        await resp.aread()
+                    ok = resp.status_code < 400
+                except httpx.HTTPError:
+                    ok = False
+                latencies[name].append(time.perf_counter() - t0)
+                if not ok:
+                    errors[name] += 1
+
+        started = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - started
+    return latencies, errors, elapsed
+
+
+def per_endpoint(by_request: Dict[str, Dict[str, int]]) -> Dict[str, Counter]:
+    """Fold fake-upstream call counts per X-Request-ID into counts per endpoint."""
+    totals: Dict[str, Counter] = defaultdict(Counter)
+    for trace_id, calls in by_request.items():
+        name = trace_id.rpartition("-")[0]
+        totals[name if name in ENDPOINTS else "other"].update(calls)
+    return totals
+
+
+def report(
+    latencies: Dict[str, List[float]],
+    errors: Dict[str, int],
+    elapsed: float,
+    upstream: Dict[str, int],
+    upstream_by_endpoint: Dict[str, Counter],
+    admission: Dict[str, Dict[str, float]],
+) -> None:
+    total = sum(len(v) for v in latencies.values())
+    print(f"{total} requests in {elapsed:.2f}s -> {total / elapsed:.1f} req/s overall\n")
+    print(f"{'endpoint':<17} {'n':>5} {'err':>4} {'req/s':>7} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for name in ENDPOINTS:
+        values = sorted(latencies.get(name, []))
+        if not values:
+            continue
+        p50, p95, p99 = (percentile(values, q) * 1e3 for q in (50, 95, 99))
+        print(
+            f"{name:<17} {len(values):>5} {errors.get(name, 0):>4} {len(values) / elapsed:>7.1f} "
+            f"{p50:>8.0f} {p95:>8.0f} {p99:>8.0f}"
+        )
+    print("\nupstream calls")
+    for key in sorted(upstream):
+        print(f"  {key:<32} {upstream[key]:>6}")
+    print("\nupstream calls per endpoint (per request; a shared call counts for the request that started it)")
+    for name in (*ENDPOINTS, "other"):
+        calls = upstream_by_endpoint.get(name)
+        if not calls:
+            continue
+        n = len(latencies.get(name, []))
+        counts = ", ".join(f"{key}={calls[key]}" + (f" ({calls[key] / n:.2f})" if n else "") for key in sorted(calls))
+        print(f"  {name:<17} {counts}")
+    print("\nadmission (app side)")
+    for name, stats in admission.items():
+        print(f"  {name:<12} admitted={stats['admitted']} queued={stats['queued']} shed={stats['shed']}")
+
+
+def main_cli() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=20)
+    parser.add_argument(
+        "--mix",
+        default="clarify=1,search_products=1,recommend=2",
+        help=f"comma-separated endpoint=weight; endpoints: {', '.join(ENDPOINTS)}",
+    )
+    add_behavior_args(parser)
+    args = parser.parse_args()
+    mix = parse_mix(args.mix)
+
+    fake_port, app_port = _free_port(), _free_port()
+    fake_url = f"http://127.0.0.1:{fake_port}"
+    app_url = f"http://127.0.0.1:{app_port}"
+    db_dir = tempfile.TemporaryDirectory()
+    env = {
+        **os.environ,
+        "GOOGLE_API_KEY": "load-test",
+        "PERPLEXITY_API_KEY": "load-test",
+        "PERPLEXITY_API_URL": f"{fake_url}/chat/completions",
+        "GEMINI_BASE_URL": fake_url,
+        "CATALOG_DB_PATH": os.path.join(db_dir.name, "catalog.sqlite3"),
+    }
+    procs: List[subprocess.Popen] = []
+    try:
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, str(BACKEND / "benchmarks" / "fake_upstreams.py"), "--port", str(fake_port), *behavior_args(args)],
+                cwd=BACKEND,
+            )
+        )
+        _wait_ready(f"{fake_url}/_stats", procs[-1])
+        procs.append(
+            subprocess.Popen(
+                [sys.executable, "-m", "uvicorn", "main:app", "--port", str(app_port), "--log-level", "warning"],
+                cwd=BACKEND,
+                env=env,
+            )
+        )
+        _wait_ready(f"{app_url}/readyz", procs[-1])
+
+        latencies, errors, elapsed = asyncio.run(drive(app_url, mix, args.requests, args.concurrency, args.seed))
+        upstream = httpx.get(f"{fake_url}/_stats").json()
+        upstream_by_endpoint = per_endpoint(httpx.get(f"{fake_url}/_stats/by_request").json())
+        app_stats = httpx.get(f"{app_url}/api/upstream/stats").json()
+        admission = {name: app_stats[name]["admission"] for name in ("perplexity", "gemini")}
+        report(latencies, errors, elapsed, upstream, upstream_by_endpoint, admission)
+    finally:
+        for proc in procs:
+            proc.terminate()
+        for proc in procs:
+            proc.wait(timeout=10)
+        db_dir.cleanup()
+
+
+if __name__ == "__main__":
+    main_cli()
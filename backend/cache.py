@@ -0,0 +1,115 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import OrderedDict
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+@dataclass
+class CacheStats:
+    hits: int = 0
+    misses: int = 0
+    coalesced: int = 0
+    evictions: int = 0
+
+
+class AsyncTTLCache(Generic[V]):
+    """In-process LRU cache with per-entry TTL and single-flight loading.
+
+    Concurrent misses for the same key share one in-flight load: the first
+    caller starts it and every other caller awaits the same task (counted as
+    `coalesced`). The load runs as its own task so a disconnecting caller does
+    not cancel the fetch for the others.
+    """
+
+    def __init__(
+        self,
+        maxsize: int = 256,
+        ttl: float = 3600.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._clock = clock
+        self._data: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+        self._inflight: Dict[Hashable, "asyncio.Task[V]"] = {}
+        self.stats = CacheStats()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def peek(self, key: Hashable) -> Optional[V]:
+        """Return a live entry without touching stats or LRU order."""
+        entry = self._data.get(key)
+        if entry is None or entry[0] <= self._clock():
+            return None
+        return entry[1]
+
+    def get(self, key: Hashable) -> Optional[V]:
+        entry = self._data.get(key)
+        if entry is not None:
+            expires_at, value = entry
+            if expires_at > self._clock():
+                self._data.move_to_end(key)
+                self.stats.hits += 1
+                return value
+            del self._data[key]
+        self.stats.misses += 1
+        return None
+
+    def set(self, key: Hashable, value: V, ttl: Optional[float] = None) -> None:
+        self._data[key] = (self._clock() + (self.ttl if ttl is None else ttl), value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+            self.stats.evictions += 1
+
+    async def get_or_load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[V]],
+        cacheable: Callable[[V], bool] = lambda _: True,
+    ) -> V:
+        """Return the cached value or load it once, coalescing concurrent misses."""
+        entry = self._data.get(key)
+        if entry is not None and entry[0] > self._clock():
+            self._data.move_to_end(key)
+            self.stats.hits += 1
+            return entry[1]
+
+        task = self._inflight.get(key)
+        if task is not None:
+            self.stats.coalesced += 1
+        else:
+            self.stats.misses += 1
+            task = asyncio.ensure_future(self._load(key, loader, cacheable))
+            self._inflight[key] = task
+            task.add_done_callback(_consume_exception)
+        return await asyncio.shield(task)
+
+    async def _load(
+        self,
+        key: Hashable,
+        loader: Callable[[], Awaitable[V]],
+        cacheable: Callable[[V], bool],
+    ) -> V:
+        try:
+            value = await loader()
+            if cacheable(value):
+                self.set(key, value)
+            return value
+        finally:
+            self._inflight.pop(key, None)
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {**asdict(self.stats), "size": len(self._data), "inflight": len(self._inflight)}
+
+
+def _consume_exception(task: "asyncio.Task[Any]") -> None:
+    # Avoid "exception was never retrieved" when every waiter went away
+    if not task.cancelled():
+        task.exception()
@@ -0,0 +1,75 @@
+from __future__ import annotations
+
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional
+
+
+@dataclass
+class CatalogEntry:
+    products: List[Dict[str, Any]]
+    fetched_at: float  # unix timestamp
+
+    def age(self, now: Optional[float] = None) -> float:
+        return (time.time() if now is None else now) - self.fetched_at
+
+
+class CatalogStore:
+    """Durable per-supplement-type product catalog backed by SQLite.
+
+    Each product is stored as one row keyed by (supplement_key, position),
+    so a catalog survives restarts and can be served while Perplexity is slow
+    or down. Methods are blocking; call them via `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_products (
+                supplement_key TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                product_json TEXT NOT NULL,
+                fetched_at REAL NOT NULL,
+                PRIMARY KEY (supplement_key, position)
+            )
+            """
+        )
+        self._conn.commit()
+
+    def load(self, supplement_key: str) -> Optional[CatalogEntry]:
+        with self._lock:
+            rows = self._conn.execute(
+                "SELECT product_json, fetched_at FROM catalog_products WHERE supplement_key = ? ORDER BY position",
+                (supplement_key,),
+            ).fetchall()
+        if not rows:
+            return None
+        return CatalogEntry(
+            products=[json.loads(product_json) for product_json, _ in rows],
+            fetched_at=min(fetched_at for _, fetched_at in rows),
+        )
+
+    def save(self, supplement_key: str, products: List[Dict[str, Any]], fetched_at: Optional[float] = None) -> None:
+        """Replace the stored catalog for a supplement type."""
+        ts = time.time() if fetched_at is None else fetched_at
+        rows = [
+            (supplement_key, i, json.dumps(product, ensure_ascii=False), ts)
+            for i, product in enumerate(products)
+        ]
+        with self._lock, self._conn:
+            self._conn.execute("DELETE FROM catalog_products WHERE supplement_key = ?", (supplement_key,))
+            self._conn.executemany(
+                "INSERT INTO catalog_products (supplement_key, position, product_json, fetched_at) VALUES (?, ?, ?, ?)",
+                rows,
+            )
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
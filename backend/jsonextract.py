@@ -0,0 +1,194 @@
+from __future__ import annotations
+
+import json
+import re
+from typing import Any, List, Optional, Tuple, Type, Union
+
+try:  # optional fast parser
+    import orjson
+except ImportError:  # pragma: no cover - depends on environment
+    orjson = None  # type: ignore[assignment]
+
+
+def _loads(text: str) -> Any:
+    return orjson.loads(text) if orjson is not None else json.loads(text)
+
+
+class JSONExtractionError(ValueError):
+    """No valid JSON value of the expected type was found in the text."""
+
+
+Expect = Optional[Union[Type[dict], Type[list]]]
+
+_CLOSER_FOR = {"{": "}", "[": "]"}
+_OPEN_ANY = re.compile(r"[\[{]")
+_OPEN_OBJECT = re.compile(r"\{")
+_OPEN_ARRAY = re.compile(r"\[")
+_STRUCTURAL = re.compile(r'[\[\]{}"]')
+_IN_STRING = re.compile(r'["\\]')
+_LEADING_FENCE = re.compile(r"^\s*```[A-Za-z0-9_-]*[ \t]*\r?\n?")
+_TRAILING_FENCE = re.compile(r"\r?\n?```\s*$")
+_INVALID = object()
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove a wrapping ```json ... ``` fence, if any."""
+    if text.lstrip().startswith("```"):
+        text = _LEADING_FENCE.sub("", text, count=1)
+    if text.rstrip().endswith("```"):
+        text = _TRAILING_FENCE.sub("", text, count=1)
+    return text
+
+
+class JsonScanner:
+    """Incremental, single-pass finder for JSON objects/arrays embedded in text.
+
+    Feed text (all at once or as streamed chunks). Each character is
+    inspected at most once: regexes jump between structural characters of
+    the new chunk only and string state is tracked so braces inside strings
+    are ignored. Chunks are kept in a list and joined only when a top-level
+    bracketed span closes and is parsed, once, so total work stays linear
+    in the input. If the outermost span never closes (truncated
+    output or a stray brace in prose) or closes but is not valid JSON
+    (`{note: {"a": 1}}`), the largest valid spans nested inside it are used
+    instead.
+    """
+
+    def __init__(self, expect: Expect = None) -> None:
+        self.expect = expect
+        self._opener = {dict: _OPEN_OBJECT, list: _OPEN_ARRAY}.get(expect, _OPEN_ANY)  # type: ignore[arg-type]
+        # chunks are only joined when a span is parsed; offsets are absolute
+        self._chunks: List[str] = []  # retained text, starting at offset _base
+        self._base = 0
+        self._fed = 0
+        self._escape = False  # a backslash inside a string ended the last chunk
+        self._stack: List[Tuple[str, int]] = []  # (expected closer, start offset)
+        self._in_string = False
+        self._spans: List[Tuple[int, int]] = []  # closed spans nested in the open candidate
+        self._best: Tuple[int, Any] = (-1, _INVALID)
+
+    def feed(self, chunk: str) -> List[Any]:
+        """Scan `chunk` and return the top-level values it completed."""
+        found: List[Any] = []
+        offset = self._fed
+        self._chunks.append(chunk)
+        self._fed += len(chunk)
+        pos = 0
+        n = len(chunk)
+        if self._escape and n:
+            # skip the escaped char the previous chunk ended before
+            self._escape = False
+            pos = 1
+        stack = self._stack
+        while pos < n:
+            if not stack:
+                m = self._opener.search(chunk, pos)
+                if m is None:
+                    break
+                stack.append((_CLOSER_FOR[m.group()], offset + m.start()))
+                pos = m.end()
+            elif self._in_string:
+                m = _IN_STRING.search(chunk, pos)
+                if m is None:
+                    break
+                if m.group() == "\\":
+                    if m.end() >= n:
+                        # escaped char arrives with the next chunk
+                        self._escape = True
+                        break
+                    pos = m.end() + 1
+                else:
+                    self._in_string = False
+                    pos = m.end()
+            else:
+                m = _STRUCTURAL.search(chunk, pos)
+                if m is None:
+                    break
+                c = m.group()
+                pos = m.end()
+                if c == '"':
+                    self._in_string = True
+                elif c in _CLOSER_FOR:
+                    stack.append((_CLOSER_FOR[c], offset + m.start()))
+                elif c == stack[-1][0]:
+                    _, start = stack.pop()
+                    end = offset + pos
+                    if stack:
+                        # drop spans this one encloses; only maximal spans are kept
+                        while self._spans and self._spans[-1][0] > start:
+                            self._spans.pop()
+                        self._spans.append((start, end))
+                    else:
+                        spans, self._spans = self._spans, []
+                        size, value = end - start, self._parse(self._text(start, end))
+                        if value is _INVALID:
+                            size, value = self._largest_valid(spans)
+                        if value is not _INVALID:
+                            found.append(value)
+                            if size > self._best[0]:
+                                self._best = (size, value)
+                # a closer that does not match the innermost opener is ignored
+
+        # keep only text a still-open candidate may need
+        keep_from = stack[0][1] if stack else self._fed
+        drop = 0
+        while drop < len(self._chunks) and self._base + len(self._chunks[drop]) <= keep_from:
+            self._base += len(self._chunks[drop])
+            drop += 1
+        if drop:
+            del self._chunks[:drop]
+        return found
+
+    def _text(self, start: int, end: int) -> str:
+        if len(self._chunks) > 1:
+            self._chunks = ["".join(self._chunks)]
+        return self._chunks[0][start - self._base : end - self._base] if self._chunks else ""
+
+    def _parse(self, text: str) -> Any:
+        try:
+            value = _loads(text)
+        except (ValueError, RecursionError):
+            return _INVALID
+        if self.expect is not None and not isinstance(value, self.expect):
+            return _INVALID
+        return value
+
+    def _largest_valid(self, spans: List[Tuple[int, int]]) -> Tuple[int, Any]:
+        """(size, value) of the largest span that parses, or (-1, _INVALID)."""
+        for start, end in sorted(spans, key=lambda s: s[0] - s[1]):
+            value = self._parse(self._text(start, end))
+            if value is not _INVALID:
+                return end - start, value
+        return -1, _INVALID
+
+    def result(self) -> Any:
+        """Return the largest valid value seen, raising JSONExtractionError if none."""
+        if self._best[1] is not _INVALID:
+            return self._best[1]
+        if self._stack:
+            # outer candidate never closed: fall back to its largest complete parts
+            value = self._largest_valid(self._spans)[1]
+            if value is not _INVALID:
+                return value
+        raise JSONExtractionError("no valid JSON found")
+
+
+def extract_json(text: str, expect: Expect = None) -> Any:
+    """Extract the outermost valid JSON object/array from LLM output.
+
+    Handles bare JSON, ```json fenced blocks and JSON surrounded by prose.
+    `expect` restricts the result to `dict` or `list`.
+    """
+    stripped = strip_code_fences(text.strip())
+    if stripped[:1] in ("{", "["):
+        # fast path: the whole (unfenced) text is the value
+        try:
+            value = _loads(stripped)
+        except (ValueError, RecursionError):
+            pass
+        else:
+            if expect is None or isinstance(value, expect):
+                return value
+    scanner = JsonScanner(expect)
+    scanner.feed(stripped)
+    return scanner.result()
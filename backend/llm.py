@@ -0,0 +1,136 @@
+from __future__ import annotations
+
+from typing import Any, AsyncIterator, Callable, Dict, Optional
+
+import httpx
+
+
+DEFAULT_GEMINI_MODEL = "gemini-2.5-flash"
+
+
+class GeminiClient:
+    """Thin async wrapper around a single shared `genai.Client`.
+
+    Uses the SDK's `aio` surface so a slow Gemini round trip never blocks the
+    event loop. One instance is created at app startup and reused by every
+    request, which keeps the SDK's underlying HTTP connection pool warm.
+
+    The Google Gemini SDK is imported here rather than at module import: it
+    is most of the app's import time, and the app builds this client in a
+    warmup task after the server is already up.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = DEFAULT_GEMINI_MODEL,
+        base_url: Optional[str] = None,
+        headers: Optional[Callable[[], Dict[str, str]]] = None,
+    ) -> None:
+        from google import genai
+        from google.genai import types as genai_types
+
+        self.model = model
+        self._types = genai_types
+        # extra headers per call, e.g. the request's trace ID
+        self._headers = headers
+        # base_url points the SDK at another endpoint, e.g. a local stand-in
+        http_options = genai_types.HttpOptions(base_url=base_url) if base_url else None
+        self._client = genai.Client(api_key=api_key, http_options=http_options)
+
+    def _config(self) -> Any:
+        headers = self._headers() if self._headers is not None else None
+        if not headers:
+            return None
+        return self._types.GenerateContentConfig(http_options=self._types.HttpOptions(headers=headers))
+
+    async def generate_text(self, contents: str, model: Optional[str] = None) -> str:
+        """Run a single non-streaming generation and return the stripped text."""
+        res = await self._client.aio.models.generate_content(
+            model=model or self.model,
+            contents=contents,
+            config=self._config(),
+        )
+        return (res.text or "").strip()
+
+    async def stream_text(self, contents: str, model: Optional[str] = None) -> AsyncIterator[str]:
+        """Yield text deltas as Gemini produces them."""
+        stream = await self._client.aio.models.generate_content_stream(
+            model=model or self.model,
+            contents=contents,
+            config=self._config(),
+        )
+        async for chunk in stream:
+            if chunk.text:
+                yield chunk.text
+
+    async def aclose(self) -> None:
+        # google-genai 1.x has no public close hook for the async transport;
+        # close the pooled httpx client it keeps if present.
+        api_client = getattr(self._client, "_api_client", None)
+        async_http = getattr(api_client, "_async_httpx_client", None)
+        if async_http is not None:
+            await async_http.aclose()
+
+
+PERPLEXITY_URL = "https://api.perplexity.ai/chat/completions"
+
+
+def _http2_available() -> bool:
+    try:
+        import h2  # noqa: F401
+    except ImportError:
+        return False
+    return True
+
+
+class PerplexityClient:
+    """Pooled keep-alive HTTP transport for the Perplexity chat API.
+
+    A single `httpx.AsyncClient` is shared across requests so calls reuse
+    established TCP+TLS connections instead of handshaking every time.
+    """
+
+    def __init__(
+        self,
+        api_key: str,
+        *,
+        url: str = PERPLEXITY_URL,
+        max_connections: int = 20,
+        max_keepalive_connections: int = 10,
+        keepalive_expiry: float = 30.0,
+        connect_timeout: float = 5.0,
+        read_timeout: float = 60.0,
+        pool_timeout: float = 5.0,
+        http2: bool = False,
+        headers: Optional[Callable[[], Dict[str, str]]] = None,
+    ) -> None:
+        self.url = url
+        # extra headers per call, e.g. the request's trace ID
+        self._headers = headers
+        self._client = httpx.AsyncClient(
+            headers={
+                "Authorization": f"Bearer {api_key}",
+                "Content-Type": "application/json",
+            },
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(
+                connect=connect_timeout,
+                read=read_timeout,
+                write=connect_timeout,
+                pool=pool_timeout,
+            ),
+            # HTTP/2 needs the optional `h2` package (`pip install httpx[http2]`)
+            http2=http2 and _http2_available(),
+        )
+
+    async def chat(self, body: Dict[str, Any]) -> httpx.Response:
+        headers = self._headers() if self._headers is not None else None
+        return await self._client.post(self.url, json=body, headers=headers)
+
+    async def aclose(self) -> None:
+        await self._client.aclose()
@@ -0,0 +1,202 @@
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from dataclasses import asdict, dataclass
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+from cache import AsyncTTLCache
+
+MODES = ("off", "cache", "record", "replay")
+
+
+class ReplayMiss(LookupError):
+    """Replay mode found no stored response for a prompt; upstream is never called."""
+
+
+def response_key(upstream: str, model: str, prompt: Any) -> str:
+    """Content address of one LLM request: sha256 over upstream, model and prompt.
+
+    `prompt` may be a string or a JSON-serializable request body; dict keys
+    are sorted so equal bodies hash equally.
+    """
+    canonical = json.dumps([upstream, model, prompt], ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(canonical.encode("utf-8")).hexdigest()
+
+
+class ResponseStore:
+    """SQLite disk tier for LLM responses, bounded to `max_entries` rows.
+
+    Methods are blocking; call them via `asyncio.to_thread`.
+    """
+
+    def __init__(self, path: str, max_entries: int = 20000) -> None:
+        self.path = path
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                key TEXT PRIMARY KEY,
+                upstream TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL
+            )
+            """
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS llm_responses_created ON llm_responses (created_at)")
+        self._conn.commit()
+
+    def load(self, key: str, max_age_s: Optional[float] = None) -> Optional[str]:
+        with self._lock:
+            row = self._conn.execute("SELECT response, created_at FROM llm_responses WHERE key = ?", (key,)).fetchone()
+        if row is None:
+            return None
+        response, created_at = row
+        if max_age_s is not None and time.time() - created_at > max_age_s:
+            return None
+        return response
+
+    def save(self, key: str, upstream: str, model: str, response: str) -> None:
+        with self._lock, self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO llm_responses (key, upstream, model, response, created_at) VALUES (?, ?, ?, ?, ?)",
+                (key, upstream, model, response, time.time()),
+            )
+            # evict the oldest rows beyond the bound
+            self._conn.execute(
+                "DELETE FROM llm_responses WHERE key IN "
+                "(SELECT key FROM llm_responses ORDER BY created_at DESC LIMIT -1 OFFSET ?)",
+                (self.max_entries,),
+            )
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._conn.execute("SELECT COUNT(*) FROM llm_responses").fetchone()[0]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+@dataclass
+class LLMCacheStats:
+    hits: int = 0  # served from memory or disk
+    disk_hits: int = 0
+    misses: int = 0  # went upstream
+    writes: int = 0
+    replay_misses: int = 0
+
+
+class LLMResponseCache:
+    """Content-addressed cache for LLM response text, under both upstream clients.
+
+    Modes:
+      off     every call goes upstream
+      cache   memory tier (LRU + TTL), then the optional disk tier, then upstream;
+              concurrent identical prompts share one upstream call
+      record  every call goes upstream and the response is stored (needs a disk tier)
+      replay  responses come only from the disk tier, regardless of age;
+              a miss raises ReplayMiss and upstream is never called
+    """
+
+    def __init__(
+        self,
+        mode: str = "cache",
+        ttl: float = 3600.0,
+        max_entries: int = 1024,
+        store: Optional[ResponseStore] = None,
+    ) -> None:
+        if mode not in MODES:
+            raise ValueError(f"LLM cache mode must be one of {', '.join(MODES)}, got {mode!r}")
+        if mode in ("record", "replay") and store is None:
+            raise ValueError(f"LLM cache mode {mode!r} needs a disk tier (LLM_CACHE_DB_PATH)")
+        self.mode = mode
+        self.ttl = ttl
+        self.store = store
+        self._memory: AsyncTTLCache[str] = AsyncTTLCache(maxsize=max_entries, ttl=ttl)
+        self.stats = LLMCacheStats()
+
+    async def lookup(self, key: str) -> Optional[str]:
+        """Memory tier, then disk tier (promoting disk hits into memory)."""
+        if self.mode in ("off", "record"):
+            return None
+        value = self._memory.peek(key)
+        if value is None and self.store is not None:
+            max_age = None if self.mode == "replay" else self.ttl
+            value = await asyncio.to_thread(self.store.load, key, max_age)
+            if value is not None:
+                self.stats.disk_hits += 1
+                self._memory.set(key, value)
+        if value is not None:
+            self.stats.hits += 1
+        elif self.mode == "replay":
+            self.stats.replay_misses += 1
+            raise ReplayMiss(key)
+        return value
+
+    async def store_response(self, key: str, upstream: str, model: str, value: str) -> None:
+        if self.mode == "off":
+            return
+        self._memory.set(key, value)
+        if self.store is not None:
+            await asyncio.to_thread(self.store.save, key, upstream, model, value)
+        self.stats.writes += 1
+
+    async def fetch(
+        self,
+        key: str,
+        upstream: str,
+        model: str,
+        call: Callable[[], Awaitable[str]],
+        cacheable: Callable[[str], bool] = bool,
+    ) -> str:
+        """Return the response for `key`, calling `call()` upstream only when the mode allows.
+
+        Responses failing `cacheable` (by default: empty text) are returned
+        but not stored.
+        """
+        if self.mode == "off":
+            return await call()
+        if self.mode == "record":
+            return await self._call_and_store(key, upstream, model, call, cacheable)
+        cached = await self.lookup(key)
+        if cached is not None:
+            return cached
+        # cache mode miss: one upstream call per key even under concurrency
+        return await self._memory.get_or_load(
+            key, lambda: self._call_and_store(key, upstream, model, call, cacheable), cacheable=lambda _: False
+        )
+
+    async def _call_and_store(
+        self,
+        key: str,
+        upstream: str,
+        model: str,
+        call: Callable[[], Awaitable[str]],
+        cacheable: Callable[[str], bool],
+    ) -> str:
+        self.stats.misses += 1
+        value = await call()
+        if cacheable(value):
+            await self.store_response(key, upstream, model, value)
+        return value
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "mode": self.mode,
+            **asdict(self.stats),
+            "memory_size": len(self._memory),
+            "disk_size": len(self.store) if self.store is not None else None,
+        }
+
+    def close(self) -> None:
+        if self.store is not None:
+            self.store.close()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from models import Product, RankedProduct, RecommendInput
+
+# llm      Gemini only; no summaries when it fails
+# fallback Gemini, then local templates for anything missing
+# race     Gemini within a head start, then local templates
+# local    local templates only, Gemini is never called
+MODES = ("llm", "fallback", "race", "local")
+
+
+def _amount(p: Product) -> Optional[str]:
+    if p.ingredient_amount is None:
+        return None
+    return f"{p.ingredient_amount:g}{p.ingredient_unit or ''}"
+
+
+def _spec_line(p: Product) -> str:
+    parts = [p.brand, p.product_name]
+    spec = " ".join(x for x in (p.key_ingredient, _amount(p)) if x)
+    line = " ".join(x for x in parts if x)
+    if spec:
+        line += f": {spec}"
+    if p.price_per_month_krw:
+        line += f", 월 {p.price_per_month_krw:,}원"
+    if p.daily_dose:
+        line += f" ({p.daily_dose})"
+    return line + "."
+
+
+def _per_10k_krw(p: Product) -> Optional[float]:
+    if p.ingredient_amount is None or not p.price_per_month_krw:
+        return None
+    return p.ingredient_amount / p.price_per_month_krw * 10000
+
+
+def _highlights(rp: RankedProduct, ranked: List[RankedProduct]) -> List[str]:
+    """Comparative remarks within the ranked set: cheapest, most potent per won, top score."""
+    notes = []
+    if rp.rank == 1:
+        notes.append("종합 점수 1위")
+    prices = [r.product.price_per_month_krw for r in ranked if r.product.price_per_month_krw]
+    if len(prices) > 1 and rp.product.price_per_month_krw == min(prices):
+        notes.append("가장 저렴")
+    values = [v for v in (_per_10k_krw(r.product) for r in ranked) if v is not None]
+    value = _per_10k_krw(rp.product)
+    if len(values) > 1 and value is not None and value == max(values):
+        notes.append("가격 대비 함량 최고")
+    return notes
+
+
+def product_summary(rp: RankedProduct, ranked: List[RankedProduct]) -> str:
+    """2-3 Korean lines from product fields and insight pros/cons, like Gemini's summary_kr."""
+    lines = [_spec_line(rp.product)]
+    reasons = _highlights(rp, ranked)
+    ins = rp.insight
+    if ins is not None:
+        if ins.pros:
+            reasons.append(", ".join(ins.pros[:2]))
+        scores = []
+        if ins.brand_trust_score_0to100 is not None:
+            scores.append(f"브랜드 신뢰 {ins.brand_trust_score_0to100}/100")
+        if ins.review_sentiment_0to100 is not None:
+            scores.append(f"후기 {ins.review_sentiment_0to100}/100")
+        if scores:
+            reasons.append(", ".join(scores))
+    if reasons:
+        lines.append("추천 이유: " + "; ".join(reasons) + ".")
+    cautions = (list(ins.safety_flags) + ins.cons[:1]) if ins is not None else []
+    if cautions:
+        lines.append("참고: " + ", ".join(cautions) + ".")
+    return "\n".join(lines)
+
+
+def final_advice(payload: RecommendInput, ranked: List[RankedProduct]) -> Optional[str]:
+    if not ranked:
+        return None
+    top = ranked[0].product
+    bullets = [f"- **1순위**: {top.product_name}" + (f" ({top.brand})" if top.brand else "")]
+    budget = payload.budget_krw_per_month
+    if budget:
+        affordable = [rp for rp in ranked if rp.product.price_per_month_krw and rp.product.price_per_month_krw <= budget]
+        bullets.append(f"- 월 예산 {budget:,}원 이내 제품: {len(affordable)}/{len(ranked)}개")
+    best_value = max(ranked, key=lambda rp: _per_10k_krw(rp.product) or 0.0)
+    if _per_10k_krw(best_value.product) and best_value.rank != 1:
+        bullets.append(f"- 가성비를 우선한다면 {best_value.product.product_name}도 좋은 선택입니다")
+    if top.daily_dose:
+        bullets.append(f"- 복용: {top.daily_dose}")
+    flags = sorted({f for rp in ranked if rp.insight for f in rp.insight.safety_flags})
+    if flags:
+        bullets.append("- 주의: " + ", ".join(flags))
+    bullets.append("- 복용 중인 약이나 질환이 있다면 약사·의사와 상담하세요")
+    return "\n".join(bullets)
+
+
+def summarize(payload: RecommendInput, ranked: List[RankedProduct]) -> Dict[str, Any]:
+    """Deterministic summaries in the JSON shape the Gemini summary prompt asks for."""
+    return {
+        "ranked": [{"rank": rp.rank, "summary_kr": product_summary(rp, ranked)} for rp in ranked],
+        "final_advice_markdown": final_advice(payload, ranked),
+    }
@@ -1,109 +1,371 @@
 from __future__ import annotations
 
+import asyncio
 import json
-import math
 import os
 import re
-from typing import Any, Dict, List, Optional, Tuple
-
-from dotenv import load_dotenv, find_dotenv
+import secrets
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager
+from dataclasses import asdict, dataclass
+from typing import Any, AsyncGenerator, AsyncIterator, Deque, Dict, List, Optional, Tuple
+
+from dotenv import load_dotenv
 from fastapi import FastAPI, HTTPException
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel, Field
+from fastapi.responses import JSONResponse, PlainTextResponse, StreamingResponse
 import httpx
 
-# Google Gemini SDK
-from google import genai
-
-
-load_dotenv(find_dotenv())
-
-GOOGLE_API_KEY = os.getenv("GOOGLE_API_KEY")
-PERPLEXITY_API_KEY = os.getenv("PERPLEXITY_API_KEY")
-
-if not GOOGLE_API_KEY:
-    raise RuntimeError("GOOGLE_API_KEY not found in environment")
-if not PERPLEXITY_API_KEY:
-    raise RuntimeError("PERPLEXITY_API_KEY not found in environment")
-
+import local_summary
+import scoring
+import telemetry
+from cache import AsyncTTLCache
+from catalog_store import CatalogStore
+from jsonextract import JSONExtractionError, JsonScanner, extract_json
+from llm import DEFAULT_GEMINI_MODEL, GeminiClient, PerplexityClient
+from llm_cache import LLMResponseCache, ReplayMiss, ResponseStore, response_key
+from models import (
+    BatchRecommendInput,
+    BatchRecommendResult,
+    ClarifyInput,
+    ClarifyQuestion,
+    ClarifyResponse,
+    Product,
+    ProductInsight,
+    RankedProduct,
+    RecommendIndexInput,
+    RecommendIndexResult,
+    RecommendInput,
+    RecommendResult,
+    SearchResponse,
+)
+from normalization import CoercionStats, normalize_products
+from recommend_index import IndexEntry, RecommendIndex
+from resilience import (
+    AdmissionLimiter,
+    BudgetExhausted,
+    CircuitBreaker,
+    CircuitOpenError,
+    Deadline,
+    DeadlineExceeded,
+    LoadShedError,
+    hedged,
+    within,
+)
+from settings import EnvKnobs, Settings
+from supplement_types import SupplementIndex, load_types
+
+
+# .env next to this file or at the repo root; explicit paths spare find_dotenv's
+# stack inspection and directory walk on every worker boot
+_BACKEND_DIR = os.path.dirname(os.path.abspath(__file__))
+for _env_file in (os.path.join(_BACKEND_DIR, ".env"), os.path.join(os.path.dirname(_BACKEND_DIR), ".env")):
+    if os.path.isfile(_env_file):
+        load_dotenv(_env_file)
+        break
+
+# Tuning knobs below never raise at import; bad values fall back to their
+# defaults and are reported with the settings problems when the app starts
+_knobs = EnvKnobs()
+
+# Log level for the "supplement" logger; records carry the request's trace ID
+LOG_LEVEL = _knobs.choice("LOG_LEVEL", "INFO", ("DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"))
+
+
+# Perplexity connection pool; size max connections to roughly the number of
+# concurrent upstream calls one worker should make
+PERPLEXITY_MAX_CONNECTIONS = _knobs.int("PERPLEXITY_MAX_CONNECTIONS", 20)
+PERPLEXITY_MAX_KEEPALIVE = _knobs.int("PERPLEXITY_MAX_KEEPALIVE", 10)
+PERPLEXITY_KEEPALIVE_EXPIRY_S = _knobs.float("PERPLEXITY_KEEPALIVE_EXPIRY_S", 30)
+PERPLEXITY_CONNECT_TIMEOUT_S = _knobs.float("PERPLEXITY_CONNECT_TIMEOUT_S", 5)
+PERPLEXITY_READ_TIMEOUT_S = _knobs.float("PERPLEXITY_READ_TIMEOUT_S", 60)
+PERPLEXITY_POOL_TIMEOUT_S = _knobs.float("PERPLEXITY_POOL_TIMEOUT_S", 5)
+PERPLEXITY_HTTP2 = os.getenv("PERPLEXITY_HTTP2", "0").lower() in ("1", "true", "yes")
+
+# Product catalog cache shared by search_products and recommend
+CATALOG_CACHE_TTL_S = _knobs.float("CATALOG_CACHE_TTL_S", 21600)
+CATALOG_CACHE_MAX_ENTRIES = _knobs.int("CATALOG_CACHE_MAX_ENTRIES", 256)
+# On-disk catalog; entries older than CATALOG_STALE_AFTER_S are served as-is
+# and refreshed in the background
+CATALOG_DB_PATH = os.getenv("CATALOG_DB_PATH", os.path.join(_BACKEND_DIR, "catalog.sqlite3"))
+CATALOG_STALE_AFTER_S = _knobs.float("CATALOG_STALE_AFTER_S", 21600)
+
+# LLM response cache keyed by a hash of upstream, model and prompt; the mode
+# (LLM_CACHE_MODE) and disk path (LLM_CACHE_DB_PATH) are validated in settings.py
+LLM_CACHE_TTL_S = _knobs.float("LLM_CACHE_TTL_S", 3600)
+LLM_CACHE_MAX_ENTRIES = _knobs.int("LLM_CACHE_MAX_ENTRIES", 1024)
+LLM_CACHE_DISK_MAX_ENTRIES = _knobs.int("LLM_CACHE_DISK_MAX_ENTRIES", 20000)
+
+# Extra supplement-type aliases as JSON (see supplement_types.load_types);
+# free-text types are canonicalized before catalog caching and prompting
+SUPPLEMENT_TYPES = _knobs.parse("SUPPLEMENT_ALIASES", load_types)
+
+# Speculative prefetch: /api/clarify starts the catalog and preliminary
+# insight fetches and returns a prefetch_token that /api/recommend reuses.
+# Tokens expire after PREFETCH_TTL_S; at most PREFETCH_MAX_SESSIONS are kept
+# and PREFETCH_CONCURRENCY run at once, each within PREFETCH_DEADLINE_S
+PREFETCH_ENABLED = os.getenv("PREFETCH_ENABLED", "1").lower() in ("1", "true", "yes")
+PREFETCH_TTL_S = _knobs.float("PREFETCH_TTL_S", 600)
+PREFETCH_MAX_SESSIONS = _knobs.int("PREFETCH_MAX_SESSIONS", 1000)
+PREFETCH_CONCURRENCY = _knobs.int("PREFETCH_CONCURRENCY", 8)
+PREFETCH_DEADLINE_S = _knobs.float("PREFETCH_DEADLINE_S", 30)
+
+# Per-product qualitative insights (brand trust, review sentiment)
+INSIGHT_CACHE_TTL_S = _knobs.float("INSIGHT_CACHE_TTL_S", 86400)
+INSIGHT_CACHE_MAX_ENTRIES = _knobs.int("INSIGHT_CACHE_MAX_ENTRIES", 2048)
+
+# /api/recommend/batch: max concurrent groups/summary calls, profiles per
+# Gemini summary call, and request size limit
+BATCH_CONCURRENCY = _knobs.int("BATCH_CONCURRENCY", 4)
+BATCH_SUMMARY_CHUNK = _knobs.int("BATCH_SUMMARY_CHUNK", 8)
+BATCH_SUMMARY_TIMEOUT_S = _knobs.float("BATCH_SUMMARY_TIMEOUT_S", 60)
+# Catalog and insight stages per batch group; batches are not interactive, so
+# they get more time than CATALOG_/INSIGHTS_STAGE_TIMEOUT_S
+BATCH_FETCH_TIMEOUT_S = _knobs.float("BATCH_FETCH_TIMEOUT_S", 60)
+BATCH_MAX_ITEMS = _knobs.int("BATCH_MAX_ITEMS", 5000)
+
+# Ranking weight profiles as JSON (see scoring.load_profiles); defaults to
+# the built-in value / trust / balanced profiles
+WEIGHT_PROFILES = _knobs.parse("SCORING_WEIGHT_PROFILES", scoring.load_profiles)
+
+# Precomputed final rankings per (canonical supplement type, weight profile,
+# budget bucket), built from cached catalog and insight data and rebuilt per
+# type when either changes. RECOMMEND_INDEX_TYPES (comma-separated) are
+# precomputed in the background at startup
+RECOMMEND_INDEX_ENABLED = os.getenv("RECOMMEND_INDEX_ENABLED", "1").lower() in ("1", "true", "yes")
+RECOMMEND_INDEX_TYPES = [t.strip() for t in os.getenv("RECOMMEND_INDEX_TYPES", "").split(",") if t.strip()]
+# A lookup miss rebuilds its type at most this often; new catalogs and
+# insights trigger their own rebuilds right away
+RECOMMEND_INDEX_REBUILD_MIN_S = _knobs.float("RECOMMEND_INDEX_REBUILD_MIN_S", 30)
+
+# End-to-end budget for /api/recommend and per-stage caps within it
+RECOMMEND_DEADLINE_S = _knobs.float("RECOMMEND_DEADLINE_S", 25)
+CATALOG_STAGE_TIMEOUT_S = _knobs.float("CATALOG_STAGE_TIMEOUT_S", 10)
+INSIGHTS_STAGE_TIMEOUT_S = _knobs.float("INSIGHTS_STAGE_TIMEOUT_S", 8)
+SUMMARY_STAGE_TIMEOUT_S = _knobs.float("SUMMARY_STAGE_TIMEOUT_S", 12)
+# SUMMARY_MODE=race: Gemini's head start before local template summaries are used
+SUMMARY_RACE_S = _knobs.float("SUMMARY_RACE_S", 3)
+CLARIFY_TIMEOUT_S = _knobs.float("CLARIFY_TIMEOUT_S", 15)
+# Shared catalog and insight loads outlive the request that started them (to
+# warm the caches); this bounds their admission queue wait and call time
+SHARED_FETCH_TIMEOUT_S = _knobs.float("SHARED_FETCH_TIMEOUT_S", 60)
+# Start a second catalog request if the first is still pending after this
+# many seconds; 0 disables hedging
+CATALOG_HEDGE_DELAY_S = _knobs.float("CATALOG_HEDGE_DELAY_S", 0)
+
+# Per-upstream circuit breakers
+BREAKER_FAILURE_THRESHOLD = _knobs.float("BREAKER_FAILURE_THRESHOLD", 0.5)
+BREAKER_WINDOW = _knobs.int("BREAKER_WINDOW", 20)
+BREAKER_MIN_CALLS = _knobs.int("BREAKER_MIN_CALLS", 5)
+BREAKER_COOLDOWN_S = _knobs.float("BREAKER_COOLDOWN_S", 30)
+
+# Admission control per upstream: concurrent calls, call starts per second (0 = unlimited)
+# and how many callers may queue before new ones are shed to degraded responses
+PERPLEXITY_MAX_CONCURRENCY = _knobs.int("PERPLEXITY_MAX_CONCURRENCY", 16)
+PERPLEXITY_RATE_PER_S = _knobs.float("PERPLEXITY_RATE_PER_S", 0)
+PERPLEXITY_MAX_QUEUE = _knobs.int("PERPLEXITY_MAX_QUEUE", 64)
+GEMINI_MAX_CONCURRENCY = _knobs.int("GEMINI_MAX_CONCURRENCY", 16)
+GEMINI_RATE_PER_S = _knobs.float("GEMINI_RATE_PER_S", 0)
+GEMINI_MAX_QUEUE = _knobs.int("GEMINI_MAX_QUEUE", 64)
+
+
+# Validated in the app lifespan (see get_settings for scripts that skip it)
+_settings: Optional[Settings] = None
+# True once the Gemini client exists (warmup or first use); /readyz reports it
+_ready = False
+# The in-flight warmup; /readyz starts another after a failed one
+_warmup: Optional["asyncio.Task[None]"] = None
+# Shared upstream clients, created once in the app lifespan and reused by all requests
+_gemini: Optional[GeminiClient] = None
+_perplexity: Optional[PerplexityClient] = None
+_catalog_cache: AsyncTTLCache[List[Dict[str, Any]]] = AsyncTTLCache(
+    maxsize=CATALOG_CACHE_MAX_ENTRIES, ttl=min(CATALOG_CACHE_TTL_S, CATALOG_STALE_AFTER_S)
+)
+_catalog_store: Optional[CatalogStore] = None
+_catalog_store_stats: Dict[str, int] = {"hits": 0, "stale_served": 0, "refreshes": 0, "refresh_failures": 0}
+_catalog_refreshing: Dict[str, "asyncio.Task[List[Dict[str, Any]]]"] = {}
+_background_tasks: "set[asyncio.Task[Any]]" = set()
+_insight_cache: AsyncTTLCache["ProductInsight"] = AsyncTTLCache(
+    maxsize=INSIGHT_CACHE_MAX_ENTRIES, ttl=INSIGHT_CACHE_TTL_S
+)
+_insight_inflight: Dict[str, "asyncio.Task[Dict[str, ProductInsight]]"] = {}
+_llm_cache: Optional[LLMResponseCache] = None
+_supplement_index = SupplementIndex(SUPPLEMENT_TYPES)
+_recommend_index = RecommendIndex(catalog_source=_catalog_cache.peek, insight_source=_insight_cache.peek)
+_index_pending: "set[str]" = set()
+
+
+def _new_breaker(name: str) -> CircuitBreaker:
+    return CircuitBreaker(
+        name,
+        failure_threshold=BREAKER_FAILURE_THRESHOLD,
+        window=BREAKER_WINDOW,
+        min_calls=BREAKER_MIN_CALLS,
+        cooldown_s=BREAKER_COOLDOWN_S,
+    )
 
-app = FastAPI(title="Always AI Supplement Assistant MVP")
 
-# Allow local dev for Next.js and potential vercel preview
-app.add_middleware(
-    CORSMiddleware,
-    allow_origins=["*"],
-    allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+_coercion_totals = CoercionStats()
+# last coerced items (product name and repaired fields) for /api/upstream/stats
+_coercion_recent: Deque[Dict[str, Any]] = deque(maxlen=20)
+_perplexity_breaker = _new_breaker("perplexity")
+_gemini_breaker = _new_breaker("gemini")
+_perplexity_limiter = AdmissionLimiter(
+    "perplexity", PERPLEXITY_MAX_CONCURRENCY, PERPLEXITY_MAX_QUEUE, PERPLEXITY_RATE_PER_S
 )
+_gemini_limiter = AdmissionLimiter("gemini", GEMINI_MAX_CONCURRENCY, GEMINI_MAX_QUEUE, GEMINI_RATE_PER_S)
+
+
+def get_settings() -> Settings:
+    global _settings
+    if _settings is None:
+        _settings = Settings.from_env(problems=_knobs.problems)
+    return _settings
+
+
+def _new_perplexity_client() -> PerplexityClient:
+    settings = get_settings()
+    return PerplexityClient(
+        api_key=settings.perplexity_api_key,
+        url=settings.perplexity_api_url,
+        max_connections=PERPLEXITY_MAX_CONNECTIONS,
+        max_keepalive_connections=PERPLEXITY_MAX_KEEPALIVE,
+        keepalive_expiry=PERPLEXITY_KEEPALIVE_EXPIRY_S,
+        connect_timeout=PERPLEXITY_CONNECT_TIMEOUT_S,
+        read_timeout=PERPLEXITY_READ_TIMEOUT_S,
+        pool_timeout=PERPLEXITY_POOL_TIMEOUT_S,
+        http2=PERPLEXITY_HTTP2,
+        headers=telemetry.trace_headers,
+    )
 
 
-class ClarifyInput(BaseModel):
-    supplement_type: str = Field(..., description="예: 오메가3, 종합비타민 등")
-    budget_krw_per_month: Optional[int] = Field(None, description="월 예산, KRW")
-    target_and_concerns: str = Field(..., description="복용 대상 및 핵심 고민")
+def _new_gemini_client() -> GeminiClient:
+    settings = get_settings()
+    return GeminiClient(
+        api_key=settings.google_api_key, base_url=settings.gemini_base_url, headers=telemetry.trace_headers
+    )
 
 
-class ClarifyQuestion(BaseModel):
-    id: str
-    question: str
-    kind: str = Field("text", description="text | single_choice")
-    options: Optional[List[str]] = None
+async def get_gemini() -> GeminiClient:
+    global _warmup
+    if _gemini is None:
+        # Warmup has not finished or failed (or lifespan did not run, e.g. ASGI
+        # transport in scripts): wait for it, starting one if none is in flight,
+        # so the SDK import never runs on the event loop
+        if _warmup is None or _warmup.done():
+            _warmup = _spawn_background(_warm_up())
+        await asyncio.shield(_warmup)
+        if _gemini is None:
+            raise RuntimeError("Gemini client unavailable (warmup failed)")
+    return _gemini
 
 
-class ClarifyResponse(BaseModel):
-    questions: List[ClarifyQuestion]
+def _gemini_model() -> str:
+    """Model name for LLM cache keys, known before the client is built."""
+    return _gemini.model if _gemini is not None else DEFAULT_GEMINI_MODEL
 
 
-class RecommendInput(ClarifyInput):
-    answers: Dict[str, Any] = Field(default_factory=dict)
-    products: Optional[List[Product]] = None
+def get_perplexity() -> PerplexityClient:
+    global _perplexity
+    if _perplexity is None:
+        _perplexity = _new_perplexity_client()
+    return _perplexity
 
 
-class Product(BaseModel):
-    product_name: str
-    brand: Optional[str] = None
-    # Generic ingredient fields so we can support any supplement type
-    key_ingredient: Optional[str] = None
-    ingredient_amount: Optional[float] = None  # numeric value only
-    ingredient_unit: Optional[str] = None      # mg | mcg | IU | CFU | etc
-    price_per_month_krw: Optional[int] = None
-    capsule_type: Optional[str] = None
-    capsule_count: Optional[int] = None
-    daily_dose: Optional[str] = None
-    purchase_url: Optional[str] = None
+def get_catalog_store() -> CatalogStore:
+    global _catalog_store
+    if _catalog_store is None:
+        _catalog_store = CatalogStore(CATALOG_DB_PATH)
+    return _catalog_store
 
 
-class ProductInsight(BaseModel):
-    product_name: str
-    pros: List[str] = Field(default_factory=list)
-    cons: List[str] = Field(default_factory=list)
-    brand_trust_score_0to100: Optional[int] = None
-    review_sentiment_0to100: Optional[int] = None
-    safety_flags: List[str] = Field(default_factory=list)
-    notes: Optional[str] = None
-    brand_trust_summary_kr: Optional[str] = None
-    review_summary_kr: Optional[str] = None
+def _new_llm_cache() -> LLMResponseCache:
+    settings = get_settings()
+    path = settings.llm_cache_db_path
+    store = ResponseStore(path, LLM_CACHE_DISK_MAX_ENTRIES) if path else None
+    return LLMResponseCache(settings.llm_cache_mode, ttl=LLM_CACHE_TTL_S, max_entries=LLM_CACHE_MAX_ENTRIES, store=store)
 
 
-class RankedProduct(BaseModel):
-    rank: int
-    product: Product
-    insight: Optional[ProductInsight]
-    score: float
-    summary: Optional[str] = None
+def get_llm_cache() -> LLMResponseCache:
+    global _llm_cache
+    if _llm_cache is None:
+        _llm_cache = _new_llm_cache()
+    return _llm_cache
 
 
-class RecommendResult(BaseModel):
-    ranked: List[RankedProduct]
-    final_advice_markdown: Optional[str] = None
+def _spawn_background(coro: Any) -> "asyncio.Task[Any]":
+    """Run a coroutine detached from the request, keeping a reference until done."""
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    task.add_done_callback(_background_tasks.discard)
+    return task
 
 
-def _new_gemini_client() -> genai.Client:
-    # google-genai SDK automatically reads env var
-    client = genai.Client(api_key=GOOGLE_API_KEY)
-    return client
+async def _warm_up() -> None:
+    """Import the Gemini SDK and build its client off the event loop, then mark the app ready."""
+    global _gemini, _ready
+    try:
+        gemini = await asyncio.to_thread(_new_gemini_client)
+    except Exception:
+        logger.exception("warmup failed; retried by the next /readyz probe or on first use")
+        return
+    if _gemini is None:
+        _gemini = gemini
+    else:
+        await gemini.aclose()  # a request got there first
+    _ready = True
+
+
+@asynccontextmanager
+async def lifespan(_: FastAPI) -> AsyncIterator[None]:
+    global _settings, _gemini, _perplexity, _catalog_store, _llm_cache, _ready, _warmup
+    # fail startup (not import) on bad config, listing every problem
+    _settings = Settings.from_env(problems=_knobs.problems)
+    _perplexity = _new_perplexity_client()
+    _catalog_store = CatalogStore(CATALOG_DB_PATH)
+    _llm_cache = _new_llm_cache()
+    # serve /healthz right away; /readyz turns 200 once the SDK is loaded
+    _warmup = _spawn_background(_warm_up())
+    if RECOMMEND_INDEX_ENABLED and RECOMMEND_INDEX_TYPES:
+        _spawn_background(_precompute_at_startup())
+    try:
+        yield
+    finally:
+        _ready = False
+        for task in list(_background_tasks):
+            task.cancel()
+        await asyncio.gather(*_background_tasks, return_exceptions=True)
+        gemini, _gemini = _gemini, None
+        perplexity, _perplexity = _perplexity, None
+        store, _catalog_store = _catalog_store, None
+        llm_cache, _llm_cache = _llm_cache, None
+        if store is not None:
+            store.close()
+        if llm_cache is not None:
+            llm_cache.close()
+        if gemini is not None:
+            await gemini.aclose()
+        if perplexity is not None:
+            await perplexity.aclose()
+
+
+telemetry.configure_logging(LOG_LEVEL)
+logger = telemetry.logger
+
+app = FastAPI(title="Always AI Supplement Assistant MVP", lifespan=lifespan)
+
+# Allow local dev for Next.js and potential vercel preview
+app.add_middleware(
+    CORSMiddleware,
+    allow_origins=["*"],
+    allow_credentials=True,
+    allow_methods=["*"],
+    allow_headers=["*"],
+    expose_headers=[telemetry.TRACE_HEADER],
+)
+# outermost: trace ID and timing for everything below
+app.add_middleware(telemetry.TelemetryMiddleware)
 
 
 def _fallback_products() -> List[Product]:
@@ -155,17 +417,29 @@ def _fallback_products() -> List[Product]:
     ]
 
 
-async def call_perplexity_json(prompt: str) -> Dict[str, Any]:
+async def _perplexity_chat(body: Dict[str, Any]) -> Dict[str, Any]:
+    resp = await get_perplexity().chat(body)
+    if resp.status_code != 200:
+        raise HTTPException(status_code=502, detail=f"Perplexity error: {resp.text[:500]}")
+    return resp.json()
+
+
+async def call_perplexity_json(
+    prompt: str, deadline: Optional[Deadline] = None, hedge_delay_s: float = 0.0, cap: Optional[float] = None
+) -> Dict[str, Any]:
     """Call Perplexity chat API and parse JSON from the response content.
 
     The prompt should instruct the model to return bare JSON. We still defensively
-    extract the largest JSON object present.
+    extract the outermost valid JSON object present. Responses are served from
+    the LLM response cache when possible; actual calls go through the
+    Perplexity admission limiter and circuit breaker; `deadline` bounds the
+    admission wait and the call, `cap` the call alone. A shed call raises
+    HTTPException(429). With `hedge_delay_s` > 0 a cache miss sends a second
+    request if the first is still pending after that long; hedging runs
+    beneath the cache, which would otherwise merge the identical attempts
+    into one call.
     """
 
-    headers = {
-        "Authorization": f"Bearer {PERPLEXITY_API_KEY}",
-        "Content-Type": "application/json",
-    }
     body = {
         "model": "sonar-pro",
         "messages": [
@@ -173,69 +447,441 @@ async def call_perplexity_json(prompt: str) -> Dict[str, Any]:
             {"role": "user", "content": prompt},
         ],
     }
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post("https://api.perplexity.ai/chat/completions", headers=headers, json=body)
-        if resp.status_code != 200:
-            raise HTTPException(status_code=502, detail=f"Perplexity error: {resp.text[:500]}")
-        data = resp.json()
 
+    async def attempt() -> str:
+        with telemetry.upstream_call("perplexity", "chat", prompt) as call:
+            try:
+                async with _perplexity_limiter.slot(deadline):
+                    data = await _perplexity_breaker.call(lambda: within(deadline, _perplexity_chat(body), cap))
+            except LoadShedError as e:
+                raise HTTPException(status_code=429, detail=str(e))
+            except CircuitOpenError as e:
+                raise HTTPException(status_code=503, detail=str(e))
+            except DeadlineExceeded:
+                raise HTTPException(status_code=504, detail="Perplexity call timed out")
+            except httpx.HTTPError as e:
+                raise HTTPException(status_code=502, detail=f"Perplexity request failed: {e!r}")
+
+            try:
+                content = data["choices"][0]["message"]["content"]
+            except Exception:
+                raise HTTPException(status_code=502, detail="Perplexity response parsing failed")
+            call.add_response(content)
+        return content
+
+    async def upstream_content() -> str:
+        if deadline is not None and deadline.expired:
+            raise HTTPException(status_code=504, detail="Request deadline exceeded before Perplexity call")
+        if hedge_delay_s > 0:
+            return await hedged(attempt, hedge_delay_s)
+        return await attempt()
+
+    model = body["model"]
     try:
-        content = data["choices"][0]["message"]["content"]
-    except Exception:
-        raise HTTPException(status_code=502, detail="Perplexity response parsing failed")
-
-    # Find JSON object
-    match = re.search(r"\{[\s\S]*\}$", content.strip())
-    if not match:
-        # try to find first and last braces
-        start = content.find("{")
-        end = content.rfind("}")
-        if start != -1 and end != -1 and end > start:
-            json_str = content[start : end + 1]
-        else:
-            raise HTTPException(status_code=502, detail="Perplexity did not return JSON")
-    else:
-        json_str = match.group(0)
+        content = await get_llm_cache().fetch(
+            response_key("perplexity", model, body), "perplexity", model, upstream_content, cacheable=_has_json_object
+        )
+    except ReplayMiss:
+        raise HTTPException(status_code=502, detail="No recorded Perplexity response for this prompt (replay mode)")
+
+    try:
+        return extract_json(content, expect=dict)
+    except JSONExtractionError:
+        raise HTTPException(status_code=502, detail="Perplexity did not return JSON")
+
+
+def _has_json_object(text: str) -> bool:
+    try:
+        extract_json(text, expect=dict)
+    except JSONExtractionError:
+        return False
+    return True
+
+
+async def gemini_text(prompt: str, deadline: Optional[Deadline] = None, cap: Optional[float] = None) -> str:
+    """Single Gemini generation behind the LLM response cache, admission limiter, circuit breaker and deadline."""
+
+    async def upstream_text() -> str:
+        if deadline is not None and deadline.expired:
+            raise DeadlineExceeded("deadline already expired")
+        gemini = await get_gemini()
+        with telemetry.upstream_call("gemini", "generate", prompt) as call:
+            async with _gemini_limiter.slot(deadline):
+                text = await _gemini_breaker.call(lambda: within(deadline, gemini.generate_text(prompt), cap))
+            call.add_response(text)
+        return text
+
+    model = _gemini_model()
+    return await get_llm_cache().fetch(response_key("gemini", model, prompt), "gemini", model, upstream_text)
+
+
+async def gemini_stream(prompt: str, deadline: Optional[Deadline] = None, cap: Optional[float] = None) -> AsyncIterator[str]:
+    """Streaming counterpart of `gemini_text`; the whole stream shares one budget.
+
+    A cached response is yielded as a single chunk. Streams are not coalesced;
+    a completed stream is stored like a `gemini_text` response. The admission
+    slot is held until the stream ends.
+    """
+    llm_cache = get_llm_cache()
+    model = _gemini_model()
+    key = response_key("gemini", model, prompt)
+    cached = await llm_cache.lookup(key)
+    if cached is not None:
+        yield cached
+        return
+    gemini = await get_gemini()
+
+    stage_cap = Deadline(cap) if cap is not None else None
+    stage = stage_cap
+    if stage is None or (deadline is not None and deadline.remaining() < stage.remaining()):
+        stage = deadline
+    if stage is not None and stage.expired:
+        raise DeadlineExceeded("deadline already expired")
+    chunks: List[str] = []
+    with telemetry.upstream_call("gemini", "stream", prompt) as call:
+        async with _gemini_limiter.slot(stage):
+            _gemini_breaker.before_call()
+            stream = gemini.stream_text(prompt).__aiter__()
+            try:
+                while True:
+                    try:
+                        # the cap is re-derived per chunk so a timeout is blamed on
+                        # whichever of the request budget and the stage cap ran out
+                        cap_left = stage_cap.remaining() if stage_cap is not None else None
+                        chunk = await within(deadline, stream.__anext__(), cap_left)
+                    except StopAsyncIteration:
+                        break
+                    call.add_response(chunk)
+                    chunks.append(chunk)
+                    yield chunk
+            except BudgetExhausted:
+                _gemini_breaker.release()
+                raise
+            except Exception:
+                _gemini_breaker.record_failure()
+                raise
+            except BaseException:
+                # cancelled or closed early by the consumer
+                _gemini_breaker.release()
+                raise
+            _gemini_breaker.record_success()
+    text = "".join(chunks)
+    if text:
+        await llm_cache.store_response(key, "gemini", model, text)
+
+
+def catalog_key(supplement_type: str) -> str:
+    """Canonical catalog cache key: "오메가-3", "omega 3" and "rTG 오메가3" share one."""
+    return _supplement_index.resolve(supplement_type).key
+
+
+def _catalog_prompt(supplement_type: str) -> str:
+    name = _supplement_index.resolve(supplement_type).name
+    return (
+        f"한국 시장 기준 '{name}' 대표 제품 10개를 추천용으로 선정. "
+        "아래 JSON 스키마로만 출력: {\n"
+        "  \"products\": [ {\"product_name\": str, \"brand\": str, \"key_ingredient\": str|null, \"ingredient_amount\": number|null, \"ingredient_unit\": str|null, "
+        "  \"price_per_month_krw\": int|null, \"capsule_type\": str|null, \"capsule_count\": int|null, \"daily_dose\": str|null, \"purchase_url\": str|null } ]\n}"
+        "\n주의: 수치는 숫자만, 단위는 별도 필드(ingredient_unit)에 표기. 한국에서 구매 가능 제품 위주."
+    )
+
+
+async def _fetch_catalog_raw(supplement_type: str) -> List[Dict[str, Any]]:
+    prompt = _catalog_prompt(supplement_type)
+    data = await call_perplexity_json(
+        prompt,
+        Deadline(SHARED_FETCH_TIMEOUT_S, per_call=True),
+        hedge_delay_s=CATALOG_HEDGE_DELAY_S,
+        cap=SHARED_FETCH_TIMEOUT_S,
+    )
+    products_raw = data.get("products") or data.get("items") or []
+    return [item for item in products_raw if isinstance(item, dict)]
+
+
+async def _refresh_catalog(supplement_type: str) -> List[Dict[str, Any]]:
+    """Fetch the catalog upstream and write it through to the store and memory."""
+    key = catalog_key(supplement_type)
+    products_raw = await _fetch_catalog_raw(supplement_type)
+    if products_raw:
+        await asyncio.to_thread(get_catalog_store().save, key, products_raw)
+        _catalog_cache.set(key, products_raw)
+        _schedule_index_build(key)
+    return products_raw
+
+
+def _schedule_catalog_refresh(supplement_type: str) -> None:
+    key = catalog_key(supplement_type)
+    if key in _catalog_refreshing:
+        return
+
+    async def run() -> None:
+        try:
+            await _refresh_catalog(supplement_type)
+            _catalog_store_stats["refreshes"] += 1
+        except Exception:
+            # keep serving the stale copy; the next stale read retries
+            _catalog_store_stats["refresh_failures"] += 1
+        finally:
+            _catalog_refreshing.pop(key, None)
+
+    _catalog_refreshing[key] = _spawn_background(run())
+
+
+async def _load_catalog(supplement_type: str) -> List[Dict[str, Any]]:
+    """Serve from the on-disk store right away, refreshing stale entries in the background."""
+    entry = await asyncio.to_thread(get_catalog_store().load, catalog_key(supplement_type))
+    if entry is not None and entry.products:
+        _catalog_store_stats["hits"] += 1
+        if entry.age() > CATALOG_STALE_AFTER_S:
+            _catalog_store_stats["stale_served"] += 1
+            _schedule_catalog_refresh(supplement_type)
+        return entry.products
+    return await _refresh_catalog(supplement_type)
+
+
+async def get_catalog_raw(
+    supplement_type: str, deadline: Optional[Deadline] = None, cap: float = CATALOG_STAGE_TIMEOUT_S
+) -> List[Dict[str, Any]]:
+    """Return raw product dicts for a supplement type, cached per normalized type.
+
+    Lookups go memory -> on-disk store -> Perplexity. Concurrent requests for
+    the same type share a single load, and empty results are not cached so
+    the next request retries upstream. The wait is bounded by `deadline` and
+    `cap` (CATALOG_STAGE_TIMEOUT_S); a timed-out load keeps running to warm the cache.
+    """
+    load = _catalog_cache.get_or_load(
+        catalog_key(supplement_type),
+        lambda: _load_catalog(supplement_type),
+        cacheable=bool,
+    )
+    return await within(deadline, load, cap)
+
+
+def _canonical_name(value: Optional[str]) -> str:
+    return re.sub(r"[\s\-_/·,.()]+", "", (value or "").lower())
+
+
+def insight_key(product: Product) -> str:
+    """Cache key for a product's insight: canonical product name plus brand."""
+    return f"{_canonical_name(product.product_name)}|{_canonical_name(product.brand)}"
+
+
+def _insight_prompt(products: List[Product]) -> str:
+    names = ", ".join(
+        f"{p.product_name} ({p.brand})" if p.brand else p.product_name for p in products
+    )
+    return (
+        "다음 제품들에 대해 한국 실사용 후기와 브랜드 신뢰도(언론/소비자원/공식 인증/제조 이력 등) 자료를 종합해 JSON만 출력.\n"
+        f"제품: {names}.\n"
+        "product_name은 위 제품명을 그대로 사용하세요.\n"
+        "스키마: {\n  \"insights\": [ { \"product_name\": str, \"pros\": [str], \"cons\": [str], \"brand_trust_score_0to100\": int, \"review_sentiment_0to100\": int, \"safety_flags\": [str], \"brand_trust_summary_kr\": str, \"review_summary_kr\": str, \"notes\": str|null } ]\n}"
+    )
+
 
+async def _fetch_insights(products: List[Product]) -> Dict[str, ProductInsight]:
+    """Ask Perplexity about `products` and return insights keyed by `insight_key`."""
     try:
-        return json.loads(json_str)
-    except Exception as e:
-        raise HTTPException(status_code=502, detail=f"Invalid JSON from Perplexity: {e}")
+        insights_json = await call_perplexity_json(
+            _insight_prompt(products), Deadline(SHARED_FETCH_TIMEOUT_S, per_call=True), cap=SHARED_FETCH_TIMEOUT_S
+        )
+    except Exception:
+        insights_json = {}
+
+    by_name = {_canonical_name(p.product_name): p for p in products}
+    found: Dict[str, ProductInsight] = {}
+    for it in insights_json.get("insights", []):
+        try:
+            ins = ProductInsight(**it)
+        except Exception:
+            continue
+        name = _canonical_name(ins.product_name)
+        product = by_name.get(name) or next(
+            (p for n, p in by_name.items() if n and name and (n in name or name in n)), None
+        )
+        if product is not None:
+            found[insight_key(product)] = ins
+    for key, ins in found.items():
+        _insight_cache.set(key, ins)
+    _schedule_index_build(*_recommend_index.types_depending_on(found))
+    return found
+
+
+async def get_insights(
+    products: List[Product], deadline: Optional[Deadline] = None, cap: float = INSIGHTS_STAGE_TIMEOUT_S
+) -> Dict[str, ProductInsight]:
+    """Return insights keyed by product_name, fetching only uncached products.
+
+    Products already being fetched by a concurrent request are awaited rather
+    than requested again. Products Perplexity returns nothing for are not
+    cached, so they are retried on the next request. Fetches still pending
+    when the deadline hits are left running to warm the cache and the
+    products are ranked without insights.
+    """
+    by_key: Dict[str, ProductInsight] = {}
+    missing: List[Product] = []
+    waiting: List["asyncio.Task[Dict[str, ProductInsight]]"] = []
+    for p in products:
+        key = insight_key(p)
+        cached = _insight_cache.get(key)
+        if cached is not None:
+            by_key[key] = cached
+        elif key in _insight_inflight:
+            _insight_cache.stats.coalesced += 1
+            waiting.append(_insight_inflight[key])
+        elif all(insight_key(m) != key for m in missing):
+            missing.append(p)
+
+    if missing:
+        task = asyncio.ensure_future(_fetch_insights(missing))
+        keys = [insight_key(p) for p in missing]
+        for key in keys:
+            _insight_inflight[key] = task
+
+        def release(_: "asyncio.Task[Dict[str, ProductInsight]]") -> None:
+            for key in keys:
+                _insight_inflight.pop(key, None)
+
+        task.add_done_callback(release)
+        waiting.append(task)
+
+    if waiting:
+        timeout = deadline.timeout(cap) if deadline else cap
+        done, _ = await asyncio.wait(list(dict.fromkeys(waiting)), timeout=timeout)
+        for task in done:
+            if not task.cancelled() and task.exception() is None:
+                by_key.update(task.result())
+
+    insights_map: Dict[str, ProductInsight] = {}
+    for p in products:
+        ins = by_key.get(insight_key(p))
+        if ins is not None:
+            insights_map[p.product_name] = ins
+    if products and not insights_map:
+        telemetry.fallback("empty_insights")
+    return insights_map
+
+
+@dataclass
+class _Candidates:
+    """Catalog-derived state shared by recommend and its prefetch."""
+
+    products: List[Product]
+    features: scoring.ValueFeatures
+    top3: List[Product]
 
 
-def normalize(values: List[Optional[float]]) -> List[float]:
-    cleaned = [v for v in values if v is not None and not math.isnan(v)]
-    if not cleaned:
-        return [0.0 for _ in values]
-    min_v, max_v = min(cleaned), max(cleaned)
-    if math.isclose(min_v, max_v):
-        return [1.0 if v is not None else 0.0 for v in values]
-    return [((v - min_v) / (max_v - min_v)) if v is not None else 0.0 for v in values]
+@dataclass
+class _Prefetch:
+    key: Tuple[str, Optional[int]]  # (catalog key, budget)
+    created_at: float
+    candidates: "asyncio.Future[_Candidates]"
+    task: "asyncio.Task[None]"
 
 
-def infer_weights(answers: Dict[str, Any]) -> Tuple[float, float, float]:
-    """Return weights for value, trust, reviews as a tuple that sums ~1.0."""
-    pref = str(answers.get("preference", "balanced")).lower()
-    if "가성비" in pref or "value" in pref:
-        return 0.5, 0.3, 0.2
-    if "신뢰" in pref or "trust" in pref or "브랜드" in pref:
-        return 0.25, 0.5, 0.25
-    return 0.34, 0.33, 0.33
+_prefetches: "OrderedDict[str, _Prefetch]" = OrderedDict()
+_prefetch_stats: Dict[str, int] = {
+    "started": 0, "reused": 0, "expired": 0, "mismatched": 0, "failed": 0, "evicted": 0, "unknown": 0,
+}
+_prefetch_sem = asyncio.Semaphore(PREFETCH_CONCURRENCY)
 
 
-def parse_float(value: Any) -> Optional[float]:
+def _candidates(products: List[Product]) -> _Candidates:
+    features = scoring.value_features(scoring.ProductColumns.from_products(products))
+    return _Candidates(products=products, features=features, top3=_preliminary_top(products, features))
+
+
+def _prefetch_key(payload: ClarifyInput) -> Tuple[str, Optional[int]]:
+    return catalog_key(payload.supplement_type), payload.budget_krw_per_month or None
+
+
+def _purge_prefetches() -> None:
+    now = time.monotonic()
+    while _prefetches:
+        token, entry = next(iter(_prefetches.items()))
+        if now - entry.created_at < PREFETCH_TTL_S and len(_prefetches) <= PREFETCH_MAX_SESSIONS:
+            break
+        del _prefetches[token]
+        entry.task.cancel()
+        _prefetch_stats["expired" if now - entry.created_at >= PREFETCH_TTL_S else "evicted"] += 1
+
+
+def start_prefetch(payload: ClarifyInput) -> str:
+    """Warm the catalog and preliminary top-3 insights for a later recommend call.
+
+    The catalog part is published on `candidates` as soon as it is ready;
+    the task then keeps going to warm the insight cache. Both go through the
+    shared caches, so recommend coalesces with whatever is still in flight.
+    """
+    token = secrets.token_urlsafe(16)
+    candidates: "asyncio.Future[_Candidates]" = asyncio.get_running_loop().create_future()
+
+    async def run() -> None:
+        try:
+            async with _prefetch_sem:
+                deadline = Deadline(PREFETCH_DEADLINE_S)
+                products_raw = await get_catalog_raw(payload.supplement_type, deadline)
+                prepared = _candidates(_candidate_products(products_raw, payload.budget_krw_per_month))
+                candidates.set_result(prepared)
+                await get_insights(prepared.top3, deadline)
+        except BaseException as e:
+            if not candidates.done():
+                _prefetch_stats["failed"] += 1
+                candidates.set_exception(e if isinstance(e, Exception) else RuntimeError("prefetch cancelled"))
+                candidates.exception()  # retrieved; recommend falls back to its own fetch
+            if not isinstance(e, Exception):
+                raise
+
+    _prefetches[token] = _Prefetch(
+        key=_prefetch_key(payload), created_at=time.monotonic(), candidates=candidates, task=_spawn_background(run())
+    )
+    _prefetch_stats["started"] += 1
+    _purge_prefetches()
+    return token
+
+
+async def take_prefetch(payload: RecommendInput, deadline: Optional[Deadline] = None) -> Optional[_Candidates]:
+    """Candidates prefetched for `payload.prefetch_token`, or None to fetch normally.
+
+    Waits for an in-flight prefetch within the catalog stage budget. Tokens
+    stay valid until they expire, so a resubmitted form reuses them too.
+    Client-supplied products (the search_products table the frontend sends
+    back) keep the token usable as long as they match the prefetched catalog.
+    """
+    if not payload.prefetch_token:
+        return None
+    entry = _prefetches.get(payload.prefetch_token)
+    if entry is None:
+        _prefetch_stats["unknown"] += 1
+        return None
+    if time.monotonic() - entry.created_at >= PREFETCH_TTL_S:
+        _purge_prefetches()
+        return None
+    if entry.key != _prefetch_key(payload):
+        # answers changed the type or budget; prefetched catalog does not apply
+        _prefetch_stats["mismatched"] += 1
+        return None
+    timeout = deadline.timeout(CATALOG_STAGE_TIMEOUT_S) if deadline else CATALOG_STAGE_TIMEOUT_S
     try:
-        if value is None:
-            return None
-        s = str(value).replace(",", "").strip()
-        return float(s)
+        prepared = await asyncio.wait_for(asyncio.shield(entry.candidates), timeout)
     except Exception:
+        # failed or still running: the normal path coalesces with in-flight fetches
+        return None
+    if payload.products and _budget_filter(payload.products, payload.budget_krw_per_month) != prepared.products:
+        # the client ranks its own catalog, not the one prefetched
+        _prefetch_stats["mismatched"] += 1
         return None
+    _prefetch_stats["reused"] += 1
+    return prepared
 
 
 @app.post("/api/clarify", response_model=ClarifyResponse)
 async def clarify(payload: ClarifyInput) -> ClarifyResponse:
-    """Ask Gemini for 1-3 clarifying questions to improve recommendation quality."""
+    """Ask Gemini for 1-3 clarifying questions to improve recommendation quality.
+
+    Also starts prefetching the catalog and preliminary insights while the
+    user answers; the returned prefetch_token lets /api/recommend reuse them.
+    """
+    prefetch_token = start_prefetch(payload) if PREFETCH_ENABLED else None
     instructions = (
         "반드시 최소 1개, 최대 3개의 Clarifying 질문을 한국어로 생성하세요.\n"
         "질문은 사용자의 입력(영양제 종류, 예산, 대상/고민)에서 불명확하거나 결정 품질에 중요한 부분을 보완하도록 하세요.\n"
@@ -261,18 +907,20 @@ async def clarify(payload: ClarifyInput) -> ClarifyResponse:
         },
     }
 
-    client = _new_gemini_client()
-    res = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=(
-            "다음 데이터를 참고하여 Clarifying 질문을 한국어로 설계하고, JSON만 출력하세요.\n"
-            + json.dumps(prompt, ensure_ascii=False)
-        ),
-    )
-
-    text = (res.text or "").strip()
     try:
-        data = json.loads(text)
+        with telemetry.stage("clarify", "questions"):
+            text = await gemini_text(
+                "다음 데이터를 참고하여 Clarifying 질문을 한국어로 설계하고, JSON만 출력하세요.\n"
+                + json.dumps(prompt, ensure_ascii=False),
+                # the deadline bounds the admission queue wait too
+                Deadline(CLARIFY_TIMEOUT_S, per_call=True),
+                CLARIFY_TIMEOUT_S,
+            )
+    except Exception:
+        # slow/failed/open-circuit Gemini: fall through to the default question
+        text = ""
+    try:
+        data = extract_json(text, expect=dict)
         raw_questions = data.get("questions", [])
     except Exception:
         raw_questions = []
@@ -281,6 +929,7 @@ async def clarify(payload: ClarifyInput) -> ClarifyResponse:
     # enforce 1-3
     max_q = 3
     if not raw_questions:
+        telemetry.fallback("default_question")
         raw_questions = [
             {
                 "id": "q1",
@@ -298,228 +947,768 @@ async def clarify(payload: ClarifyInput) -> ClarifyResponse:
             )
         )
 
-    return ClarifyResponse(questions=questions)
-
-
-class SearchResponse(BaseModel):
-    products: List[Product]
+    return ClarifyResponse(questions=questions, prefetch_token=prefetch_token)
 
 
 @app.post("/api/search_products", response_model=SearchResponse)
 async def search_products(payload: ClarifyInput) -> SearchResponse:
     """Return initial 10 products table fast for loading view."""
-    query = (
-        f"한국 시장 기준 '{payload.supplement_type}' 대표 제품 10개를 추천용으로 선정. "
-        "아래 JSON 스키마로만 출력: {\n"
-        "  \"products\": [ {\"product_name\": str, \"brand\": str, \"key_ingredient\": str|null, \"ingredient_amount\": number|null, \"ingredient_unit\": str|null, "
-        "  \"price_per_month_krw\": int|null, \"capsule_type\": str|null, \"capsule_count\": int|null, \"daily_dose\": str|null, \"purchase_url\": str|null } ]\n}"
-        "\n주의: 수치는 숫자만, 단위는 별도 필드(ingredient_unit)에 표기. 한국에서 구매 가능 제품 위주."
-    )
-
-    data = await call_perplexity_json(query)
-    products_raw = data.get("products") or data.get("items") or []
-    products: List[Product] = []
-    for item in products_raw:
-        try:
-            products.append(Product(**item))
-        except Exception:
-            products.append(
-                Product(
-                    product_name=str(item.get("product_name") or item.get("name") or "unknown"),
-                    brand=(item.get("brand") and str(item.get("brand"))) or None,
-                    key_ingredient=(item.get("key_ingredient") and str(item.get("key_ingredient"))) or None,
-                    ingredient_amount=parse_float(item.get("ingredient_amount")),
-                    ingredient_unit=(item.get("ingredient_unit") and str(item.get("ingredient_unit"))) or None,
-                    price_per_month_krw=int(str(item.get("price_per_month_krw")).replace(",", ""))
-                    if str(item.get("price_per_month_krw")).replace("_", "").replace(",", "").isdigit()
-                    else None,
-                    capsule_type=item.get("capsule_type"),
-                    capsule_count=int(item.get("capsule_count")) if str(item.get("capsule_count")).isdigit() else None,
-                    daily_dose=item.get("daily_dose"),
-                    purchase_url=item.get("purchase_url"),
-                )
-            )
+    try:
+        with telemetry.stage("search_products", "catalog"):
+            products_raw = await get_catalog_raw(payload.supplement_type)
+    except DeadlineExceeded:
+        raise HTTPException(status_code=504, detail="Product search timed out")
+    with telemetry.stage("search_products", "normalize"):
+        products = _normalize_products(products_raw)
     return SearchResponse(products=products)
 
 
-@app.post("/api/recommend", response_model=RecommendResult)
-async def recommend(payload: RecommendInput) -> RecommendResult:
-    # Step 3: fetch 10 products from Perplexity as JSON
+async def _load_products_raw(
+    payload: RecommendInput, deadline: Optional[Deadline] = None, cap: float = CATALOG_STAGE_TIMEOUT_S
+) -> List[Dict[str, Any]]:
+    """Step 3: client-supplied products, else the (cached) catalog; [] on failure."""
     if payload.products:
-        products_raw = [p.model_dump() if isinstance(p, Product) else p for p in payload.products]
-    else:
-        query = (
-            f"한국 시장 기준 '{payload.supplement_type}' 대표 제품 10개를 추천용으로 선정. "
-            "아래 JSON 스키마로만 출력: {\n"
-            "  \"products\": [ {\"product_name\": str, \"brand\": str, \"key_ingredient\": str|null, \"ingredient_amount\": number|null, \"ingredient_unit\": str|null, "
-            "  \"price_per_month_krw\": int|null, \"capsule_type\": str|null, \"capsule_count\": int|null, \"daily_dose\": str|null, \"purchase_url\": str|null } ]\n}"
-            "\n주의: 수치는 숫자만, 단위는 별도 필드(ingredient_unit). 한국에서 구매 가능 제품 위주."
-        )
-        try:
-            data = await call_perplexity_json(query)
-        except Exception:
-            data = {}
-        products_raw = data.get("products") or data.get("items") or []
+        return [p.model_dump() if isinstance(p, Product) else p for p in payload.products]
+    try:
+        return await get_catalog_raw(payload.supplement_type, deadline, cap)
+    except Exception:
+        return []
 
-    products: List[Product] = []
-    for item in products_raw:
-        try:
-            products.append(Product(**item))
-        except Exception:
-            # attempt soft conversions and mapping to our generic schema
-            epa = parse_float(item.get("epa_mg"))
-            dha = parse_float(item.get("dha_mg"))
-            amount = parse_float(item.get("ingredient_amount"))
-            if amount is None:
-                if epa is not None and dha is not None:
-                    amount = epa + dha
-                else:
-                    amount = epa if epa is not None else dha
-            unit = (item.get("ingredient_unit") and str(item.get("ingredient_unit"))) or ("mg" if amount is not None else None)
-            price_raw = str(item.get("price_per_month_krw"))
-            price_val = int(price_raw.replace("_", "").replace(",", "")) if price_raw.replace("_", "").replace(",", "").isdigit() else None
-            products.append(
-                Product(
-                    product_name=str(item.get("product_name") or item.get("name") or "unknown"),
-                    brand=(item.get("brand") and str(item.get("brand"))) or None,
-                    key_ingredient=(item.get("key_ingredient") and str(item.get("key_ingredient"))) or None,
-                    ingredient_amount=amount,
-                    ingredient_unit=unit,
-                    price_per_month_krw=price_val,
-                    capsule_type=item.get("capsule_type"),
-                    capsule_count=int(item.get("capsule_count")) if str(item.get("capsule_count")).isdigit() else None,
-                    daily_dose=item.get("daily_dose"),
-                    purchase_url=item.get("purchase_url"),
-                )
-            )
+
+async def _recommend_products(payload: RecommendInput, deadline: Optional[Deadline] = None) -> List[Product]:
+    """Step 3-4: load the candidate catalog and apply the budget filter."""
+    products_raw = await _load_products_raw(payload, deadline)
+    return _candidate_products(products_raw, payload.budget_krw_per_month)
+
+
+def _normalize_products(products_raw: List[Any]) -> List[Product]:
+    """Coerce raw LLM product dicts into Products, tracking how much repair they needed."""
+    products, stats = normalize_products(products_raw)
+    _coercion_totals.merge(stats)
+    for product, fields in zip(products, stats.per_item):
+        if fields:
+            _coercion_recent.append({"product_name": product.product_name, "fields": fields})
+            logger.debug("coerced product %r: %s", product.product_name, ", ".join(fields))
+    return products
+
+
+def _candidate_products(products_raw: List[Dict[str, Any]], budget_krw_per_month: Optional[int]) -> List[Product]:
+    products = _normalize_products(products_raw)
 
     if not products:
         # graceful fallback to static products instead of failing
+        telemetry.fallback("fallback_products")
         products = _fallback_products()
-
     # Step 4: filter and rank to top3
-    budget = payload.budget_krw_per_month or None
-    if budget:
-        products = [p for p in products if not p.price_per_month_krw or p.price_per_month_krw <= budget]
-        if not products:
-            # if filtered all out, keep original
-            products = [Product(**item) for item in products_raw[:10]] if products_raw else []
+    return _budget_filter(products, budget_krw_per_month)
 
-    value_w, trust_w, reviews_w = infer_weights(payload.answers)
 
-    potency_vals = []
-    price_vals = []
-    for p in products:
-        potency = p.ingredient_amount or 0.0
-        potency_vals.append(potency)
-        price_vals.append(float(p.price_per_month_krw) if p.price_per_month_krw else None)
-
-    potency_norm = normalize(potency_vals)
-    # Lower price is better: invert normalized price
-    price_norm_raw = normalize([v if v is not None else 0.0 for v in price_vals])
-    price_norm = [1.0 - v if price_vals[i] is not None else 0.5 for i, v in enumerate(price_norm_raw)]
-
-    # Step 5: qualitative insights for the top N (preliminary top by potency/price)
-    prelim_scores = [0.7 * potency_norm[i] + 0.3 * price_norm[i] for i in range(len(products))]
-    prelim_indices = sorted(range(len(products)), key=lambda i: prelim_scores[i], reverse=True)[:3]
-    top3 = [products[i] for i in prelim_indices]
-
-    # Fetch qualitative info from Perplexity
-    names = ", ".join([p.product_name for p in top3])
-    qual_prompt = (
-        "다음 제품들에 대해 한국 실사용 후기와 브랜드 신뢰도(언론/소비자원/공식 인증/제조 이력 등) 자료를 종합해 JSON만 출력.\n"
-        f"사용자 프로필/고민/답변을 반영해 문장 요약을 맞춤화하세요: {json.dumps({'target_and_concerns': payload.target_and_concerns, 'answers': payload.answers}, ensure_ascii=False)}\n"
-        f"제품: {names}.\n"
-        "스키마: {\n  \"insights\": [ { \"product_name\": str, \"pros\": [str], \"cons\": [str], \"brand_trust_score_0to100\": int, \"review_sentiment_0to100\": int, \"safety_flags\": [str], \"brand_trust_summary_kr\": str, \"review_summary_kr\": str, \"notes\": str|null } ]\n}"
-    )
+def _budget_filter(products: List[Product], budget_krw_per_month: Optional[int]) -> List[Product]:
+    budget = budget_krw_per_month or None
+    if not budget:
+        return products
+    filtered = [p for p in products if not p.price_per_month_krw or p.price_per_month_krw <= budget]
+    # if filtered all out, keep original
+    return filtered or products[:10]
 
-    try:
-        insights_json = await call_perplexity_json(qual_prompt)
-    except Exception:
-        insights_json = {}
-    insights_map: Dict[str, ProductInsight] = {}
-    for it in insights_json.get("insights", []):
+
+def _preliminary_top(products: List[Product], features: scoring.ValueFeatures) -> List[Product]:
+    """Step 5 preselection: top 3 by potency/price, the ones worth asking about."""
+    return [products[i] for i in scoring.top_k(scoring.preliminary_scores(features), 3)]
+
+
+def _final_rank(
+    products: List[Product],
+    features: scoring.ValueFeatures,
+    insights_map: Dict[str, ProductInsight],
+    profile: scoring.WeightProfile,
+) -> List[RankedProduct]:
+    """Combine value features with insight scores into the final top 3 (no summaries yet)."""
+    ranked_indices, final_scores = scoring.rank(products, insights_map, profile, k=3, features=features)
+    return [
+        RankedProduct(
+            rank=rank,
+            product=products[i],
+            insight=insights_map.get(products[i].product_name),
+            score=round(float(final_scores[i]), 4),
+        )
+        for rank, i in enumerate(ranked_indices, start=1)
+    ]
+
+
+def _profile_for(answers: Dict[str, Any]) -> scoring.WeightProfile:
+    return scoring.resolve_profile(answers, WEIGHT_PROFILES)
+
+
+def _catalog_prices(products: List[Product]) -> List[int]:
+    return sorted({p.price_per_month_krw for p in products if p.price_per_month_krw})
+
+
+def _index_buckets(products: List[Product]) -> List[Tuple[Optional[int], _Candidates]]:
+    """Candidates per budget floor of a normalized catalog: no budget, below every price, each price."""
+    return [
+        (floor, _candidates(_budget_filter(products, None if floor is None else max(floor, 1))))
+        for floor in (None, 0, *_catalog_prices(products))
+    ]
+
+
+def _build_index(key: str) -> int:
+    """Re-rank one supplement type for every weight profile and budget bucket; returns entries built.
+
+    Uses cached data only. Buckets whose preliminary top 3 lack a cached
+    insight are skipped and picked up once those insights are fetched.
+    """
+    catalog = _catalog_cache.peek(key)
+    products = normalize_products(catalog)[0] if catalog else []
+    if not products:
+        _recommend_index.drop(key)
+        return 0
+    entries: Dict[Tuple[str, Optional[int]], IndexEntry] = {}
+    missing: "set[str]" = set()
+    for floor, prepared in _index_buckets(products):
+        insights = {insight_key(p): _insight_cache.peek(insight_key(p)) for p in prepared.top3}
+        absent = {k for k, ins in insights.items() if ins is None}
+        if absent:
+            missing |= absent
+            continue
+        insights_map = {p.product_name: insights[insight_key(p)] for p in prepared.top3}
+        for profile in WEIGHT_PROFILES:
+            ranked = _final_rank(prepared.products, prepared.features, insights_map, profile)
+            entries[(profile.name, floor)] = IndexEntry(ranked, prepared.products, prepared.top3, insights)
+    _recommend_index.set_type(key, catalog, products, _catalog_prices(products), entries, missing)
+    return len(entries)
+
+
+def _flush_index_builds() -> None:
+    keys = list(_index_pending)
+    _index_pending.clear()
+    for key in keys:
         try:
-            ins = ProductInsight(**it)
-            insights_map[ins.product_name] = ins
+            _build_index(key)
+        except Exception:
+            logger.exception("recommendation index build failed for %s", key)
+
+
+def _schedule_index_build(*keys: str) -> None:
+    """Rebuild the index for `keys` on the next loop iteration, once per key however often asked."""
+    if not RECOMMEND_INDEX_ENABLED or not keys:
+        return
+    if not _index_pending:
+        asyncio.get_running_loop().call_soon(_flush_index_builds)
+    _index_pending.update(keys)
+
+
+def _index_lookup(payload: RecommendInput) -> Optional[IndexEntry]:
+    """Precomputed ranking for the payload's type, profile and budget, if current.
+
+    Client-supplied products (the search_products table the frontend sends
+    back) are served from the index only when they equal the cached catalog.
+    """
+    if not RECOMMEND_INDEX_ENABLED:
+        return None
+    key = catalog_key(payload.supplement_type)
+    profile = _profile_for(payload.answers).name
+    entry = _recommend_index.lookup(key, profile, payload.budget_krw_per_month, payload.products)
+    if entry is None and _recommend_index.rebuild_due(key, RECOMMEND_INDEX_REBUILD_MIN_S):
+        # the live pipeline is about to cache what the build needs
+        _schedule_index_build(key)
+    return entry
+
+
+async def precompute_index(supplement_types: List[str]) -> Dict[str, int]:
+    """Warm catalogs and every budget bucket's preliminary insights, then index each type.
+
+    Returns the number of (profile, budget bucket) rankings per canonical type.
+    """
+    indexed: Dict[str, int] = {}
+    for supplement_type in supplement_types:
+        key = catalog_key(supplement_type)
+        try:
+            products_raw = await get_catalog_raw(supplement_type, cap=BATCH_FETCH_TIMEOUT_S)
         except Exception:
+            indexed[key] = 0
             continue
+        products, _ = normalize_products(products_raw)
+        prelim = {insight_key(p): p for _, prepared in _index_buckets(products) for p in prepared.top3}
+        await get_insights(list(prelim.values()), cap=BATCH_FETCH_TIMEOUT_S)
+        indexed[key] = _build_index(key)
+    return indexed
 
-    # Combine and compute final ranking
-    trust_vals = []
-    review_vals = []
-    for p in products:
-        ins = insights_map.get(p.product_name)
-        trust_vals.append(float(ins.brand_trust_score_0to100) if ins and ins.brand_trust_score_0to100 is not None else None)
-        review_vals.append(float(ins.review_sentiment_0to100) if ins and ins.review_sentiment_0to100 is not None else None)
-
-    trust_norm = normalize(trust_vals)
-    review_norm = normalize(review_vals)
-
-    final_scores = []
-    for i, p in enumerate(products):
-        score = (
-            value_w * (0.6 * price_norm[i] + 0.4 * potency_norm[i])
-            + trust_w * trust_norm[i]
-            + reviews_w * review_norm[i]
-        )
-        final_scores.append(score)
 
-    ranked_indices = sorted(range(len(products)), key=lambda i: final_scores[i], reverse=True)[:3]
-    ranked_products = [products[i] for i in ranked_indices]
+async def _precompute_at_startup() -> None:
+    try:
+        indexed = await precompute_index(RECOMMEND_INDEX_TYPES)
+    except Exception:
+        logger.exception("recommendation index precompute failed")
+        return
+    logger.info("recommendation index precomputed: %s", indexed)
 
-    # Step 6: ask Gemini to synthesize concise Korean summaries
-    rank_payload = {
-        "user": payload.model_dump(),
-        "ranked": [
-            {
-                "rank": idx + 1,
-                "product": rp.model_dump(),
-                "insight": insights_map.get(rp.product_name).model_dump() if insights_map.get(rp.product_name) else None,
-                "score": round(final_scores[ranked_indices[idx]], 4),
-            }
-            for idx, rp in enumerate(ranked_products)
-        ],
+
+# Legend for the short keys used by _summary_user/_summary_item
+_SUMMARY_KEYS = (
+    "키: type=영양제 종류, budget=월 예산(원), concerns=대상/고민, answers=추가 답변, ing=핵심 성분, amt=함량, "
+    "krw=월 가격(원), cap=제형, count=캡슐 수, dose=복용법, trust/reviews=브랜드 신뢰·후기 점수(0-100), "
+    "flags=안전 주의, trust_kr/reviews_kr=신뢰·후기 요약\n"
+)
+
+
+def _compact_json(value: Any) -> str:
+    return json.dumps(value, ensure_ascii=False, separators=(",", ":"))
+
+
+def _drop_empty(d: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in d.items() if v is not None and v != "" and v != [] and v != {}}
+
+
+def _summary_user(payload: RecommendInput) -> Dict[str, Any]:
+    """The user input the summary needs; client `products` are already in `ranked`."""
+    return _drop_empty(
+        {
+            "type": payload.supplement_type,
+            "budget": payload.budget_krw_per_month,
+            "concerns": payload.target_and_concerns,
+            "answers": _drop_empty(payload.answers),
+        }
+    )
+
+
+def _summary_item(rp: RankedProduct) -> Dict[str, Any]:
+    """One ranked product with short keys, no nulls and no URL or repeated product name."""
+    p, ins = rp.product, rp.insight
+    item: Dict[str, Any] = {
+        "rank": rp.rank,
+        "name": p.product_name,
+        "brand": p.brand,
+        "ing": p.key_ingredient,
+        "amt": f"{p.ingredient_amount:g}{p.ingredient_unit or ''}" if p.ingredient_amount is not None else None,
+        "krw": p.price_per_month_krw,
+        "cap": p.capsule_type,
+        "count": p.capsule_count,
+        "dose": p.daily_dose,
+        "score": round(rp.score, 3),
     }
+    if ins is not None:
+        item.update(
+            pros=ins.pros,
+            cons=ins.cons,
+            trust=ins.brand_trust_score_0to100,
+            reviews=ins.review_sentiment_0to100,
+            flags=ins.safety_flags,
+            trust_kr=ins.brand_trust_summary_kr,
+            reviews_kr=ins.review_summary_kr,
+            notes=ins.notes,
+        )
+    return _drop_empty(item)
 
-    client = _new_gemini_client()
-    res = client.models.generate_content(
-        model="gemini-2.5-flash",
-        contents=(
-            "한국 35~50세 여성의 구매 맥락에 맞춰 아래 데이터를 바탕으로 각 제품의 핵심 스펙과 추천 이유를 2-3줄로 간결 요약하세요.\n"
-            "포맷: JSON { ranked: [ { rank, summary_kr } ], final_advice_markdown }\n"
-            + json.dumps(rank_payload, ensure_ascii=False)
-        ),
+
+def _summary_prompt(payload: RecommendInput, ranked: List[RankedProduct]) -> str:
+    rank_payload = {"user": _summary_user(payload), "ranked": [_summary_item(rp) for rp in ranked]}
+    return (
+        "한국 35~50세 여성의 구매 맥락에 맞춰 아래 데이터를 바탕으로 각 제품의 핵심 스펙과 추천 이유를 2-3줄로 간결 요약하세요.\n"
+        "포맷: JSON { ranked: [ { rank, summary_kr } ], final_advice_markdown }\n"
+        + _SUMMARY_KEYS
+        + _compact_json(rank_payload)
     )
 
-    summary_text = (res.text or "").strip()
+
+def _apply_summaries(
+    ranked: List[RankedProduct], summary_text: str, fill_for: Optional[RecommendInput] = None
+) -> Optional[str]:
+    """Fill `summary` on each ranked product from Gemini's JSON; return final advice."""
+    try:
+        j = extract_json(summary_text, expect=dict)
+    except Exception:
+        # fallback: no structured summaries
+        j = {}
+    return _apply_summary_json(ranked, j, fill_for)
+
+
+def _apply_summary_json(ranked: List[RankedProduct], j: Any, fill_for: Optional[RecommendInput] = None) -> Optional[str]:
+    """Apply Gemini's summary JSON; with `fill_for`, gaps get local template summaries."""
     summaries: Dict[int, str] = {}
     final_advice_markdown: Optional[str] = None
     try:
-        j = json.loads(summary_text)
         for item in j.get("ranked", []):
             summaries[int(item.get("rank"))] = str(item.get("summary_kr", "")).strip()
         final_advice_markdown = j.get("final_advice_markdown")
     except Exception:
-        # fallback: no structured summaries
         pass
+    if fill_for is not None and ranked and (not final_advice_markdown or not all(summaries.get(rp.rank) for rp in ranked)):
+        local = local_summary.summarize(fill_for, ranked)
+        for item in local["ranked"]:
+            summaries[item["rank"]] = summaries.get(item["rank"]) or item["summary_kr"]
+        final_advice_markdown = final_advice_markdown or local["final_advice_markdown"]
+        telemetry.fallback("local_summary")
+    for rp in ranked:
+        rp.summary = summaries.get(rp.rank)
+    if ranked and not summaries:
+        telemetry.fallback("no_summary")
+    return final_advice_markdown
+
+
+def _summary_fill(payload: RecommendInput) -> Optional[RecommendInput]:
+    """`fill_for` argument for _apply_summary_json under the configured SUMMARY_MODE."""
+    return None if get_settings().summary_mode == "llm" else payload
+
+
+async def _summarize(payload: RecommendInput, ranked: List[RankedProduct], deadline: Deadline) -> Optional[str]:
+    """Step 6: fill `summary` per SUMMARY_MODE and return the final advice markdown."""
+    mode = get_settings().summary_mode
+    if mode == "local":
+        return _apply_summary_json(ranked, local_summary.summarize(payload, ranked))
+    call = asyncio.ensure_future(gemini_text(_summary_prompt(payload, ranked), deadline, SUMMARY_STAGE_TIMEOUT_S))
+    head_start = deadline.timeout(SUMMARY_RACE_S) if mode == "race" else None
+    try:
+        done, _ = await asyncio.wait({call}, timeout=head_start)
+    except asyncio.CancelledError:
+        call.cancel()
+        raise
+    if call in done:
+        # out of budget or Gemini unavailable: empty text, then local or no summaries
+        summary_text = "" if call.exception() is not None else call.result()
+    else:
+        # lost the race: answer now, let Gemini finish in the background to warm the LLM cache
+        _background_tasks.add(call)
+        call.add_done_callback(_background_tasks.discard)
+        call.add_done_callback(lambda t: t.cancelled() or t.exception())  # mark failures retrieved
+        summary_text = ""
+    return _apply_summaries(ranked, summary_text, _summary_fill(payload))
+
+
+async def _load_candidates(payload: RecommendInput, deadline: Deadline, endpoint: str) -> _Candidates:
+    """Prefetched candidates for the payload's token, else catalog + budget filter + preliminary top 3."""
+    if payload.prefetch_token:
+        with telemetry.stage(endpoint, "prefetch_wait"):
+            prepared = await take_prefetch(payload, deadline)
+        if prepared is not None:
+            return prepared
+    with telemetry.stage(endpoint, "catalog"):
+        products = await _recommend_products(payload, deadline)
+    with telemetry.stage(endpoint, "preliminary"):
+        return _candidates(products)
 
-    ranked: List[RankedProduct] = []
-    for idx, rp in enumerate(ranked_products, start=1):
-        ranked.append(
-            RankedProduct(
-                rank=idx,
-                product=rp,
-                insight=insights_map.get(rp.product_name),
-                score=round(final_scores[ranked_indices[idx - 1]], 4),
-                summary=summaries.get(idx),
-            )
-        )
+
+@app.post("/api/recommend", response_model=RecommendResult)
+async def recommend(payload: RecommendInput) -> RecommendResult:
+    deadline = Deadline(RECOMMEND_DEADLINE_S)
+
+    # Steps 3-5 precomputed for this type, weight profile and budget bucket
+    with telemetry.stage("recommend", "index"):
+        indexed = _index_lookup(payload)
+    if indexed is not None:
+        ranked = [rp.model_copy() for rp in indexed.ranked]
+    else:
+        # Step 3-4: fetch products (prefetched or cached catalog) and filter by budget
+        prepared = await _load_candidates(payload, deadline, "recommend")
+        products, features, top3 = prepared.products, prepared.features, prepared.top3
+        # Step 5: qualitative insights for the top N (preliminary top by potency/price),
+        # fetched from Perplexity only for products not cached (or prefetched) yet
+        with telemetry.stage("recommend", "insights"):
+            insights_map = await get_insights(top3, deadline)
+
+        # Combine and compute final ranking
+        with telemetry.stage("recommend", "scoring"):
+            ranked = _final_rank(products, features, insights_map, _profile_for(payload.answers))
+
+    # Step 6: concise Korean summaries from Gemini and/or local templates (SUMMARY_MODE)
+    with telemetry.stage("recommend", "summary"):
+        final_advice_markdown = await _summarize(payload, ranked, deadline)
 
     return RecommendResult(ranked=ranked, final_advice_markdown=final_advice_markdown)
 
 
+async def _drain(first: "asyncio.Future[str]", stream: AsyncGenerator[str, None]) -> None:
+    """Run a stream that lost its head start to the end, so `gemini_stream` caches the response."""
+    try:
+        await first
+        async for _ in stream:
+            pass
+    except Exception:
+        pass  # already reported by gemini_stream's telemetry and breaker
+    finally:
+        await stream.aclose()
+
+
+async def _with_head_start(stream: AsyncGenerator[str, None], timeout: Optional[float]) -> AsyncIterator[str]:
+    """Re-yield `stream`, raising asyncio.TimeoutError if its first item takes longer than `timeout`.
+
+    On timeout the stream is not cancelled: it finishes in the background to
+    warm the LLM cache, like the losing call of a non-streaming race.
+    """
+    first = asyncio.ensure_future(stream.__anext__())
+    try:
+        done, _ = await asyncio.wait({first}, timeout=timeout)
+    except BaseException:
+        first.cancel()
+        await asyncio.gather(first, return_exceptions=True)
+        await stream.aclose()
+        raise
+    if first not in done:
+        _spawn_background(_drain(first, stream))
+        raise asyncio.TimeoutError
+    try:
+        try:
+            yield first.result()
+        except StopAsyncIteration:
+            return
+        async for item in stream:
+            yield item
+    finally:
+        await stream.aclose()
+
+
+def _sse(event: str, data: Any) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+@app.post("/api/recommend/stream")
+async def recommend_stream(payload: RecommendInput) -> StreamingResponse:
+    """Server-Sent Events variant of /api/recommend.
+
+    Emits one event per pipeline stage as soon as it completes:
+    `products`, `preliminary`, `insights`, `ranked`, then `summary_delta`
+    chunks streamed from Gemini, a parsed `summary` and a final `done`
+    carrying the full RecommendResult. Failures after ranking degrade to
+    local template summaries (or none with SUMMARY_MODE=llm); earlier
+    failures emit `error`. With SUMMARY_MODE=race, Gemini must start
+    streaming within SUMMARY_RACE_S, else it finishes in the background
+    to warm the LLM cache; with local, no deltas are sent.
+    """
+
+    deadline = Deadline(RECOMMEND_DEADLINE_S)
+
+    async def events() -> AsyncIterator[str]:
+        try:
+            with telemetry.stage("recommend_stream", "index"):
+                indexed = _index_lookup(payload)
+            if indexed is not None:
+                yield _sse("products", {"products": [p.model_dump() for p in indexed.products]})
+                yield _sse("preliminary", {"products": [p.model_dump() for p in indexed.top3]})
+                yield _sse("insights", {"insights": [ins.model_dump() for ins in indexed.insights.values()]})
+                ranked = [rp.model_copy() for rp in indexed.ranked]
+            else:
+                prepared = await _load_candidates(payload, deadline, "recommend_stream")
+                products, features, top3 = prepared.products, prepared.features, prepared.top3
+                yield _sse("products", {"products": [p.model_dump() for p in products]})
+                yield _sse("preliminary", {"products": [p.model_dump() for p in top3]})
+
+                with telemetry.stage("recommend_stream", "insights"):
+                    insights_map = await get_insights(top3, deadline)
+                yield _sse("insights", {"insights": [ins.model_dump() for ins in insights_map.values()]})
+
+                with telemetry.stage("recommend_stream", "scoring"):
+                    ranked = _final_rank(products, features, insights_map, _profile_for(payload.answers))
+            yield _sse("ranked", {"ranked": [rp.model_dump() for rp in ranked]})
+        except Exception as e:
+            yield _sse("error", {"detail": str(e) or e.__class__.__name__})
+            return
+
+        # parse the summary JSON incrementally as chunks arrive
+        scanner = JsonScanner(dict)
+        mode = get_settings().summary_mode
+        if mode == "local":
+            summary_json = local_summary.summarize(payload, ranked)
+        else:
+            stream = gemini_stream(_summary_prompt(payload, ranked), deadline, SUMMARY_STAGE_TIMEOUT_S)
+            head_start = deadline.timeout(SUMMARY_RACE_S) if mode == "race" else None
+            try:
+                # includes the time the client takes to accept each delta
+                with telemetry.stage("recommend_stream", "summary"):
+                    async for delta in _with_head_start(stream, head_start):
+                        scanner.feed(delta)
+                        yield _sse("summary_delta", {"text": delta})
+            except Exception:
+                pass
+            try:
+                summary_json = scanner.result()
+            except JSONExtractionError:
+                summary_json = {}
+        final_advice_markdown = _apply_summary_json(ranked, summary_json, _summary_fill(payload))
+        yield _sse(
+            "summary",
+            {
+                "ranked": [{"rank": rp.rank, "summary": rp.summary} for rp in ranked],
+                "final_advice_markdown": final_advice_markdown,
+            },
+        )
+        result = RecommendResult(ranked=ranked, final_advice_markdown=final_advice_markdown)
+        yield _sse("done", result.model_dump())
+
+    return StreamingResponse(
+        events(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+def _batch_summary_prompt(items: List[Tuple[int, RecommendInput, List[RankedProduct]]]) -> str:
+    profiles = [
+        {"id": idx, "user": _summary_user(payload), "ranked": [_summary_item(rp) for rp in ranked]}
+        for idx, payload, ranked in items
+    ]
+    return (
+        "한국 35~50세 여성의 구매 맥락에 맞춰, 아래 각 사용자 프로필(id)별로 추천 제품의 핵심 스펙과 추천 이유를 2-3줄로 간결 요약하세요.\n"
+        "포맷: JSON { results: [ { id, ranked: [ { rank, summary_kr } ], final_advice_markdown } ] }\n"
+        + _SUMMARY_KEYS
+        + _compact_json(profiles)
+    )
+
+
+async def _summarize_batch(
+    items: List[Tuple[int, RecommendInput, List[RankedProduct]]]
+) -> Dict[int, Optional[str]]:
+    """One Gemini call for several profiles; returns final advice per profile id.
+
+    SUMMARY_MODE=local skips Gemini; race behaves like fallback here since
+    batches are not latency bound.
+    """
+    if get_settings().summary_mode == "local":
+        return {
+            idx: _apply_summary_json(ranked, local_summary.summarize(payload, ranked)) for idx, payload, ranked in items
+        }
+    try:
+        text = await gemini_text(
+            _batch_summary_prompt(items), Deadline(BATCH_SUMMARY_TIMEOUT_S, per_call=True), BATCH_SUMMARY_TIMEOUT_S
+        )
+        results = {int(r.get("id")): r for r in extract_json(text, expect=dict).get("results", [])}
+    except Exception:
+        results = {}
+    return {
+        idx: _apply_summary_json(ranked, results.get(idx, {}), _summary_fill(payload))
+        for idx, payload, ranked in items
+    }
+
+
+async def _recommend_group(
+    indexed: List[Tuple[int, RecommendInput]], sem: asyncio.Semaphore
+) -> Dict[int, RecommendResult]:
+    """Rank every profile of one supplement type against one shared catalog and insight set."""
+    async with sem:
+        products_raw = await _load_products_raw(indexed[0][1], cap=BATCH_FETCH_TIMEOUT_S)
+
+        staged = []
+        prelim: Dict[str, Product] = {}
+        for idx, payload in indexed:
+            products = _candidate_products(products_raw, payload.budget_krw_per_month)
+            features = scoring.value_features(scoring.ProductColumns.from_products(products))
+            for p in _preliminary_top(products, features):
+                prelim.setdefault(insight_key(p), p)
+            staged.append((idx, payload, products, features))
+
+        # one insight lookup for the union of every profile's preliminary top 3
+        insights_map = await get_insights(list(prelim.values()), cap=BATCH_FETCH_TIMEOUT_S)
+
+    ranked_items = [
+        (idx, payload, _final_rank(products, features, insights_map, _profile_for(payload.answers)))
+        for idx, payload, products, features in staged
+    ]
+
+    advice: Dict[int, Optional[str]] = {}
+
+    async def summarize(chunk: List[Tuple[int, RecommendInput, List[RankedProduct]]]) -> None:
+        async with sem:
+            advice.update(await _summarize_batch(chunk))
+
+    await asyncio.gather(
+        *(
+            summarize(ranked_items[i : i + BATCH_SUMMARY_CHUNK])
+            for i in range(0, len(ranked_items), BATCH_SUMMARY_CHUNK)
+        )
+    )
+    return {
+        idx: RecommendResult(ranked=ranked, final_advice_markdown=advice.get(idx))
+        for idx, _, ranked in ranked_items
+    }
+
+
+@app.post("/api/recommend/batch", response_model=BatchRecommendResult)
+async def recommend_batch(payload: BatchRecommendInput) -> BatchRecommendResult:
+    """Recommend for many profiles at once, e.g. nightly precompute jobs.
+
+    Profiles are grouped by normalized supplement type; each group fetches
+    its catalog and insights once and shares them. Gemini summaries are
+    requested for BATCH_SUMMARY_CHUNK profiles per call. At most
+    `concurrency` (default and upper bound BATCH_CONCURRENCY, so a batch
+    cannot fill the upstream queues interactive requests use) groups or
+    summary calls run at once. Results keep the input order.
+    """
+    if len(payload.items) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} items per batch")
+
+    groups: Dict[str, List[Tuple[int, RecommendInput]]] = {}
+    for idx, item in enumerate(payload.items):
+        # client-supplied catalogs cannot be shared with other profiles
+        key = f"#{idx}" if item.products else catalog_key(item.supplement_type)
+        groups.setdefault(key, []).append((idx, item))
+
+    sem = asyncio.Semaphore(max(1, min(payload.concurrency or BATCH_CONCURRENCY, BATCH_CONCURRENCY)))
+    results: Dict[int, RecommendResult] = {}
+    for group_results in await asyncio.gather(*(_recommend_group(g, sem) for g in groups.values())):
+        results.update(group_results)
+    return BatchRecommendResult(results=[results[i] for i in range(len(payload.items))])
+
+
+@app.post("/api/recommend/index", response_model=RecommendIndexResult)
+async def recommend_index(payload: RecommendIndexInput) -> RecommendIndexResult:
+    """Precompute rankings for common supplement types, e.g. from a nightly job.
+
+    Fetches each catalog and the insights every budget bucket's preliminary
+    top 3 needs, then indexes all weight profiles and budget buckets so
+    /api/recommend serves them with a lookup.
+    """
+    if len(payload.supplement_types) > BATCH_MAX_ITEMS:
+        raise HTTPException(status_code=422, detail=f"At most {BATCH_MAX_ITEMS} supplement types per request")
+    if not RECOMMEND_INDEX_ENABLED:
+        raise HTTPException(status_code=409, detail="Recommendation index is disabled (RECOMMEND_INDEX_ENABLED=0)")
+    return RecommendIndexResult(indexed=await precompute_index(payload.supplement_types))
+
+
+@app.get("/api/cache/stats")
+async def cache_stats() -> Dict[str, Any]:
+    """Hit/miss/coalesced counters for in-process caches."""
+    return {
+        "catalog": _catalog_cache.snapshot(),
+        "catalog_store": dict(_catalog_store_stats),
+        "insights": _insight_cache.snapshot(),
+        "llm": get_llm_cache().snapshot(),
+        "supplement_types": _supplement_index.snapshot(),
+        "prefetch": {**_prefetch_stats, "sessions": len(_prefetches)},
+        "recommend_index": _recommend_index.snapshot(),
+    }
+
+
+@app.get("/api/upstream/stats")
+async def upstream_stats() -> Dict[str, Any]:
+    """Breaker and admission state per upstream and product-data repair counts."""
+    return {
+        "perplexity": {**_perplexity_breaker.snapshot(), "admission": _perplexity_limiter.snapshot()},
+        "gemini": {**_gemini_breaker.snapshot(), "admission": _gemini_limiter.snapshot()},
+        "product_coercion": {**_coercion_totals.as_dict(), "recent": list(_coercion_recent)},
+    }
+
+
+def _collect_app_metrics() -> List[Tuple[str, str, str, telemetry.Samples]]:
+    """Scrape-time view of cache, catalog store, breaker and coercion counters."""
+    caches = {"catalog": _catalog_cache, "insights": _insight_cache}
+    families = [
+        (
+            f"supplement_cache_{field}_total",
+            "counter",
+            f"In-process cache {field}",
+            [({"cache": name}, getattr(cache.stats, field)) for name, cache in caches.items()],
+        )
+        for field in ("hits", "misses", "coalesced", "evictions")
+    ]
+    families.append(
+        ("supplement_cache_entries", "gauge", "Live entries per in-process cache", [({"cache": n}, len(c)) for n, c in caches.items()])
+    )
+    families.append(
+        (
+            "supplement_catalog_store_events_total",
+            "counter",
+            "SQLite catalog store hits, stale serves and background refreshes",
+            [({"event": k}, v) for k, v in _catalog_store_stats.items()],
+        )
+    )
+    families.append(
+        (
+            "supplement_llm_cache_events_total",
+            "counter",
+            "LLM response cache hits, disk hits, upstream misses, writes and replay misses",
+            [({"event": k}, v) for k, v in asdict(get_llm_cache().stats).items()],
+        )
+    )
+    families.append(
+        (
+            "supplement_type_resolutions_total",
+            "counter",
+            "Supplement-type canonicalizations by method (alias, fuzzy, passthrough)",
+            [({"method": m}, _supplement_index.stats[m]) for m in ("alias", "fuzzy", "passthrough")],
+        )
+    )
+    families.append(
+        (
+            "supplement_prefetch_events_total",
+            "counter",
+            "Clarify-time prefetches started, reused by recommend, expired, mismatched, failed, evicted, unknown",
+            [({"event": k}, v) for k, v in _prefetch_stats.items()],
+        )
+    )
+    index = _recommend_index.snapshot()
+    families.append(
+        (
+            "supplement_recommend_index_lookups_total",
+            "counter",
+            "Recommendation index lookups by outcome (hit, miss, stale)",
+            [({"outcome": k}, index[k]) for k in ("hits", "misses", "stale")],
+        )
+    )
+    families.append(
+        ("supplement_recommend_index_entries", "gauge", "Precomputed (type, profile, budget bucket) rankings", [({}, index["entries"])])
+    )
+    breakers = (_perplexity_breaker, _gemini_breaker)
+    families.append(
+        (
+            "supplement_breaker_open",
+            "gauge",
+            "1 when the upstream circuit breaker is open or half-open",
+            [({"upstream": b.name}, float(b.state != CircuitBreaker.CLOSED)) for b in breakers],
+        )
+    )
+    families.append(
+        ("supplement_breaker_rejected_total", "counter", "Calls rejected by an open breaker", [({"upstream": b.name}, b.rejected) for b in breakers])
+    )
+    limiters = (_perplexity_limiter, _gemini_limiter)
+    for field, kind, help in (
+        ("in_flight", "gauge", "Upstream calls currently admitted"),
+        ("queue_depth", "gauge", "Callers waiting for upstream admission"),
+        ("admitted", "counter", "Upstream calls admitted"),
+        ("shed", "counter", "Upstream calls shed because the admission queue was full"),
+    ):
+        name = f"supplement_upstream_{field}" + ("_total" if kind == "counter" else "")
+        families.append((name, kind, help, [({"upstream": lim.name}, lim.snapshot()[field]) for lim in limiters]))
+    families.append(
+        (
+            "supplement_product_coercion_total",
+            "counter",
+            "Raw products by normalization outcome",
+            [({"outcome": k}, getattr(_coercion_totals, k)) for k in ("clean", "coerced", "dropped")],
+        )
+    )
+    return families
+
+
+telemetry.REGISTRY.add_collector(_collect_app_metrics)
+
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics() -> PlainTextResponse:
+    """Prometheus text exposition of request, stage, upstream, fallback and cache metrics."""
+    return PlainTextResponse(telemetry.REGISTRY.render(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/healthz")
 async def healthz():
+    """Liveness: the process is up and serving, warm or not."""
     return {"ok": True}
 
+
+@app.get("/readyz")
+async def readyz() -> JSONResponse:
+    """Readiness: 200 once settings are validated and upstream clients are warm, else 503.
+
+    A failed warmup is retried by the next probe.
+    """
+    global _warmup
+    if not _ready and _settings is not None and (_warmup is None or _warmup.done()):
+        _warmup = _spawn_background(_warm_up())
+    checks = {
+        "settings": _settings is not None,
+        "perplexity": _perplexity is not None,
+        "gemini": _gemini is not None,
+        "catalog_store": _catalog_store is not None,
+        "warm": _ready,
+    }
+    ready = all(checks.values())
+    return JSONResponse({"ready": ready, **checks}, status_code=200 if ready else 503)
+
@@ -0,0 +1,89 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List, Optional
+
+from pydantic import BaseModel, Field
+
+
+class ClarifyInput(BaseModel):
+    supplement_type: str = Field(..., description="예: 오메가3, 종합비타민 등")
+    budget_krw_per_month: Optional[int] = Field(None, description="월 예산, KRW")
+    target_and_concerns: str = Field(..., description="복용 대상 및 핵심 고민")
+
+
+class ClarifyQuestion(BaseModel):
+    id: str
+    question: str
+    kind: str = Field("text", description="text | single_choice")
+    options: Optional[List[str]] = None
+
+
+class ClarifyResponse(BaseModel):
+    questions: List[ClarifyQuestion]
+    prefetch_token: Optional[str] = Field(None, description="/api/recommend에 전달하면 미리 가져온 제품/인사이트를 재사용")
+
+
+class RecommendInput(ClarifyInput):
+    answers: Dict[str, Any] = Field(default_factory=dict)
+    products: Optional[List[Product]] = None
+    prefetch_token: Optional[str] = None
+
+
+class Product(BaseModel):
+    product_name: str
+    brand: Optional[str] = None
+    # Generic ingredient fields so we can support any supplement type
+    key_ingredient: Optional[str] = None
+    ingredient_amount: Optional[float] = None  # numeric value only
+    ingredient_unit: Optional[str] = None      # mg | mcg | IU | CFU | etc
+    price_per_month_krw: Optional[int] = None
+    capsule_type: Optional[str] = None
+    capsule_count: Optional[int] = None
+    daily_dose: Optional[str] = None
+    purchase_url: Optional[str] = None
+
+
+class ProductInsight(BaseModel):
+    product_name: str
+    pros: List[str] = Field(default_factory=list)
+    cons: List[str] = Field(default_factory=list)
+    brand_trust_score_0to100: Optional[int] = None
+    review_sentiment_0to100: Optional[int] = None
+    safety_flags: List[str] = Field(default_factory=list)
+    notes: Optional[str] = None
+    brand_trust_summary_kr: Optional[str] = None
+    review_summary_kr: Optional[str] = None
+
+
+class RankedProduct(BaseModel):
+    rank: int
+    product: Product
+    insight: Optional[ProductInsight]
+    score: float
+    summary: Optional[str] = None
+
+
+class RecommendResult(BaseModel):
+    ranked: List[RankedProduct]
+    final_advice_markdown: Optional[str] = None
+
+
+class SearchResponse(BaseModel):
+    products: List[Product]
+
+
+class BatchRecommendInput(BaseModel):
+    items: List[RecommendInput]
+    concurrency: Optional[int] = Field(None, description="동시 처리 그룹 수 상한 (BATCH_CONCURRENCY 이하로 제한)")
+
+
+class BatchRecommendResult(BaseModel):
+    results: List[RecommendResult]
+
+
+class RecommendIndexInput(BaseModel):
+    supplement_types: List[str] = Field(..., description="미리 계산할 영양제 종류")
+
+
+class RecommendIndexResult(BaseModel):
+    indexed: Dict[str, int]
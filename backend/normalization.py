@@ -0,0 +1,209 @@
+from __future__ import annotations
+
+import math
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pydantic import TypeAdapter, ValidationError
+
+from models import Product
+
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# "1만 8천원", "1만 5000원", "2만원", "1.5만"
+_MAN = re.compile(r"(\d+(?:\.\d+)?)만(?:(\d+)천|(\d+))?")
+_AMOUNT_WITH_UNIT = re.compile(r"^\s*([\d.,]+)\s*([A-Za-zµμ가-힣]+)\s*$")
+_NULLS = {"", "null", "none", "n/a", "na", "-", "unknown", "정보없음", "미상"}
+_UNITS = {
+    "mg": "mg",
+    "밀리그램": "mg",
+    "g": "g",
+    "mcg": "mcg",
+    "µg": "mcg",
+    "μg": "mcg",
+    "ug": "mcg",
+    "iu": "IU",
+    "cfu": "CFU",
+}
+
+
+@dataclass
+class CoercionStats:
+    """How much repair a batch of raw product dicts needed."""
+
+    total: int = 0
+    clean: int = 0  # no field needed coercion
+    coerced: int = 0  # at least one field was coerced
+    dropped: int = 0  # not a mapping, unusable
+    fields: Counter = field(default_factory=Counter)  # field name -> items coerced
+    per_item: List[List[str]] = field(default_factory=list)  # coerced fields per kept item
+
+    def merge(self, other: "CoercionStats") -> None:
+        """Add another batch's counts (per-item detail is not kept)."""
+        self.total += other.total
+        self.clean += other.clean
+        self.coerced += other.coerced
+        self.dropped += other.dropped
+        self.fields.update(other.fields)
+
+    def as_dict(self) -> Dict[str, Any]:
+        return {
+            "total": self.total,
+            "clean": self.clean,
+            "coerced": self.coerced,
+            "dropped": self.dropped,
+            "fields": dict(self.fields),
+        }
+
+
+def _is_null(value: Any) -> bool:
+    return value is None or (isinstance(value, str) and value.strip().lower() in _NULLS)
+
+
+def parse_krw(value: Any) -> Optional[int]:
+    """Parse Korean price text: 18000, "18,000원", "₩18,000", "1만 8천원", "15,000~20,000원"."""
+    if _is_null(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        # stdlib json accepts NaN / Infinity
+        return int(round(value)) if math.isfinite(value) else None
+    s = str(value).replace(",", "").replace("_", "").replace(" ", "")
+    m = _MAN.search(s)
+    if m:
+        rest = int(m.group(2)) * 1000 if m.group(2) else int(m.group(3) or 0)
+        return int(round(float(m.group(1)) * 10000 + rest))
+    m = _NUMBER.search(s)
+    return int(round(float(m.group(0)))) if m else None
+
+
+def parse_number(value: Any) -> Optional[float]:
+    """Parse the leading number of "1,000mg", "1000", "700.5 mg"."""
+    if _is_null(value) or isinstance(value, bool):
+        return None
+    if isinstance(value, (int, float)):
+        return float(value) if math.isfinite(value) else None
+    m = _NUMBER.search(str(value).replace(",", ""))
+    return float(m.group(0)) if m else None
+
+
+def normalize_unit(value: Any) -> Optional[str]:
+    if _is_null(value):
+        return None
+    s = str(value).strip()
+    return _UNITS.get(s.lower(), s)
+
+
+_NONE = type(None)
+_INT_OR_NONE = (int, _NONE)  # `type(v) in ...` rejects bools on purpose
+_NUM_OR_NONE = (int, float, _NONE)
+
+
+def _looks_clean(item: Dict[str, Any]) -> bool:
+    """Cheap check of the fields LLMs usually get wrong; the TypeAdapter checks the rest."""
+    amount = item.get("ingredient_amount")
+    return (
+        type(item.get("product_name")) is str
+        and type(item.get("price_per_month_krw")) in _INT_OR_NONE
+        and type(amount) in _NUM_OR_NONE
+        and (type(amount) is not float or math.isfinite(amount))
+        and type(item.get("capsule_count")) in _INT_OR_NONE
+        and "epa_mg" not in item
+    )
+
+
+def _text(value: Any) -> Optional[str]:
+    if _is_null(value) or isinstance(value, (dict, list)):
+        return None
+    return str(value).strip()
+
+
+def _coerce(item: Dict[str, Any], notes: List[str]) -> Dict[str, Any]:
+    """Repair one noisy product dict into Product-shaped values, noting coerced fields."""
+    out: Dict[str, Any] = {}
+
+    name = item.get("product_name")
+    if _is_null(name):
+        name = item.get("name")
+    out["product_name"] = _text(name) or "unknown"
+
+    for key in ("brand", "key_ingredient", "capsule_type", "daily_dose", "purchase_url"):
+        out[key] = _text(item.get(key))
+
+    amount_raw = item.get("ingredient_amount")
+    unit = normalize_unit(item.get("ingredient_unit"))
+    if isinstance(amount_raw, str) and unit is None:
+        # "1,000mg" -> amount 1000, unit mg
+        m = _AMOUNT_WITH_UNIT.match(amount_raw)
+        if m:
+            unit = normalize_unit(m.group(2))
+    amount = parse_number(amount_raw)
+    if amount is None:
+        # omega-3 shaped answers: EPA + DHA as the key amount
+        epa = parse_number(item.get("epa_mg"))
+        dha = parse_number(item.get("dha_mg"))
+        if epa is not None or dha is not None:
+            amount = (epa or 0.0) + (dha or 0.0)
+            unit = unit or "mg"
+    out["ingredient_amount"] = amount
+    out["ingredient_unit"] = unit
+
+    out["price_per_month_krw"] = parse_krw(item.get("price_per_month_krw"))
+    count = parse_number(item.get("capsule_count"))
+    out["capsule_count"] = int(count) if count is not None else None
+
+    for key, value in out.items():
+        if item.get(key) != value:
+            notes.append(key)
+    return out
+
+
+_PRODUCT_LIST = TypeAdapter(List[Product])
+
+
+def normalize_products(items: Iterable[Any]) -> Tuple[List[Product], CoercionStats]:
+    """Validate and coerce a whole list of raw product dicts in one pass.
+
+    Every mapping becomes a Product; non-mappings are dropped. Items that
+    already look right go straight through; the rest are repaired field by
+    field: prices like "18,000원" or "1만 8천원", amounts like "1,000mg",
+    `name` instead of `product_name`, and omega-3 style `epa_mg`/`dha_mg`
+    folded into `ingredient_amount`. The whole list is then validated by a
+    single TypeAdapter call; the rare item the cheap pre-check missed is
+    located from the error and repaired before one more call.
+    """
+    stats = CoercionStats()
+    prepared: List[Dict[str, Any]] = []
+    originals: List[Dict[str, Any]] = []
+    for item in items:
+        stats.total += 1
+        if not isinstance(item, dict):
+            stats.dropped += 1
+            continue
+        originals.append(item)
+        if _looks_clean(item):
+            prepared.append(item)
+            stats.per_item.append([])
+        else:
+            notes: List[str] = []
+            prepared.append(_coerce(item, notes))
+            stats.per_item.append(notes)
+
+    try:
+        products = _PRODUCT_LIST.validate_python(prepared)
+    except ValidationError as e:
+        bad = {err["loc"][0] for err in e.errors() if err["loc"]}
+        for i in bad:
+            notes = []
+            prepared[i] = _coerce(originals[i], notes)
+            stats.per_item[i] = notes
+        products = _PRODUCT_LIST.validate_python(prepared)
+
+    for notes in stats.per_item:
+        if notes:
+            stats.coerced += 1
+            stats.fields.update(notes)
+        else:
+            stats.clean += 1
+    return products, stats
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import bisect
+import time
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from models import Product, ProductInsight, RankedProduct
+
+# (weight profile name, budget floor) within one supplement type
+BucketKey = Tuple[str, Optional[int]]
+
+
+def budget_floor(prices: Sequence[int], budget: Optional[int]) -> Optional[int]:
+    """Budget bucket: the highest catalog price within `budget`, 0 below all prices, None without a budget.
+
+    Every budget between two consecutive catalog prices filters the catalog
+    identically, so a ranking per floor is exact for the whole bucket.
+    """
+    if not budget:
+        return None
+    i = bisect.bisect_right(prices, budget)
+    return prices[i - 1] if i else 0
+
+
+@dataclass
+class IndexEntry:
+    ranked: List[RankedProduct]  # final top-N, without summaries
+    products: List[Product]  # budget-filtered candidates
+    top3: List[Product]  # preliminary top 3 the insights were looked up for
+    insights: Dict[str, ProductInsight]  # by insight key, the cached objects used
+
+
+@dataclass
+class _TypeIndex:
+    catalog: Any  # the cached catalog object the entries were built from
+    products: List[Product]  # that catalog normalized
+    prices: List[int]  # sorted distinct catalog prices
+    entries: Dict[BucketKey, IndexEntry]
+    depends_on: Set[str]  # insight keys used by entries or missing for skipped buckets
+    built_at: float
+
+
+class RecommendIndex:
+    """Precomputed rankings keyed by (canonical supplement type, weight profile, budget bucket).
+
+    Entries are built from cached catalog and insight data only and keep a
+    reference to the exact cached objects they used. A lookup checks them
+    against the live caches (`catalog_source`, `insight_source`), so a
+    refreshed catalog or insight is never served stale; it is a miss until
+    the type is rebuilt. `types_depending_on` tells which types to rebuild
+    when insights change; `rebuild_due` throttles rebuilds asked for by
+    lookup misses, which recur on every request while an insight is missing.
+    """
+
+    def __init__(
+        self,
+        catalog_source: Callable[[str], Any],
+        insight_source: Callable[[str], Optional[ProductInsight]],
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self._catalog_source = catalog_source
+        self._insight_source = insight_source
+        self._clock = clock
+        self._types: Dict[str, _TypeIndex] = {}
+        self._deps: Dict[str, Set[str]] = {}  # insight key -> supplement keys
+        self.stats: Counter = Counter()
+
+    def __len__(self) -> int:
+        return sum(len(t.entries) for t in self._types.values())
+
+    def lookup(
+        self, key: str, profile: str, budget: Optional[int], products: Optional[List[Product]] = None
+    ) -> Optional[IndexEntry]:
+        """Entry for the bucket, if current; a client-supplied `products` must equal the indexed catalog."""
+        index = self._types.get(key)
+        if index is None:
+            self.stats["misses"] += 1
+            return None
+        if self._catalog_source(key) is not index.catalog:
+            self.stats["stale"] += 1
+            self.drop(key)
+            return None
+        if products is not None and products != index.products:
+            self.stats["misses"] += 1
+            return None
+        entry = index.entries.get((profile, budget_floor(index.prices, budget)))
+        if entry is None:
+            self.stats["misses"] += 1
+            return None
+        if any(self._insight_source(k) is not ins for k, ins in entry.insights.items()):
+            self.stats["stale"] += 1
+            return None
+        self.stats["hits"] += 1
+        return entry
+
+    def set_type(
+        self,
+        key: str,
+        catalog: Any,
+        products: List[Product],
+        prices: List[int],
+        entries: Dict[BucketKey, IndexEntry],
+        missing: Iterable[str] = (),
+    ) -> None:
+        """Replace every entry of one supplement type."""
+        self.drop(key)
+        depends_on = {k for e in entries.values() for k in e.insights} | set(missing)
+        self._types[key] = _TypeIndex(catalog, products, prices, entries, depends_on, self._clock())
+        for k in depends_on:
+            self._deps.setdefault(k, set()).add(key)
+        self.stats["builds"] += 1
+        # types whose catalog left the cache can never hit again
+        for other in [k for k, t in self._types.items() if self._catalog_source(k) is not t.catalog]:
+            self.drop(other)
+
+    def drop(self, key: str) -> None:
+        index = self._types.pop(key, None)
+        if index is None:
+            return
+        for k in index.depends_on:
+            keys = self._deps.get(k)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._deps[k]
+
+    def rebuild_due(self, key: str, min_interval_s: float) -> bool:
+        """Whether `key` is unindexed or was built at least `min_interval_s` ago."""
+        index = self._types.get(key)
+        return index is None or self._clock() - index.built_at >= min_interval_s
+
+    def types_depending_on(self, insight_keys: Iterable[str]) -> Set[str]:
+        return {key for k in insight_keys for key in self._deps.get(k, ())}
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "types": len(self._types),
+            "entries": len(self),
+            "hits": self.stats["hits"],
+            "misses": self.stats["misses"],
+            "stale": self.stats["stale"],
+            "builds": self.stats["builds"],
+        }
@@ -0,0 +1,329 @@
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Awaitable, Callable, Deque, Dict, List, Optional, TypeVar
+
+T = TypeVar("T")
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The per-request time budget ran out before a stage finished."""
+
+
+class BudgetExhausted(DeadlineExceeded):
+    """A request budget shared with earlier stages cut the call shorter than its own cap.
+
+    Says nothing about the upstream being slow, so circuit breakers do not
+    count it as a failure.
+    """
+
+
+class CircuitOpenError(RuntimeError):
+    """The upstream's circuit breaker is open; the call was not attempted."""
+
+
+class LoadShedError(RuntimeError):
+    """The upstream's admission queue is full; the call was shed without waiting."""
+
+
+class Deadline:
+    """Absolute per-request time budget passed down through pipeline stages.
+
+    Stages ask for `timeout(cap)` to bound their own wait by both a per-stage
+    cap and whatever is left of the request budget. A `per_call` deadline is
+    created for a single upstream call (admission wait included), so running
+    out of it is the upstream's doing, like overrunning a stage cap.
+    """
+
+    def __init__(
+        self, budget_s: float, clock: Callable[[], float] = time.monotonic, *, per_call: bool = False
+    ) -> None:
+        self._clock = clock
+        self.expires_at = clock() + budget_s
+        self.per_call = per_call
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires_at - self._clock())
+
+    @property
+    def expired(self) -> bool:
+        return self.remaining() <= 0.0
+
+    def timeout(self, cap: Optional[float] = None) -> float:
+        remaining = self.remaining()
+        return remaining if cap is None else min(remaining, cap)
+
+    async def run(self, aw: Awaitable[T], cap: Optional[float] = None) -> T:
+        """Await `aw` within the remaining budget, raising DeadlineExceeded on overrun.
+
+        The overrun is BudgetExhausted only when a shared budget was already
+        shorter than `cap` at call start; without a cap, with a binding cap
+        or on a `per_call` deadline it is the call's own timeout.
+        """
+        remaining = self.remaining()
+        timeout = self.timeout(cap)
+        cut_short = not self.per_call and cap is not None and remaining < cap
+        error = BudgetExhausted if cut_short else DeadlineExceeded
+        if timeout <= 0:
+            if asyncio.iscoroutine(aw):
+                aw.close()
+            raise error("deadline already expired")
+        try:
+            return await asyncio.wait_for(aw, timeout)
+        except asyncio.TimeoutError as e:
+            raise error(f"stage exceeded {timeout:.2f}s") from e
+
+
+async def within(deadline: Optional[Deadline], aw: Awaitable[T], cap: Optional[float] = None) -> T:
+    """`deadline.run` that tolerates a missing deadline (only the cap applies)."""
+    if deadline is not None:
+        return await deadline.run(aw, cap)
+    if cap is None:
+        return await aw
+    try:
+        return await asyncio.wait_for(aw, cap)
+    except asyncio.TimeoutError as e:
+        raise DeadlineExceeded(f"stage exceeded {cap:.2f}s") from e
+
+
+class CircuitBreaker:
+    """Error-rate circuit breaker for one upstream.
+
+    Tracks the outcome of the last `window` calls. Once at least `min_calls`
+    are recorded and the failure ratio reaches `failure_threshold`, the
+    breaker opens and `before_call` raises CircuitOpenError for
+    `cooldown_s`. After that a single probe call is let through (half-open);
+    its outcome closes or re-opens the breaker.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(
+        self,
+        name: str,
+        failure_threshold: float = 0.5,
+        window: int = 20,
+        min_calls: int = 5,
+        cooldown_s: float = 30.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.cooldown_s = cooldown_s
+        self._clock = clock
+        self._outcomes: Deque[bool] = deque(maxlen=window)
+        self._opened_at = 0.0
+        self._probe_in_flight = False
+        self.state = self.CLOSED
+        self.rejected = 0
+
+    def before_call(self) -> None:
+        if self.state == self.OPEN:
+            if self._clock() - self._opened_at < self.cooldown_s:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit open")
+            self.state = self.HALF_OPEN
+        if self.state == self.HALF_OPEN:
+            if self._probe_in_flight:
+                self.rejected += 1
+                raise CircuitOpenError(f"{self.name} circuit half-open, probe in flight")
+            self._probe_in_flight = True
+
+    def record_success(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._outcomes.clear()
+            self.state = self.CLOSED
+            self._probe_in_flight = False
+        self._outcomes.append(True)
+
+    def record_failure(self) -> None:
+        if self.state == self.HALF_OPEN:
+            self._trip()
+            return
+        self._outcomes.append(False)
+        failures = self._outcomes.count(False)
+        if len(self._outcomes) >= self.min_calls and failures / len(self._outcomes) >= self.failure_threshold:
+            self._trip()
+
+    def release(self) -> None:
+        """Forget a call that was abandoned by its caller (e.g. cancelled)."""
+        if self.state == self.HALF_OPEN:
+            self._probe_in_flight = False
+
+    def _trip(self) -> None:
+        self.state = self.OPEN
+        self._opened_at = self._clock()
+        self._probe_in_flight = False
+
+    async def call(self, factory: Callable[[], Awaitable[T]]) -> T:
+        self.before_call()
+        try:
+            result = await factory()
+        except (asyncio.CancelledError, BudgetExhausted):
+            # caller gave up or ran out of time; says nothing about upstream health
+            self.release()
+            raise
+        except Exception:
+            self.record_failure()
+            raise
+        self.record_success()
+        return result
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "state": self.state,
+            "recent_calls": len(self._outcomes),
+            "recent_failures": self._outcomes.count(False),
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionLimiter:
+    """Bounds outbound calls to one upstream: concurrency, call rate and queue.
+
+    Up to `max_concurrency` calls run at once and, when `rate_per_s` > 0, a
+    token bucket (`burst` deep) caps how fast they start. Callers beyond
+    that wait in a FIFO queue of at most `max_queue`; when it is full,
+    `acquire` raises LoadShedError at once so the caller can degrade
+    instead of piling up behind a saturated upstream.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int = 16,
+        max_queue: int = 64,
+        rate_per_s: float = 0.0,
+        burst: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.rate_per_s = rate_per_s
+        self.burst = burst if burst is not None else max(1.0, rate_per_s)
+        self._clock = clock
+        self._tokens = self.burst
+        self._refilled_at = clock()
+        self._in_flight = 0
+        self._waiters: Deque["asyncio.Future[None]"] = deque()
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self.admitted = 0
+        self.queued = 0
+        self.shed = 0
+
+    def _take_token(self) -> bool:
+        if self.rate_per_s <= 0:
+            return True
+        now = self._clock()
+        self._tokens = min(self.burst, self._tokens + (now - self._refilled_at) * self.rate_per_s)
+        self._refilled_at = now
+        if self._tokens < 1.0:
+            return False
+        self._tokens -= 1.0
+        return True
+
+    def _wake(self) -> None:
+        self._timer = None
+        while self._waiters and self._in_flight < self.max_concurrency:
+            if not self._take_token():
+                wait = (1.0 - self._tokens) / self.rate_per_s
+                self._timer = asyncio.get_running_loop().call_later(wait, self._wake)
+                return
+            self._in_flight += 1
+            self.admitted += 1
+            self._waiters.popleft().set_result(None)
+
+    async def acquire(self) -> None:
+        if not self._waiters and self._in_flight < self.max_concurrency and self._take_token():
+            self._in_flight += 1
+            self.admitted += 1
+            return
+        if len(self._waiters) >= self.max_queue:
+            self.shed += 1
+            raise LoadShedError(f"{self.name} admission queue full")
+        waiter: "asyncio.Future[None]" = asyncio.get_running_loop().create_future()
+        self._waiters.append(waiter)
+        self.queued += 1
+        if self._timer is None:
+            self._wake()
+        try:
+            await waiter
+        except BaseException:
+            if waiter.done() and not waiter.cancelled():
+                # admitted and cancelled in the same tick: hand the slot on
+                self.release()
+            else:
+                self._waiters.remove(waiter)
+            raise
+
+    def release(self) -> None:
+        self._in_flight -= 1
+        if self._timer is None:
+            self._wake()
+
+    @asynccontextmanager
+    async def slot(self, deadline: Optional[Deadline] = None) -> AsyncIterator[None]:
+        """Hold one admission for the block; queueing counts against `deadline`."""
+        await within(deadline, self.acquire())
+        try:
+            yield
+        finally:
+            self.release()
+
+    def snapshot(self) -> Dict[str, Any]:
+        return {
+            "in_flight": self._in_flight,
+            "queue_depth": len(self._waiters),
+            "max_concurrency": self.max_concurrency,
+            "max_queue": self.max_queue,
+            "rate_per_s": self.rate_per_s,
+            "admitted": self.admitted,
+            "queued": self.queued,
+            "shed": self.shed,
+        }
+
+
+async def hedged(factory: Callable[[], Awaitable[T]], delay_s: float, max_attempts: int = 2) -> T:
+    """Run `factory()` and start a backup attempt if it is still pending after `delay_s`.
+
+    The first attempt to succeed wins and the rest are cancelled. A failed
+    attempt immediately starts the next one, if any remain. When every
+    attempt fails, the last error is raised.
+    """
+    pending: List["asyncio.Task[T]"] = []
+    last_error: Optional[BaseException] = None
+    attempts = 0
+    try:
+        while True:
+            if attempts < max_attempts and (not pending or last_error is not None):
+                pending.append(asyncio.ensure_future(factory()))
+                attempts += 1
+                last_error = None
+            if not pending:
+                assert last_error is not None
+                raise last_error
+            timeout = delay_s if attempts < max_attempts else None
+            done, _ = await asyncio.wait(pending, timeout=timeout, return_when=asyncio.FIRST_COMPLETED)
+            if not done:
+                # primary is slow: hedge with another attempt
+                pending.append(asyncio.ensure_future(factory()))
+                attempts += 1
+                continue
+            for task in done:
+                pending.remove(task)
+                if task.exception() is None:
+                    return task.result()
+                last_error = task.exception()
+            if not pending and attempts >= max_attempts:
+                assert last_error is not None
+                raise last_error
+    finally:
+        for task in pending:
+            task.cancel()
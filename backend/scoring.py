@@ -0,0 +1,183 @@
+from __future__ import annotations
+
+import json
+from dataclasses import dataclass
+from typing import Any, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+from models import Product, ProductInsight
+
+
+@dataclass(frozen=True)
+class WeightProfile:
+    """Final-score weights for value, brand trust and review sentiment.
+
+    `keywords` are matched against `answers["preference"]`; the first
+    profile whose keyword appears wins, otherwise the default profile is used.
+    """
+
+    name: str
+    value: float
+    trust: float
+    reviews: float
+    keywords: Tuple[str, ...] = ()
+
+
+DEFAULT_PROFILES: Tuple[WeightProfile, ...] = (
+    WeightProfile("value", 0.5, 0.3, 0.2, ("가성비", "value")),
+    WeightProfile("trust", 0.25, 0.5, 0.25, ("신뢰", "trust", "브랜드")),
+    WeightProfile("balanced", 0.34, 0.33, 0.33),
+)
+
+
+def load_profiles(raw: Optional[str]) -> Tuple[WeightProfile, ...]:
+    """Parse profiles from JSON, e.g. the SCORING_WEIGHT_PROFILES env var.
+
+    Format: `[{"name": "value", "value": 0.5, "trust": 0.3, "reviews": 0.2,
+    "keywords": ["가성비"]}, ...]`. The last profile without keywords is the
+    default. Empty input returns DEFAULT_PROFILES.
+    """
+    if not raw:
+        return DEFAULT_PROFILES
+    items = json.loads(raw)
+    profiles = tuple(
+        WeightProfile(
+            name=str(item["name"]),
+            value=float(item["value"]),
+            trust=float(item["trust"]),
+            reviews=float(item["reviews"]),
+            keywords=tuple(str(k).lower() for k in item.get("keywords", ())),
+        )
+        for item in items
+    )
+    if not any(not p.keywords for p in profiles):
+        raise ValueError("SCORING_WEIGHT_PROFILES needs one profile without keywords as the default")
+    return profiles
+
+
+def resolve_profile(answers: Mapping[str, Any], profiles: Sequence[WeightProfile] = DEFAULT_PROFILES) -> WeightProfile:
+    pref = str(answers.get("preference", "balanced")).lower()
+    default = profiles[-1]
+    for profile in profiles:
+        if not profile.keywords:
+            default = profile
+        elif any(k in pref for k in profile.keywords):
+            return profile
+    return default
+
+
+@dataclass
+class ProductColumns:
+    """Columnar view of a candidate set; NaN marks a missing value."""
+
+    potency: np.ndarray
+    price: np.ndarray
+
+    @classmethod
+    def from_products(cls, products: Sequence[Product]) -> "ProductColumns":
+        n = len(products)
+        potency = np.fromiter((p.ingredient_amount or 0.0 for p in products), dtype=np.float64, count=n)
+        price = np.fromiter(
+            (float(p.price_per_month_krw) if p.price_per_month_krw else np.nan for p in products),
+            dtype=np.float64,
+            count=n,
+        )
+        return cls(potency=potency, price=price)
+
+    def __len__(self) -> int:
+        return len(self.potency)
+
+
+@dataclass
+class ValueFeatures:
+    potency: np.ndarray  # normalized, higher is better
+    price: np.ndarray  # normalized and inverted, cheaper is better; 0.5 when unknown
+
+
+def normalize(values: np.ndarray) -> np.ndarray:
+    """Min-max scale to [0, 1] ignoring NaN; missing values map to 0.
+
+    When every present value is the same they all map to 1.
+    """
+    present = ~np.isnan(values)
+    if not present.any():
+        return np.zeros_like(values)
+    min_v = values[present].min()
+    max_v = values[present].max()
+    # same tolerance as math.isclose defaults
+    if abs(max_v - min_v) <= 1e-9 * max(abs(min_v), abs(max_v)):
+        return present.astype(np.float64)
+    return np.where(present, (values - min_v) / (max_v - min_v), 0.0)
+
+
+def value_features(cols: ProductColumns) -> ValueFeatures:
+    potency = normalize(cols.potency)
+    missing_price = np.isnan(cols.price)
+    # unknown prices take part in scaling as 0 won, then score a neutral 0.5
+    price_raw = normalize(np.where(missing_price, 0.0, cols.price))
+    price = np.where(missing_price, 0.5, 1.0 - price_raw)
+    return ValueFeatures(potency=potency, price=price)
+
+
+def insight_columns(
+    products: Sequence[Product], insights_map: Mapping[str, ProductInsight]
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Return (brand trust, review sentiment) columns aligned with `products`."""
+    trust = np.full(len(products), np.nan)
+    reviews = np.full(len(products), np.nan)
+    for i, p in enumerate(products):
+        ins = insights_map.get(p.product_name)
+        if ins is None:
+            continue
+        if ins.brand_trust_score_0to100 is not None:
+            trust[i] = ins.brand_trust_score_0to100
+        if ins.review_sentiment_0to100 is not None:
+            reviews[i] = ins.review_sentiment_0to100
+    return trust, reviews
+
+
+def preliminary_scores(features: ValueFeatures) -> np.ndarray:
+    return 0.7 * features.potency + 0.3 * features.price
+
+
+def final_scores(
+    features: ValueFeatures, trust: np.ndarray, reviews: np.ndarray, profile: WeightProfile
+) -> np.ndarray:
+    return (
+        profile.value * (0.6 * features.price + 0.4 * features.potency)
+        + profile.trust * normalize(trust)
+        + profile.reviews * normalize(reviews)
+    )
+
+
+def top_k(scores: np.ndarray, k: int) -> np.ndarray:
+    """Indices of the k highest scores, ties broken by original position.
+
+    Matches `sorted(range(n), key=scores.__getitem__, reverse=True)[:k]` but
+    runs in O(n) for large n via a partition before the final small sort.
+    """
+    n = len(scores)
+    k = min(k, n)
+    if k <= 0:
+        return np.empty(0, dtype=np.intp)
+    if k == n or n <= 64:
+        return np.argsort(-scores, kind="stable")[:k]
+    kth = np.partition(scores, n - k)[n - k]
+    candidates = np.flatnonzero(scores >= kth)
+    return candidates[np.argsort(-scores[candidates], kind="stable")][:k]
+
+
+def rank(
+    products: Sequence[Product],
+    insights_map: Mapping[str, ProductInsight],
+    profile: WeightProfile,
+    k: int = 3,
+    features: Optional[ValueFeatures] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """Score all candidates in one vectorized pass; return (top-k indices, all scores)."""
+    if features is None:
+        features = value_features(ProductColumns.from_products(products))
+    trust, reviews = insight_columns(products, insights_map)
+    scores = final_scores(features, trust, reviews, profile)
+    return top_k(scores, k), scores
@@ -0,0 +1,117 @@
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass
+from typing import Callable, List, Mapping, Optional, Sequence, TypeVar
+
+from llm import PERPLEXITY_URL
+from llm_cache import MODES as LLM_CACHE_MODES
+from local_summary import MODES as SUMMARY_MODES
+
+
+T = TypeVar("T")
+
+
+class ConfigError(RuntimeError):
+    """The environment does not describe a runnable app; lists every problem found."""
+
+
+class EnvKnobs:
+    """Typed reads of module-level tuning knobs that never raise.
+
+    A malformed value falls back to its default and is recorded in
+    `problems`, which Settings.from_env reports with everything else when
+    the app starts; importing a module that reads knobs stays safe.
+    """
+
+    def __init__(self, env: Mapping[str, str] = os.environ) -> None:
+        self.env = env
+        self.problems: List[str] = []
+
+    def int(self, name: str, default: int) -> int:
+        return self._number(name, int, default)
+
+    def float(self, name: str, default: float) -> float:
+        return self._number(name, float, default)
+
+    def choice(self, name: str, default: str, choices: Sequence[str]) -> str:
+        raw = (self.env.get(name) or default).upper()
+        if raw not in choices:
+            self.problems.append(f"{name} must be one of {', '.join(choices)}, got {raw!r}")
+            return default
+        return raw
+
+    def _number(self, name: str, cast: Callable[[str], T], default: T) -> T:
+        raw = self.env.get(name)
+        if raw is None or raw.strip() == "":
+            return cast(str(default))
+        try:
+            return cast(raw)
+        except ValueError:
+            self.problems.append(f"{name} must be {'an integer' if cast is int else 'a number'}, got {raw!r}")
+            return cast(str(default))
+
+    def parse(self, name: str, parser: Callable[[Optional[str]], T]) -> T:
+        """`parser(raw)` for structured knobs; `parser(None)` must return the default."""
+        try:
+            return parser(self.env.get(name))
+        except Exception as e:
+            self.problems.append(f"{name} is invalid: {e}")
+            return parser(None)
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Credentials and upstream wiring, validated once when the app starts.
+
+    Tuning knobs (timeouts, cache sizes, limits) stay module constants in
+    main.py; this covers what must be present and consistent before any
+    request can be served.
+    """
+
+    google_api_key: str
+    perplexity_api_key: str
+    # upstream endpoints; override to point at local stand-ins, e.g. for
+    # benchmarks/load_test.py
+    perplexity_api_url: str = PERPLEXITY_URL
+    gemini_base_url: Optional[str] = None
+    llm_cache_mode: str = "cache"
+    llm_cache_db_path: str = ""
+    # how step 6 summaries are produced, see local_summary.MODES
+    summary_mode: str = "fallback"
+
+    @classmethod
+    def from_env(cls, env: Mapping[str, str] = os.environ, problems: Sequence[str] = ()) -> "Settings":
+        """Read and validate settings, raising ConfigError with all problems at once.
+
+        `problems` adds ones found earlier, e.g. EnvKnobs.problems.
+        """
+        problems = list(problems)
+        for name in ("GOOGLE_API_KEY", "PERPLEXITY_API_KEY"):
+            if not env.get(name):
+                problems.append(f"{name} not found in environment")
+        perplexity_api_url = env.get("PERPLEXITY_API_URL") or PERPLEXITY_URL
+        gemini_base_url = env.get("GEMINI_BASE_URL") or None
+        for name, url in (("PERPLEXITY_API_URL", perplexity_api_url), ("GEMINI_BASE_URL", gemini_base_url)):
+            if url is not None and not url.startswith(("http://", "https://")):
+                problems.append(f"{name} must be an http(s) URL, got {url!r}")
+        llm_cache_mode = env.get("LLM_CACHE_MODE", "cache").lower()
+        llm_cache_db_path = env.get("LLM_CACHE_DB_PATH", "")
+        if llm_cache_mode not in LLM_CACHE_MODES:
+            problems.append(f"LLM_CACHE_MODE must be one of {', '.join(LLM_CACHE_MODES)}, got {llm_cache_mode!r}")
+        elif llm_cache_mode in ("record", "replay") and not llm_cache_db_path:
+            problems.append(f"LLM_CACHE_MODE={llm_cache_mode} needs LLM_CACHE_DB_PATH")
+        summary_mode = env.get("SUMMARY_MODE", "fallback").lower()
+        if summary_mode not in SUMMARY_MODES:
+            problems.append(f"SUMMARY_MODE must be one of {', '.join(SUMMARY_MODES)}, got {summary_mode!r}")
+        if problems:
+            raise ConfigError("invalid configuration: " + "; ".join(problems))
+        return cls(
+            google_api_key=env["GOOGLE_API_KEY"],
+            perplexity_api_key=env["PERPLEXITY_API_KEY"],
+            perplexity_api_url=perplexity_api_url,
+            gemini_base_url=gemini_base_url,
+            llm_cache_mode=llm_cache_mode,
+            llm_cache_db_path=llm_cache_db_path,
+            summary_mode=summary_mode,
+        )
@@ -0,0 +1,233 @@
+from __future__ import annotations
+
+import json
+import re
+import unicodedata
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Set, Tuple
+
+# (canonical name used in prompts, aliases); aliases are matched after
+# normalization, so spacing, hyphens and case variants need no entry
+KNOWN_TYPES: Tuple[Tuple[str, Tuple[str, ...]], ...] = (
+    ("오메가3", ("오메가", "omega3", "omega", "피쉬오일", "fishoil", "어유", "epa", "dha", "epadha")),
+    ("크릴오일", ("크릴", "krilloil", "krill")),
+    ("비타민D", ("비타민d3", "비타민디", "vitamind", "vitamind3", "vitd", "d3", "콜레칼시페롤")),
+    ("비타민C", ("비타민씨", "vitaminc", "vitc", "아스코르브산")),
+    ("비타민B", ("비타민b군", "비타민b컴플렉스", "vitaminb", "bcomplex", "비타민비")),
+    ("종합비타민", ("멀티비타민", "multivitamin", "multi", "멀티")),
+    ("마그네슘", ("magnesium",)),
+    ("칼슘", ("calcium",)),
+    ("아연", ("zinc",)),
+    ("철분", ("iron", "철")),
+    ("유산균", ("프로바이오틱스", "probiotics", "probiotic", "락토바실러스")),
+    # prebiotics feed gut bacteria; without their own entry they fuzzy-match 프로바이오틱스
+    ("프리바이오틱스", ("prebiotics", "prebiotic", "프락토올리고당")),
+    ("루테인", ("lutein", "루테인지아잔틴", "지아잔틴")),
+    ("밀크씨슬", ("밀크시슬", "milkthistle", "실리마린")),
+    ("코엔자임Q10", ("코큐텐", "coq10", "코엔자임", "q10")),
+    ("콜라겐", ("collagen", "저분자콜라겐")),
+    ("비오틴", ("biotin",)),
+    ("엽산", ("folate", "folicacid")),
+    ("홍삼", ("redginseng", "인삼")),
+    ("글루코사민", ("glucosamine",)),
+    ("쏘팔메토", ("소팔메토", "sawpalmetto")),
+    ("MSM", ("엠에스엠", "식이유황")),
+    ("프로폴리스", ("propolis",)),
+)
+
+# qualifiers that do not change which catalog applies ("rTG 오메가3", "오메가3 영양제")
+NOISE_TOKENS = frozenset(
+    {
+        "rtg", "tg", "ee", "알티지", "초임계", "식물성", "고함량", "영양제", "보충제", "supplement",
+        "supplements", "캡슐", "capsule", "추천", "제품", "피쉬오일", "fishoil", "fish", "oil", "오일",
+    }
+)
+# dose/count tokens such as "1000iu", "500mg", "60캡슐"
+_DOSE_TOKEN = re.compile(r"^\d+(?:\.\d+)?(?:mg|mcg|ug|µg|iu|g|정|캡슐|개월|일분)$")
+# product-form suffixes glued onto a type ("홍삼정", "철분제", "유산균분말")
+FORM_SUFFIXES = ("정", "제", "환", "액", "분말", "젤리", "스틱")
+# fuzzy matches closer than this to a different type are treated as ambiguous
+AMBIGUITY_MARGIN = 0.05
+_SEPARATORS = re.compile(r"[\s\-_./,·()\[\]+&]+")
+_HANGUL_SYLLABLE = re.compile(r"[가-힣]")
+# parts that name a different product when they differ: numbers ("비타민b12",
+# "b6") and Latin letters glued to Hangul ("비타민k")
+_DISTINCTIVE = re.compile(r"\d+|(?<=[가-힣])[a-z]+")
+
+
+def _names_other(text: str, known: str) -> bool:
+    """Whether `text` has a distinctive part (number, Hangul-glued Latin) missing from `known`."""
+    return any(part not in known for part in _DISTINCTIVE.findall(text))
+
+
+def normalize_tokens(text: str) -> List[str]:
+    """NFKC, lowercase and split on spaces, hyphens and punctuation."""
+    text = unicodedata.normalize("NFKC", text).lower()
+    return [t for t in _SEPARATORS.split(text) if t]
+
+
+def _jamo(text: str) -> str:
+    # decompose Hangul syllables so one-letter typos (오매가 vs 오메가) stay close
+    return unicodedata.normalize("NFD", text) if _HANGUL_SYLLABLE.search(text) else text
+
+
+def _bigrams(text: str) -> Set[str]:
+    padded = f"^{text}$"
+    return {padded[i : i + 2] for i in range(len(padded) - 1)}
+
+
+@dataclass(frozen=True)
+class Resolution:
+    key: str  # cache key: normalized canonical name
+    name: str  # what goes into prompts
+    method: str  # "alias" | "fuzzy" | "passthrough"
+    score: float = 1.0
+
+
+class SupplementIndex:
+    """Maps free-text supplement types to canonical keys.
+
+    Lookup order: exact alias on the compacted text, exact alias once
+    qualifier tokens (rTG, 영양제, ...) are dropped, then a fuzzy match on
+    Hangul-jamo bigrams through an inverted index. Unmatched input passes
+    through with its normalized form as the key. Results are memoized in a
+    bounded LRU, so repeated queries cost one dict lookup.
+    """
+
+    def __init__(
+        self,
+        types: Iterable[Tuple[str, Sequence[str]]] = KNOWN_TYPES,
+        min_score: float = 0.72,
+        memo_size: int = 4096,
+    ) -> None:
+        self.min_score = min_score
+        self.memo_size = memo_size
+        self._alias: Dict[str, str] = {}  # compact alias -> canonical name
+        for name, aliases in types:
+            for alias in (name, *aliases):
+                self._alias["".join(normalize_tokens(alias))] = name
+        self._grams: List[Set[str]] = []
+        self._gram_names: List[str] = []
+        self._gram_aliases: List[str] = []
+        self._postings: Dict[str, List[int]] = {}
+        for alias, name in self._alias.items():
+            grams = _bigrams(_jamo(alias))
+            idx = len(self._grams)
+            self._grams.append(grams)
+            self._gram_names.append(name)
+            self._gram_aliases.append(alias)
+            for g in grams:
+                self._postings.setdefault(g, []).append(idx)
+        self._memo: "OrderedDict[str, Resolution]" = OrderedDict()
+        self.stats: Counter = Counter()
+
+    def resolve(self, text: str) -> Resolution:
+        memo = self._memo.get(text)
+        if memo is not None:
+            self._memo.move_to_end(text)
+            self.stats[memo.method] += 1
+            return memo
+        result = self._resolve(text)
+        self._memo[text] = result
+        if len(self._memo) > self.memo_size:
+            self._memo.popitem(last=False)
+        self.stats[result.method] += 1
+        return result
+
+    def _canonical(self, name: str, method: str, score: float = 1.0) -> Resolution:
+        return Resolution(key="".join(normalize_tokens(name)), name=name, method=method, score=score)
+
+    def _resolve(self, text: str) -> Resolution:
+        tokens = normalize_tokens(text)
+        compact = "".join(tokens)
+        name = self._alias.get(compact)
+        if name is not None:
+            return self._canonical(name, "alias")
+        core_tokens = [t for t in tokens if t not in NOISE_TOKENS and not _DOSE_TOKEN.match(t)]
+        core = "".join(core_tokens)
+        name = self._alias.get(core)
+        if name is not None:
+            return self._canonical(name, "alias")
+        names: List[str] = []
+        matched: List[str] = []  # the aliases tokens matched
+        leftover: List[str] = []
+        for token in core_tokens:
+            # "종근당 오메가3": one token is enough when it is a known alias
+            alias = token if len(token) >= 2 and token in self._alias else None
+            if alias is None:
+                stem = next(
+                    (token[: -len(sfx)] for sfx in FORM_SUFFIXES if token.endswith(sfx) and len(token) > len(sfx) + 1),
+                    None,
+                )
+                alias = stem if stem and stem in self._alias else None
+            if alias is None:
+                leftover.append(token)
+                continue
+            matched.append(alias)
+            if self._alias[alias] not in names:
+                names.append(self._alias[alias])
+        if len(names) == 1:
+            resolution = self._canonical(names[0], "alias")
+            # "오메가 6", "omega 3-6-9": the number left over names another product
+            if not _names_other(" ".join(leftover), " ".join((*matched, resolution.key))):
+                return resolution
+            return self._passthrough(text, core or compact)
+        # several known types ("오메가3 비타민D") name a combination product,
+        # not a spelling of one of them: neither alias nor fuzzy match applies
+        match = self._fuzzy(core or compact) if not names else None
+        if match is not None:
+            return self._canonical(match[0], "fuzzy", match[1])
+        return self._passthrough(text, core or compact)
+
+    def _passthrough(self, text: str, key: str) -> Resolution:
+        return Resolution(key=key, name=" ".join(text.split()), method="passthrough", score=0.0)
+
+    def _fuzzy(self, compact: str) -> Optional[Tuple[str, float]]:
+        grams = _bigrams(_jamo(compact))
+        if len(grams) < 4:
+            return None
+        shared: Counter = Counter()
+        for g in grams:
+            for idx in self._postings.get(g, ()):
+                shared[idx] += 1
+        best: Dict[str, Tuple[float, str]] = {}  # canonical name -> (score, closest alias)
+        for idx, n in shared.items():
+            score = 2.0 * n / (len(grams) + len(self._grams[idx]))  # Dice coefficient
+            name = self._gram_names[idx]
+            if score > best.get(name, (0.0, ""))[0]:
+                best[name] = (score, self._gram_aliases[idx])
+        ranked = sorted(best.items(), key=lambda kv: kv[1][0], reverse=True)
+        if not ranked or ranked[0][1][0] < self.min_score:
+            return None
+        if len(ranked) > 1 and ranked[1][1][0] >= ranked[0][1][0] - AMBIGUITY_MARGIN:
+            # "비타민" is as close to 비타민D as to 비타민C: do not guess
+            return None
+        name, (score, alias) = ranked[0]
+        if _names_other(compact, alias):
+            # "비타민b12" is not a typo of 비타민B: the suffix names another product
+            return None
+        return name, score
+
+    def snapshot(self) -> Dict[str, int]:
+        return {
+            "alias": self.stats["alias"],
+            "fuzzy": self.stats["fuzzy"],
+            "passthrough": self.stats["passthrough"],
+            "memo_size": len(self._memo),
+        }
+
+
+def load_types(raw: Optional[str]) -> Tuple[Tuple[str, Tuple[str, ...]], ...]:
+    """KNOWN_TYPES extended by JSON, e.g. the SUPPLEMENT_ALIASES env var.
+
+    Format: `{"오메가3": ["알래스카 오메가"], "새 유형": ["alias"]}`; aliases for
+    an existing name are added to it, new names become new types.
+    """
+    if not raw:
+        return KNOWN_TYPES
+    extra: Mapping[str, Sequence[str]] = json.loads(raw)
+    merged: Dict[str, Tuple[str, ...]] = dict(KNOWN_TYPES)
+    for name, aliases in extra.items():
+        merged[name] = merged.get(name, ()) + tuple(str(a) for a in aliases)
+    return tuple(merged.items())
@@ -0,0 +1,346 @@
+from __future__ import annotations
+
+import logging
+import math
+import re
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+
+from resilience import CircuitOpenError, LoadShedError
+
+logger = logging.getLogger("supplement")
+
+# ---------------------------------------------------------------------------
+# Metrics registry (Prometheus text exposition format 0.0.4)
+# ---------------------------------------------------------------------------
+
+LabelValues = Tuple[str, ...]
+# (labels, value) samples of one metric family, produced at scrape time
+Samples = List[Tuple[Dict[str, str], float]]
+Collector = Callable[[], Iterable[Tuple[str, str, str, Samples]]]
+
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 25.0, 60.0)
+BYTES_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+TOKENS_BUCKETS = (64, 256, 512, 1024, 2048, 4096, 8192, 32768)
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    parts = [f'{n}="{_escape(v)}"' for n, v in zip(names, values)]
+    if extra:
+        parts.append(extra)
+    return "{" + ",".join(parts) + "}" if parts else ""
+
+
+def _format_value(value: float) -> str:
+    value = float(value)
+    if value == float("inf"):
+        return "+Inf"
+    return str(int(value)) if value.is_integer() else repr(value)
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        self.name = name
+        self.help = help
+        self.labelnames = tuple(labelnames)
+
+    def _key(self, labels: Dict[str, str]) -> LabelValues:
+        if set(labels) != set(self.labelnames):
+            raise ValueError(f"{self.name} expects labels {self.labelnames}, got {tuple(labels)}")
+        return tuple(str(labels[n]) for n in self.labelnames)
+
+    def render(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name: str, help: str, labelnames: Sequence[str] = ()) -> None:
+        super().__init__(name, help, labelnames)
+        self._values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1.0, **labels: str) -> None:
+        key = self._key(labels)
+        self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels: str) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def render(self) -> List[str]:
+        return [f"{self.name}{_format_labels(self.labelnames, k)} {_format_value(v)}" for k, v in self._values.items()]
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS
+    ) -> None:
+        super().__init__(name, help, labelnames)
+        self.buckets = tuple(sorted(buckets)) + (float("inf"),)
+        # per label set: [bucket counts..., sum, count]
+        self._values: Dict[LabelValues, List[float]] = {}
+
+    def observe(self, value: float, **labels: str) -> None:
+        key = self._key(labels)
+        state = self._values.get(key)
+        if state is None:
+            state = self._values[key] = [0.0] * (len(self.buckets) + 2)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                state[i] += 1
+                break
+        state[-2] += value
+        state[-1] += 1
+
+    def render(self) -> List[str]:
+        lines = []
+        for key, state in self._values.items():
+            cumulative = 0.0
+            for bound, count in zip(self.buckets, state):
+                cumulative += count
+                le = f'le="{_format_value(bound)}"'
+                lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, key, le)} {_format_value(cumulative)}")
+            labels = _format_labels(self.labelnames, key)
+            lines.append(f"{self.name}_sum{labels} {_format_value(state[-2])}")
+            lines.append(f"{self.name}_count{labels} {_format_value(state[-1])}")
+        return lines
+
+
+class Registry:
+    """Holds the app's metrics and renders them for a Prometheus scrape.
+
+    Counters and histograms are updated in place as events happen;
+    collectors are called at scrape time for values that already live
+    elsewhere (cache stats, breaker state).
+    """
+
+    def __init__(self) -> None:
+        self._metrics: Dict[str, _Metric] = {}
+        self._collectors: List[Collector] = []
+
+    def _register(self, metric: _Metric) -> Any:
+        if metric.name in self._metrics:
+            raise ValueError(f"metric {metric.name} already registered")
+        self._metrics[metric.name] = metric
+        return metric
+
+    def counter(self, name: str, help: str, labelnames: Sequence[str] = ()) -> Counter:
+        return self._register(Counter(name, help, labelnames))
+
+    def histogram(
+        self, name: str, help: str, labelnames: Sequence[str] = (), buckets: Sequence[float] = SECONDS_BUCKETS
+    ) -> Histogram:
+        return self._register(Histogram(name, help, labelnames, buckets))
+
+    def add_collector(self, collector: Collector) -> None:
+        self._collectors.append(collector)
+
+    def render(self) -> str:
+        lines: List[str] = []
+        for metric in self._metrics.values():
+            lines.append(f"# HELP {metric.name} {metric.help}")
+            lines.append(f"# TYPE {metric.name} {metric.kind}")
+            lines.extend(metric.render())
+        for collector in self._collectors:
+            for name, kind, help, samples in collector():
+                lines.append(f"# HELP {name} {help}")
+                lines.append(f"# TYPE {name} {kind}")
+                for labels, value in samples:
+                    lines.append(f"{name}{_format_labels(list(labels), list(labels.values()))} {_format_value(value)}")
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+HTTP_REQUESTS = REGISTRY.counter("supplement_http_requests_total", "HTTP requests by route and status", ("method", "route", "status"))
+HTTP_SECONDS = REGISTRY.histogram("supplement_http_request_seconds", "HTTP request duration including streamed bodies", ("method", "route"))
+STAGE_SECONDS = REGISTRY.histogram(
+    "supplement_stage_seconds", "Pipeline stage duration", ("endpoint", "stage", "status")
+)
+UPSTREAM_SECONDS = REGISTRY.histogram(
+    "supplement_upstream_seconds", "Upstream LLM call duration", ("upstream", "op", "status")
+)
+UPSTREAM_PROMPT_BYTES = REGISTRY.histogram(
+    "supplement_upstream_prompt_bytes", "Prompt size sent upstream (UTF-8 bytes)", ("upstream", "op"), BYTES_BUCKETS
+)
+UPSTREAM_RESPONSE_BYTES = REGISTRY.histogram(
+    "supplement_upstream_response_bytes", "Response text size received (UTF-8 bytes)", ("upstream", "op"), BYTES_BUCKETS
+)
+UPSTREAM_PROMPT_TOKENS = REGISTRY.histogram(
+    "supplement_upstream_prompt_tokens_estimate", "Estimated prompt tokens sent upstream", ("upstream", "op"), TOKENS_BUCKETS
+)
+FALLBACKS = REGISTRY.counter("supplement_fallbacks_total", "Degraded responses by kind", ("kind",))
+
+
+def _status_of(exc: Optional[BaseException]) -> str:
+    if exc is None:
+        return "ok"
+    if not isinstance(exc, Exception):
+        return "cancelled"
+    # HTTPException codes as raised by call_perplexity_json
+    code = getattr(exc, "status_code", None)
+    if isinstance(exc, LoadShedError) or code == 429:
+        return "shed"
+    if isinstance(exc, CircuitOpenError) or code == 503:
+        return "circuit_open"
+    if isinstance(exc, TimeoutError) or code == 504:
+        return "timeout"
+    return "error"
+
+
+@contextmanager
+def stage(endpoint: str, name: str) -> Iterator[None]:
+    """Time one pipeline stage into STAGE_SECONDS and the debug log."""
+    started = time.perf_counter()
+    exc: Optional[BaseException] = None
+    try:
+        yield
+    except BaseException as e:
+        exc = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        status = _status_of(exc)
+        STAGE_SECONDS.observe(elapsed, endpoint=endpoint, stage=name, status=status)
+        logger.debug("stage %s.%s %s in %.1fms", endpoint, name, status, elapsed * 1e3)
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough LLM token count: ~4 ASCII characters or ~1.5 other characters (Hangul) per token.
+
+    Good enough to compare prompt variants and spot growth; not a tokenizer.
+    """
+    ascii_chars = sum(1 for ch in text if ch < "\x80")
+    return math.ceil(ascii_chars / 4 + (len(text) - ascii_chars) / 1.5)
+
+
+class UpstreamCall:
+    """Handle yielded by `upstream_call`; report the response text through it."""
+
+    def __init__(self) -> None:
+        self.response_bytes: Optional[int] = None
+
+    def add_response(self, text: str) -> None:
+        self.response_bytes = (self.response_bytes or 0) + len(text.encode("utf-8"))
+
+
+@contextmanager
+def upstream_call(upstream: str, op: str, prompt: str) -> Iterator[UpstreamCall]:
+    """Record duration, status, prompt/response sizes and prompt token estimate of one upstream call."""
+    call = UpstreamCall()
+    prompt_bytes = len(prompt.encode("utf-8"))
+    prompt_tokens = estimate_tokens(prompt)
+    started = time.perf_counter()
+    exc: Optional[BaseException] = None
+    try:
+        yield call
+    except BaseException as e:
+        exc = e
+        raise
+    finally:
+        elapsed = time.perf_counter() - started
+        status = _status_of(exc)
+        UPSTREAM_SECONDS.observe(elapsed, upstream=upstream, op=op, status=status)
+        UPSTREAM_PROMPT_BYTES.observe(prompt_bytes, upstream=upstream, op=op)
+        UPSTREAM_PROMPT_TOKENS.observe(prompt_tokens, upstream=upstream, op=op)
+        if call.response_bytes is not None:
+            UPSTREAM_RESPONSE_BYTES.observe(call.response_bytes, upstream=upstream, op=op)
+        log = logger.info if status == "ok" else logger.warning
+        log(
+            "%s.%s %s in %.1fms prompt=%dB ~%dtok response=%sB",
+            upstream, op, status, elapsed * 1e3, prompt_bytes, prompt_tokens,
+            call.response_bytes if call.response_bytes is not None else "-",
+        )
+
+
+def fallback(kind: str) -> None:
+    FALLBACKS.inc(kind=kind)
+    logger.info("fallback %s", kind)
+
+
+# ---------------------------------------------------------------------------
+# Trace IDs
+# ---------------------------------------------------------------------------
+
+TRACE_HEADER = "x-request-id"
+_TRACE_ID_OK = re.compile(r"^[A-Za-z0-9._-]{1,64}$")
+_trace_id: ContextVar[str] = ContextVar("trace_id", default="-")
+
+
+def trace_headers() -> Dict[str, str]:
+    """The current trace ID as an outbound header, so upstream calls can be tied to requests."""
+    trace_id = _trace_id.get()
+    return {TRACE_HEADER: trace_id} if trace_id != "-" else {}
+
+
+class TraceIdFilter(logging.Filter):
+    """Stamp every log record with the current request's trace ID."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.trace_id = _trace_id.get()
+        return True
+
+
+def configure_logging(level: str = "INFO") -> None:
+    """Attach a trace-aware handler to the app logger (once)."""
+    if logger.handlers:
+        return
+    handler = logging.StreamHandler()
+    handler.addFilter(TraceIdFilter())
+    handler.setFormatter(logging.Formatter("%(asctime)s %(levelname)s [%(trace_id)s] %(name)s: %(message)s"))
+    logger.addHandler(handler)
+    logger.setLevel(level.upper())
+    logger.propagate = False
+
+
+class TelemetryMiddleware:
+    """ASGI middleware: assigns a trace ID and times every HTTP request.
+
+    An incoming `X-Request-ID` is reused when it looks sane, otherwise a
+    new one is generated; either way it is echoed on the response. Timing
+    covers the full response body, so streamed endpoints are measured to
+    their last event. Routes are labelled by their path template.
+    """
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: Dict[str, Any], receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        incoming = next((v.decode("latin-1") for k, v in scope.get("headers", []) if k == b"x-request-id"), "")
+        trace_id = incoming if _TRACE_ID_OK.match(incoming) else uuid.uuid4().hex
+        token = _trace_id.set(trace_id)
+        status = 500
+        started = time.perf_counter()
+
+        async def send_with_trace(message: Dict[str, Any]) -> None:
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                message.setdefault("headers", [])
+                message["headers"] = list(message["headers"]) + [(TRACE_HEADER.encode(), trace_id.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_trace)
+        finally:
+            elapsed = time.perf_counter() - started
+            route = getattr(scope.get("route"), "path", "unmatched")
+            HTTP_REQUESTS.inc(method=scope["method"], route=route, status=str(status))
+            HTTP_SECONDS.observe(elapsed, method=scope["method"], route=route)
+            logger.info("%s %s %d %.1fms", scope["method"], scope["path"], status, elapsed * 1e3)
+            _trace_id.reset(token)
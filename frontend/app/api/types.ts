@@ -13,10 +13,13 @@ export type ClarifyQuestion = {
 
 export type ClarifyResponse = {
   questions: ClarifyQuestion[];
+  prefetch_token?: string | null;
 };
 
 export type RecommendInput = ClarifyInput & {
   answers: JSONRecord;
+  products?: Product[];
+  prefetch_token?: string | null;
 };
 
 export type Product = {
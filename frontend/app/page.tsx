@@ -41,6 +41,8 @@ export default function Home() {
   const [answers, setAnswers] = useState<JSONRecord>({});
   const [result, setResult] = useState<RecommendResult | null>(null);
   const [initialProducts, setInitialProducts] = useState<Product[] | null>(null);
+  // lets /api/recommend reuse the catalog and insights clarify started fetching
+  const [prefetchToken, setPrefetchToken] = useState<string | null>(null);
   const [startedAt, setStartedAt] = useState<number | null>(null);
 
   const supplementOptions = [
@@ -93,11 +95,12 @@ export default function Home() {
       const data: ClarifyResponse = await res.json();
       const searchData = await searchPromise;
       if (searchData?.products) setInitialProducts(searchData.products);
+      setPrefetchToken(data.prefetch_token ?? null);
       if (data.questions && data.questions.length > 0) {
         setQuestions(data.questions);
         setStep("clarify");
       } else {
-        await doRecommend({});
+        await doRecommend({}, data.prefetch_token ?? null);
       }
     } catch (e) {
       console.error(e);
@@ -107,7 +110,7 @@ export default function Home() {
     }
   }
 
-  async function doRecommend(extraAnswers: JSONRecord) {
+  async function doRecommend(extraAnswers: JSONRecord, token: string | null = prefetchToken) {
     setLoading(true);
     setStep("loading");
     try {
@@ -121,6 +124,7 @@ export default function Home() {
           target_and_concerns: concerns,
           answers: { ...answers, ...extraAnswers },
           products: initialProducts ?? undefined,
+          prefetch_token: token ?? undefined,
         }),
       });
       let data: unknown = null;
@@ -517,6 +521,7 @@ export default function Home() {
               setQuestions([]); 
               setAnswers({}); 
               setInitialProducts(null);
+              setPrefetchToken(null);
               setIsCustomSupplement(false);
               setCustomSupplementType("");
               setSupplementType("오메가‑3");
@@ -551,6 +556,7 @@ export default function Home() {
                 setQuestions([]); 
                 setAnswers({}); 
                 setInitialProducts(null);
+                setPrefetchToken(null);
                 setIsCustomSupplement(false);
                 setCustomSupplementType("");
                 setSupplementType("오메가‑3");